@@ -0,0 +1,43 @@
+"""Índices trigram/full-text para a busca de clientes
+
+Revision ID: 5d2a9c4e7f10
+Revises: bf6eaf5f1062
+Create Date: 2026-10-18 11:02:13.418233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a9c4e7f10'
+down_revision: Union[str, None] = 'bf6eaf5f1062'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Índices GIN trigram: atendem ILIKE por prefixo/substring e o operador de similaridade (%)
+    for coluna in ('nome', 'email', 'cpf_cnpj', 'telefone'):
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_clientes_{coluna}_trgm "
+            f"ON clientes USING gin ({coluna} gin_trgm_ops)"
+        )
+
+    # Índice full-text (sem stemming) para busca por palavras do nome/email
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_clientes_busca_tsv ON clientes USING gin "
+        "(to_tsvector('simple', coalesce(nome, '') || ' ' || coalesce(email, '')))"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_clientes_busca_tsv")
+    for coluna in ('nome', 'email', 'cpf_cnpj', 'telefone'):
+        op.execute(f"DROP INDEX IF EXISTS ix_clientes_{coluna}_trgm")
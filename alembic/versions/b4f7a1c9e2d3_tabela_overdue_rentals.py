@@ -0,0 +1,48 @@
+"""Tabela overdue_rentals (resumo das locações em atraso)
+
+Revision ID: b4f7a1c9e2d3
+Revises: 9c5d2e7a4b18
+Create Date: 2026-10-18 16:52:37.204918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4f7a1c9e2d3'
+down_revision: Union[str, None] = '9c5d2e7a4b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'overdue_rentals',
+        sa.Column('rental_id', sa.Integer(), nullable=False),
+        sa.Column('cliente_id', sa.Integer(), nullable=False),
+        sa.Column('cliente_nome', sa.String(length=100), nullable=True),
+        sa.Column('car_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('license_plate', sa.String(length=10), nullable=True),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('days_overdue', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['rental_id'], ['locacoes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('rental_id')
+    )
+    op.create_index(op.f('ix_overdue_rentals_cliente_id'), 'overdue_rentals', ['cliente_id'], unique=False)
+    op.create_index(op.f('ix_overdue_rentals_days_overdue'), 'overdue_rentals', ['days_overdue'], unique=False)
+    op.create_index(op.f('ix_overdue_rentals_refreshed_at'), 'overdue_rentals', ['refreshed_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_overdue_rentals_refreshed_at'), table_name='overdue_rentals')
+    op.drop_index(op.f('ix_overdue_rentals_days_overdue'), table_name='overdue_rentals')
+    op.drop_index(op.f('ix_overdue_rentals_cliente_id'), table_name='overdue_rentals')
+    op.drop_table('overdue_rentals')
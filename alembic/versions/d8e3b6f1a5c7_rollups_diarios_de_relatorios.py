@@ -0,0 +1,55 @@
+"""Rollups diários dos relatórios (daily_revenue e daily_car_usage)
+
+Revision ID: d8e3b6f1a5c7
+Revises: b4f7a1c9e2d3
+Create Date: 2026-10-18 18:05:44.318260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e3b6f1a5c7'
+down_revision: Union[str, None] = 'b4f7a1c9e2d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tipos já criados pelas tabelas cars e locacoes
+carcategory = postgresql.ENUM(
+    'ECONOMICO', 'INTERMEDIARIO', 'EXECUTIVO', 'LUXURY', 'SUV', name='carcategory', create_type=False
+)
+paymentmethod = postgresql.ENUM(
+    'DINHEIRO', 'CARTAO_CREDITO', 'CARTAO_DEBITO', 'PIX', 'TRANSFERENCIA', name='paymentmethod', create_type=False
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'daily_revenue',
+        sa.Column('dia', sa.Date(), nullable=False),
+        sa.Column('category', carcategory, nullable=False),
+        sa.Column('payment_method', paymentmethod, nullable=False),
+        sa.Column('rentals', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint('dia', 'category', 'payment_method')
+    )
+    op.create_table(
+        'daily_car_usage',
+        sa.Column('dia', sa.Date(), nullable=False),
+        sa.Column('car_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('rental_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('dia', 'car_id')
+    )
+    op.create_index(op.f('ix_daily_car_usage_rental_id'), 'daily_car_usage', ['rental_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_daily_car_usage_rental_id'), table_name='daily_car_usage')
+    op.drop_table('daily_car_usage')
+    op.drop_table('daily_revenue')
@@ -1,21 +1,46 @@
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
 
 # Seus imports de rotas...
-from src.config.database import Base, engine
+from src.config.database import ENV, SessionLocal, create_schema, get_engine
+from src.config.password_hasher import password_hasher
+from src.config.sqlite import SQLITE_MAINTENANCE_INTERVAL, SQLITE_PROFILE, sqlite_maintenance_loop
 from src.routes.car_routes import backend as car_router
-from src.routes.rental_routes import UPLOAD_DIRECTORY, backend as rental_router
+from src.routes.rental_routes import UPLOAD_DIRECTORY, UPLOAD_TMP_DIRECTORY, backend as rental_router
 from src.routes.clientes_routes import backend as clientes_router
 from src.routes.login_router import backend as login_router
+from src.routes.metrics_routes import backend as metrics_router
+from src.routes.report_routes import backend as report_router
+from src.middleware.idempotency import IdempotentReplay, idempotency_middleware, idempotent_replay_handler
+from src.middleware.metrics import metrics_middleware
+from src.middleware.replica import read_your_writes_middleware
+from src.services.availability_service import availability_index
+from src.services.change_feed import change_feed
+from src.services.cliente_service import ensure_sqlite_search_index
+from src.services.overdue_service import OVERDUE_SWEEP_INTERVAL, run_overdue_sweep
+from src.services.report_service import REPORTS_REBUILD_AT, run_reports_rebuild
+from src.services.scheduler import SCHEDULER_ENABLED, scheduler
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Em produção o esquema vem do Alembic (`alembic upgrade head`); create_all
+# fica apenas como conveniência de desenvolvimento/testes.
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "0" if ENV == "production" else "1") == "1"
+# FAST_START=1: o worker aceita requisições antes de aquecer os índices em
+# memória, que são carregados em segundo plano (ou na primeira utilização).
+FAST_START = os.getenv("FAST_START", "0") == "1"
+
 # --- INÍCIO DA CONFIGURAÇÃO DO FRONTEND E PATHS ---
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -28,8 +53,64 @@ templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
 BASE_URL_API = os.getenv("API_BASE_URL", "http://localhost:8000")
 
+def criar_indice_busca_clientes():
+    """No SQLite, mantém a tabela FTS5 usada pela busca de clientes."""
+    ensure_sqlite_search_index(get_engine())
+
+
+def carregar_indice_disponibilidade():
+    """Carrega em memória os períodos reservados de cada carro."""
+    db = SessionLocal()
+    try:
+        availability_index.ensure_loaded(db)
+    finally:
+        db.close()
+
+
+def aquecer():
+    """Aquecimento em segundo plano (FAST_START): falhas são só registradas."""
+    for tarefa in (criar_indice_busca_clientes, carregar_indice_disponibilidade):
+        try:
+            tarefa()
+        except Exception as e:
+            logger.error(f"Falha no aquecimento ({tarefa.__name__}): {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
+    os.makedirs(UPLOAD_TMP_DIRECTORY, exist_ok=True)
+    if DB_CREATE_ALL:
+        await asyncio.to_thread(create_schema)
+    if FAST_START:
+        aquecimento = asyncio.create_task(asyncio.to_thread(aquecer))
+    else:
+        await asyncio.to_thread(criar_indice_busca_clientes)
+        await asyncio.to_thread(carregar_indice_disponibilidade)
+    manutencao = None
+    engine = get_engine()
+    if engine.dialect.name == "sqlite" and SQLITE_PROFILE == "performance" and SQLITE_MAINTENANCE_INTERVAL > 0:
+        manutencao = asyncio.create_task(sqlite_maintenance_loop(engine))
+    # Eventos de alteração de outros workers (mantém os caches locais coerentes)
+    await asyncio.to_thread(change_feed.start, engine)
+    if SCHEDULER_ENABLED:
+        scheduler.add_job("overdue_sweep", run_overdue_sweep, interval=OVERDUE_SWEEP_INTERVAL)
+        scheduler.add_job("reports_rebuild", run_reports_rebuild, at=REPORTS_REBUILD_AT)
+        scheduler.start(engine)
+    yield
+    await scheduler.stop()
+    await asyncio.to_thread(change_feed.stop)
+    if manutencao is not None:
+        manutencao.cancel()
+    if FAST_START and not aquecimento.done():
+        await aquecimento
+    password_hasher.shutdown()
+
+
 app = FastAPI(
     title="LOCACAR",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     description="API for Locacar, a car rental service",
     version="1.0.0",
     docs_url="/docs",
@@ -53,10 +134,8 @@ app.add_middleware(
 # Arquivos estáticos
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 # A linha abaixo precisa ser adicionada para servir as imagens da CNH
-app.mount("/cnh_images", StaticFiles(directory=UPLOAD_DIRECTORY), name="cnh_images")
-
-# Cria tabelas
-Base.metadata.create_all(bind=engine)
+# (o diretório é criado no lifespan)
+app.mount("/cnh_images", StaticFiles(directory=UPLOAD_DIRECTORY, check_dir=False), name="cnh_images")
 
 # ... (Rotas do Frontend - Sem alterações) ...
 @app.get("/", response_class=HTMLResponse)
@@ -129,7 +208,14 @@ app.include_router(clientes_router, prefix="/clientes", tags=["Clientes"])
 # A rota de upload da CNH deve ser incluída sem prefixo
 app.include_router(rental_router, prefix="/rental", tags=["Locações"])
 app.include_router(login_router, prefix="/login", tags=["Login"])
+app.include_router(metrics_router, tags=["Métricas"])
+app.include_router(report_router, prefix="/reports", tags=["Relatórios"])
+
 
+# Respostas guardadas para Idempotency-Key; registrado primeiro para ficar
+# mais perto das rotas (só guarda o que a rota realmente respondeu)
+app.middleware("http")(idempotency_middleware)
+app.add_exception_handler(IdempotentReplay, idempotent_replay_handler)
 
 # Middleware global para exceções
 @app.middleware("http")
@@ -142,6 +228,13 @@ async def add_process_time_header(request: Request, call_next):
             content={"message": "Internal Server Error", "error": str(err)}
         )
 
+# Aderência ao primário após escritas (só tem efeito com réplica configurada)
+app.middleware("http")(read_your_writes_middleware)
+
+# Instrumentação (latência, SQL e tamanho por rota); registrada por último
+# para envolver também o middleware de exceções acima
+app.middleware("http")(metrics_middleware)
+
 # Handler 404 personalizado
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc):
@@ -157,6 +250,10 @@ async def not_found_handler(request: Request, exc):
                 "GET /locacoes",
                 "GET /cars",
                 "POST /cars",
+                "GET /cars/availability",
+                "GET /cars/export",
+                "GET /clientes/export",
+                "GET /rental/export",
                 "GET /cars/{car_id}",
                 "PUT /cars/{car_id}",
                 "DELETE /cars/{car_id}",
@@ -0,0 +1,107 @@
+"""
+Benchmark: uploads simultâneos de CNH (UploadFile + cópia bloqueante vs. streaming).
+
+Uso:
+    python benchmarks/bench_cnh_upload.py [uploads] [MiB por arquivo]
+
+Sobe, no próprio processo (ASGI), o router de locações num diretório
+temporário, junto com uma rota que reproduz o upload antigo
+(`UploadFile` + `shutil.copyfileobj` dentro do event loop), e envia
+`uploads` arquivos ao mesmo tempo para cada uma. Mede o tempo total e o
+maior atraso do event loop (um ticker de 10 ms rodando durante os
+uploads): é o tempo em que as outras requisições do worker ficam paradas.
+Confere também que os arquivos gravados pelo caminho novo têm o conteúdo
+enviado.
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, File, UploadFile  # noqa: E402
+
+from src.routes.rental_routes import UPLOAD_DIRECTORY, backend as rental_router  # noqa: E402
+
+TICK = 0.01
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def montar_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(rental_router, prefix="/rental")
+
+    @app.post("/antigo/upload-cnh/", status_code=201)
+    async def upload_antigo(cnh_file: UploadFile = File(...)):
+        nome = f"{uuid.uuid4()}_{cnh_file.filename}"
+        with open(os.path.join(UPLOAD_DIRECTORY, nome), "wb") as buffer:
+            shutil.copyfileobj(cnh_file.file, buffer)
+        return {"cnh_url": f"/cnh_images/{nome}"}
+
+    return app
+
+
+async def medir(client: httpx.AsyncClient, rota: str, arquivos: list) -> tuple:
+    """Envia todos os arquivos ao mesmo tempo; devolve (segundos, maior atraso do loop em ms, respostas)."""
+    atraso = 0.0
+    rodando = True
+
+    async def ticker():
+        nonlocal atraso
+        while rodando:
+            antes = time.perf_counter()
+            await asyncio.sleep(TICK)
+            atraso = max(atraso, time.perf_counter() - antes - TICK)
+
+    tarefa = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK)
+    inicio = time.perf_counter()
+    respostas = await asyncio.gather(*(
+        # BytesIO: o corpo chega em pedaços de 64 KiB, como num servidor real
+        client.post(rota, files={"cnh_file": ("cnh.jpg", io.BytesIO(conteudo), "image/jpeg")}) for conteudo in arquivos
+    ))
+    total = time.perf_counter() - inicio
+    rodando = False
+    await tarefa
+    for r in respostas:
+        r.raise_for_status()
+    return total, atraso * 1000, respostas
+
+
+async def executar(uploads: int, mib: float):
+    tamanho = int(mib * 1024 * 1024)
+    arquivos = [b"\xff\xd8\xff\xe0" + os.urandom(tamanho - 4) for _ in range(uploads)]
+    transporte = httpx.ASGITransport(app=montar_app())
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=120) as client:
+        print(f"{uploads} uploads simultâneos de {mib:g} MiB")
+        print(f"{'caminho':<10} {'tempo (s)':>10} {'MiB/s':>8} {'atraso máx. do loop (ms)':>25}")
+        for nome, rota in (("antigo", "/antigo/upload-cnh/"), ("streaming", "/rental/upload-cnh/")):
+            total, atraso, respostas = await medir(client, rota, arquivos)
+            print(f"{nome:<10} {total:10.2f} {uploads * mib / total:8.1f} {atraso:25.1f}")
+
+        for conteudo, r in zip(arquivos, respostas):
+            caminho = os.path.join(UPLOAD_DIRECTORY, r.json()["cnh_url"].rsplit("/", 1)[1])
+            with open(caminho, "rb") as f:
+                assert hashlib.sha256(f.read()).hexdigest() == hashlib.sha256(conteudo).hexdigest()
+
+
+def main():
+    uploads = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    mib = float(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        os.makedirs(UPLOAD_DIRECTORY)
+        asyncio.run(executar(uploads, mib))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: corrida de reservas — centenas de locações simultâneas para o mesmo carro.
+
+Uso:
+    python benchmarks/bench_double_booking.py [--requisicoes 300] [--rodadas 3] [--url http://localhost:8000]
+
+Sem `--url`, sobe a aplicação no próprio processo (ASGI, com lifespan) sobre
+um banco SQLite temporário; com `--url`, dispara contra um servidor já em
+execução (útil com vários workers e PostgreSQL).
+
+Em cada rodada cadastra um carro e um cliente e envia `--requisicoes`
+POST /rental/locacoes ao mesmo tempo, com períodos sobrepostos. Mostra a
+contagem por status HTTP e o tempo total, e confere que exatamente uma
+locação ativa foi criada para o carro. Sai com código 1 se houver reserva
+dupla ou erro 500.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, RAIZ)
+
+import httpx  # noqa: E402
+
+
+async def _cadastrar(client: httpx.AsyncClient):
+    sufixo = uuid.uuid4().int % 10**6
+    r = await client.post("/cars/carros", json={
+        "brand": "VW", "model": "Gol", "year": 2020, "color": "Prata",
+        "license_plate": f"RC{sufixo:06d}", "category": "ECONOMICO", "daily_rate": 100,
+        "mileage": 0, "fuel_type": "FLEX", "transmission_type": "MANUAL", "passengers": 5,
+    })
+    r.raise_for_status()
+    carro = r.json()
+    cpf = f"{uuid.uuid4().int % 10**11:011d}"
+    r = await client.post("/clientes/", json={
+        "nome": "Cliente Corrida", "email": f"corrida{cpf}@example.com", "cpf_cnpj": cpf, "senha": "segredo1",
+    })
+    r.raise_for_status()
+    return carro, r.json()
+
+
+async def rodada(client: httpx.AsyncClient, requisicoes: int) -> bool:
+    carro, cliente = await _cadastrar(client)
+    inicio = date.today() + timedelta(days=1)
+
+    async def reservar(i: int) -> int:
+        # Períodos diferentes, todos sobrepostos ao primeiro
+        start = inicio + timedelta(days=i % 3)
+        try:
+            r = await client.post("/rental/locacoes", json={
+                "cliente_id": cliente["id"], "car_id": carro["id"],
+                "start_date": start.isoformat(), "end_date": (start + timedelta(days=5)).isoformat(),
+                "mileage_start": 0, "payment_method": "PIX",
+            })
+        except httpx.HTTPError:
+            return 0
+        return r.status_code
+
+    t0 = time.perf_counter()
+    status = Counter(await asyncio.gather(*(reservar(i) for i in range(requisicoes))))
+    duracao = time.perf_counter() - t0
+
+    r = await client.get("/rental/locacoes", params={"status_filter": "ATIVA", "limit": 1000})
+    r.raise_for_status()
+    ativas = sum(1 for locacao in r.json() if str(locacao["car_id"]) == str(carro["id"]))
+
+    resumo = "  ".join(f"{codigo}: {n}" for codigo, n in sorted(status.items()))
+    print(f"{requisicoes} requisições em {duracao:6.2f} s  [{resumo}]  locações ativas do carro: {ativas}")
+    return ativas == 1 and status[201] == 1 and not status[500] and not status[0]
+
+
+async def executar(args) -> bool:
+    if args.url:
+        limites = httpx.Limits(max_connections=args.requisicoes)
+        async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limites) as client:
+            return all([await rodada(client, args.requisicoes) for _ in range(args.rodadas)])
+
+    from app import app
+
+    # Banco SQLite descartável: a URL de desenvolvimento é relativa ao diretório
+    # atual e os engines só são criados no primeiro uso
+    os.chdir(tempfile.mkdtemp())
+
+    async with app.router.lifespan_context(app):
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=60) as client:
+            return all([await rodada(client, args.requisicoes) for _ in range(args.rodadas)])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requisicoes", type=int, default=300)
+    parser.add_argument("--rodadas", type=int, default=3)
+    parser.add_argument("--url", default=None)
+    args = parser.parse_args()
+
+    if not asyncio.run(executar(args)):
+        print("Falha: reserva dupla ou erro interno")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: memória e latência do snapshot da frota vs. lista de objetos ORM.
+
+Uso:
+    python benchmarks/bench_fleet_snapshot.py [carros]
+
+Popula um SQLite em memória com `carros` carros e mede, com tracemalloc,
+a memória retida por `db.query(Car).all()` (a lista de objetos `Car`
+mantida pela sessão) e pelo FleetSnapshot com a mesma frota. Em seguida
+compara buscas por placa e o filtro do catálogo feitos por SQL e pelo
+snapshot.
+"""
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from src.models.car import Car, CarCategory, CarStatus, FuelType, TransmissionType  # noqa: E402
+from src.services.fleet_snapshot import FleetSnapshot  # noqa: E402
+
+MODELOS = [("Volkswagen", "T-Cross"), ("Fiat", "Argo"), ("Chevrolet", "Onix"), ("Toyota", "Corolla"), ("Jeep", "Compass")]
+CORES = ["Prata", "Preto", "Branco", "Vermelho", "Azul"]
+
+
+def popular(engine, total: int):
+    Car.__table__.create(engine)
+    aleatorio = random.Random(42)
+    linhas = []
+    for i in range(total):
+        marca, modelo = aleatorio.choice(MODELOS)
+        car_id = uuid.uuid4()
+        linhas.append({
+            "id": car_id, "brand": marca, "model": modelo, "year": aleatorio.randint(2015, 2025),
+            "color": aleatorio.choice(CORES), "license_plate": f"BRA{i:05d}",
+            "category": aleatorio.choice(list(CarCategory)), "daily_rate": round(aleatorio.uniform(90, 600), 2),
+            "mileage": aleatorio.randint(0, 150_000), "status": aleatorio.choice(list(CarStatus)),
+            "fuel_type": aleatorio.choice(list(FuelType)), "transmission_type": aleatorio.choice(list(TransmissionType)),
+            "passengers": aleatorio.choice([2, 5, 7]), "features": ["Ar-condicionado", "Direção elétrica"],
+            "images": [f"/uploads/cars/{car_id}/1.jpg"],
+        })
+    with engine.begin() as conexao:
+        conexao.execute(insert(Car), linhas)
+
+
+def memoria(carregar) -> tuple:
+    """Bytes retidos pelo objeto devolvido por `carregar()`."""
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    objeto = carregar()
+    gc.collect()
+    depois = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objeto, depois - antes
+
+
+def medir(func, repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        func()
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    engine = create_engine("sqlite://")
+    popular(engine, total)
+
+    db = Session(engine)
+    carros, bytes_orm = memoria(lambda: db.query(Car).all())
+    snapshot, bytes_snapshot = memoria(lambda: (lambda s: (s.load(Session(engine)), s)[1])(FleetSnapshot()))
+    print(f"{total} carros")
+    print(f"lista de Car (ORM): {bytes_orm / 2**20:8.2f} MiB ({bytes_orm / total:6.0f} B/carro)")
+    print(f"FleetSnapshot     : {bytes_snapshot / 2**20:8.2f} MiB ({bytes_snapshot / total:6.0f} B/carro)"
+          f"  {bytes_orm / bytes_snapshot:.1f}x menor")
+    del carros
+    db.close()
+
+    placas = [f"BRA{i:05d}" for i in random.Random(7).sample(range(total), 200)]
+    with Session(engine) as db:
+        sql = medir(lambda: [db.query(Car).filter(Car.license_plate == placa).first() for placa in placas], 5)
+    memo = medir(lambda: [snapshot.get_by_plate(placa) for placa in placas], 5)
+    print(f"200 buscas por placa: SQL {sql / 1000:8.2f} ms  snapshot {memo / 1000:8.2f} ms")
+
+    filtros = dict(category=CarCategory.SUV, transmission_type=TransmissionType.AUTOMATICO, passengers=5)
+    with Session(engine) as db:
+        sql = medir(lambda: db.query(Car).filter(
+            Car.status != CarStatus.MANUTENCAO, Car.category == CarCategory.SUV,
+            Car.transmission_type == TransmissionType.AUTOMATICO, Car.passengers >= 5,
+        ).all(), 5)
+    memo = medir(lambda: snapshot.filter(exclude_status=CarStatus.MANUTENCAO, **filtros), 5)
+    print(f"filtro do catálogo  : SQL {sql / 1000:8.2f} ms  snapshot {memo / 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
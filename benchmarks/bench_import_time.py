@@ -0,0 +1,91 @@
+"""
+Benchmark: tempo de inicialização a frio de um worker.
+
+Uso:
+    python benchmarks/bench_import_time.py [--limite-ms 1500] [--top 15]
+
+Executa, em processos novos:
+  1. `python -X importtime -c "import app"` e mostra o tempo total de
+     importação e os módulos mais caros (tempo acumulado);
+  2. o lifespan da aplicação (create_all em dev + aquecimento dos índices),
+     com e sem FAST_START.
+
+Com `--limite-ms`, sai com código 1 se a importação passar do limite
+(para acompanhar regressões no CI).
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+_LINHA = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+_LIFESPAN = """
+import asyncio, time
+inicio = time.perf_counter()
+from app import app
+importado = time.perf_counter()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        pronto = time.perf_counter()
+    return pronto
+
+pronto = asyncio.run(main())
+print(f"{(importado - inicio) * 1000:.1f} {(pronto - importado) * 1000:.1f}")
+"""
+
+
+def _executar(args, env_extra=None):
+    env = {**os.environ, **(env_extra or {})}
+    return subprocess.run(
+        [sys.executable, *args], cwd=RAIZ, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def perfil_de_importacao(top: int):
+    saida = _executar(["-X", "importtime", "-c", "import app"]).stderr
+    modulos = []
+    total_us = 0
+    for linha in saida.splitlines():
+        m = _LINHA.match(linha)
+        if not m:
+            continue
+        acumulado, nivel, nome = int(m.group(2)), len(m.group(3)), m.group(4)
+        modulos.append((acumulado, nome))
+        if nivel == 1:
+            total_us += acumulado
+
+    print(f"importação de app: {total_us / 1000:.1f} ms")
+    for acumulado, nome in sorted(modulos, reverse=True)[:top]:
+        print(f"  {acumulado / 1000:9.1f} ms  {nome}")
+    return total_us / 1000
+
+
+def tempo_de_startup(fast_start: bool):
+    saida = _executar(["-c", _LIFESPAN], {"FAST_START": "1" if fast_start else "0"}).stdout
+    importacao, lifespan = saida.split()[-2:]
+    modo = "FAST_START=1" if fast_start else "FAST_START=0"
+    print(f"{modo}: importação {importacao} ms, lifespan {lifespan} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limite-ms", type=float, default=None)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    total_ms = perfil_de_importacao(args.top)
+    tempo_de_startup(fast_start=False)
+    tempo_de_startup(fast_start=True)
+
+    if args.limite_ms is not None and total_ms > args.limite_ms:
+        print(f"Importação acima do limite ({total_ms:.1f} ms > {args.limite_ms:.1f} ms)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark: vazão de verificações bcrypt por número de processos do pool.
+
+Uso:
+    python benchmarks/bench_password_hasher.py [total_de_logins]
+
+Para cada tamanho de pool (1, 2, 4, ... até o número de núcleos) dispara
+`total_de_logins` verificações concorrentes e mede logins/segundo. A linha
+"inline" mostra a referência antiga (bcrypt direto no event loop).
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.config.password_hasher import PasswordHasher, pwd_context  # noqa: E402
+
+
+async def medir(workers: int, total: int, senha_hash: str) -> float:
+    hasher = PasswordHasher(max_workers=workers, max_queue=total)
+    # Aquece o pool (o spawn dos processos não entra na medição)
+    await asyncio.gather(*(hasher.verify("segredo1", senha_hash) for _ in range(workers)))
+    inicio = time.perf_counter()
+    await asyncio.gather(*(hasher.verify("segredo1", senha_hash) for _ in range(total)))
+    duracao = time.perf_counter() - inicio
+    hasher.shutdown()
+    return total / duracao
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    senha_hash = pwd_context.hash("segredo1")
+
+    inicio = time.perf_counter()
+    for _ in range(min(total, 8)):
+        pwd_context.verify("segredo1", senha_hash)
+    print(f"inline      : {min(total, 8) / (time.perf_counter() - inicio):8.1f} logins/s")
+
+    nucleos = os.cpu_count() or 1
+    workers = 1
+    while workers <= nucleos:
+        vazao = asyncio.run(medir(workers, total, senha_hash))
+        print(f"{workers:3d} processos: {vazao:8.1f} logins/s")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: colunas e volume lidos pelas listagens (entidade completa vs. projeção).
+
+Uso:
+    python benchmarks/bench_projections.py [locacoes]
+
+Popula um SQLite em memória com clientes, carros e locações realistas
+(hash de senha, endereço, listas de opcionais e imagens) e, para cada
+listagem, captura o SELECT emitido pelo caminho antigo (entidade inteira,
+com joinedload de cliente e carro) e pelo atual (colunas do response
+model). Confere que o SELECT atual traz exatamente as colunas do modelo e
+mostra quantos bytes cada um lê do banco.
+"""
+import os
+import re
+import sys
+import uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, event, insert  # noqa: E402
+from sqlalchemy.orm import Session, joinedload  # noqa: E402
+
+from src.config.database import Base, import_models  # noqa: E402
+from src.models.car import Car, CarCategory, CarStatus, FuelType, TransmissionType  # noqa: E402
+from src.models.clientes import Cliente  # noqa: E402
+from src.models.rental import PaymentMethod, Rental, RentalStatus  # noqa: E402
+from src.services.cliente_service import ClienteService  # noqa: E402
+from src.services.rental_service import RentalService  # noqa: E402
+from src.services.serializers import CLIENTE_LIST, RENTAL_OUT  # noqa: E402
+
+
+def popular(engine, total: int):
+    import_models()
+    Base.metadata.create_all(engine, tables=[Cliente.__table__, Car.__table__, Rental.__table__])
+    carros = [uuid.uuid4() for _ in range(max(total // 10, 1))]
+    with engine.begin() as conexao:
+        conexao.execute(insert(Cliente), [
+            {
+                "nome": f"Cliente {i}", "email": f"cliente{i}@exemplo.com", "telefone": f"1199{i:07d}",
+                "cpf_cnpj": f"{i:011d}", "password_hash": "$2b$12$" + "x" * 53,
+                "endereco": f"Rua das Palmeiras, {i} - Apto {i % 300}", "cidade": "São Paulo",
+                "estado": "SP", "cep": "01310100",
+            }
+            for i in range(1, 501)
+        ])
+        conexao.execute(insert(Car), [
+            {
+                "id": car_id, "brand": "Volkswagen", "model": "T-Cross", "year": 2023, "color": "Prata",
+                "license_plate": f"ABC{i:04d}", "category": CarCategory.SUV, "daily_rate": 189.9,
+                "mileage": 12000, "status": CarStatus.DISPONIVEL, "fuel_type": FuelType.FLEX,
+                "transmission_type": TransmissionType.AUTOMATICO, "passengers": 5,
+                "features": ["Ar-condicionado", "Direção elétrica", "Câmera de ré", "Sensor de estacionamento"],
+                "images": [f"/uploads/cars/{car_id}/{n}.jpg" for n in range(4)],
+            }
+            for i, car_id in enumerate(carros)
+        ])
+        conexao.execute(insert(Rental), [
+            {
+                "cliente_id": i % 500 + 1, "car_id": carros[i % len(carros)],
+                "start_date": date(2025, 1, 1) + timedelta(days=i % 300),
+                "end_date": date(2025, 1, 4) + timedelta(days=i % 300), "total_days": 3, "daily_rate": 189.9,
+                "total_amount": 569.7, "additional_fees": 0, "mileage_start": 12000, "observations": "",
+                "status": RentalStatus.FINALIZADA, "payment_method": PaymentMethod.PIX,
+            }
+            for i in range(total)
+        ])
+
+
+def capturar(engine, func):
+    """Executa `func(db)` e devolve (colunas do SELECT, bytes lidos do banco)."""
+    comandos = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        comandos.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        with Session(engine) as db:
+            func(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+
+    statement, parameters = comandos[0]
+    colunas = re.search(r"SELECT (.*?)\s+FROM", statement, re.S).group(1)
+    colunas = [coluna.split(" AS ")[0].strip() for coluna in colunas.split(",")]
+    with engine.connect() as conexao:
+        linhas = conexao.exec_driver_sql(statement, parameters).fetchall()
+    return colunas, sum(len(str(valor)) for linha in linhas for valor in linha if valor is not None)
+
+
+LISTAGENS = [
+    (
+        "GET /rental/locacoes", RENTAL_OUT, "locacoes",
+        lambda db: db.query(Rental).options(joinedload(Rental.cliente), joinedload(Rental.carro))
+        .order_by(Rental.id).limit(100).all(),
+        lambda db: RentalService(db).get_rentals(limit=100),
+    ),
+    (
+        "GET /rental/cliente/{id}", RENTAL_OUT, "locacoes",
+        lambda db: db.query(Rental).options(joinedload(Rental.carro)).filter(Rental.cliente_id == 1).all(),
+        lambda db: RentalService(db).get_rentals_by_cliente(1),
+    ),
+    (
+        "GET /clientes/", CLIENTE_LIST, "clientes",
+        lambda db: db.query(Cliente).order_by(Cliente.id).limit(100).all(),
+        lambda db: ClienteService(db).get_clientes(limit=100),
+    ),
+]
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    engine = create_engine("sqlite://")
+    popular(engine, total)
+
+    print(f"{'listagem':<26} {'colunas':>13} {'bytes antigo':>13} {'bytes atual':>12} {'redução':>8}")
+    for nome, serializer, tabela, antigo, atual in LISTAGENS:
+        colunas_antigo, bytes_antigo = capturar(engine, antigo)
+        colunas_atual, bytes_atual = capturar(engine, atual)
+        esperado = [f"{tabela}.{campo}" for campo in serializer.fields]
+        assert sorted(colunas_atual) == sorted(esperado), f"{nome}: {colunas_atual}"
+        print(f"{nome:<26} {len(colunas_antigo):5d} -> {len(colunas_atual):3d} "
+              f"{bytes_antigo:13d} {bytes_atual:12d} {bytes_antigo / bytes_atual:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: serialização das listagens (ORM + Pydantic vs. Core + orjson).
+
+Uso:
+    python benchmarks/bench_serializers.py [repeticoes]
+
+Para 100, 1.000 e 10.000 locações num SQLite em memória compara o caminho
+antigo (objetos ORM -> validação do response model -> `jsonable_encoder`
+-> json.dumps) com o novo (SELECT só das colunas de RentalOut ->
+RowSerializer -> orjson), medindo a consulta mais a serialização, e
+confere que os dois produzem o mesmo JSON.
+"""
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from src.models.rental import PaymentMethod, Rental, RentalOut, RentalStatus  # noqa: E402
+from src.services.serializers import RENTAL_OUT  # noqa: E402
+
+ADAPTER = TypeAdapter(List[RentalOut])
+
+
+def popular(engine, total: int):
+    Rental.__table__.create(engine)
+    inicio = date(2025, 1, 1)
+    linhas = [
+        {
+            "cliente_id": i % 500 + 1, "car_id": uuid.uuid4(), "start_date": inicio + timedelta(days=i % 300),
+            "end_date": inicio + timedelta(days=i % 300 + 3), "total_days": 3, "daily_rate": 120,
+            "total_amount": 360, "additional_fees": 0, "mileage_start": 1000 + i, "observations": "",
+            "status": RentalStatus.FINALIZADA, "payment_method": PaymentMethod.PIX,
+        }
+        for i in range(total)
+    ]
+    with engine.begin() as conexao:
+        conexao.execute(insert(Rental), linhas)
+
+
+def antigo(engine) -> bytes:
+    with Session(engine) as db:
+        rentals = db.query(Rental).order_by(Rental.id).all()
+        validados = ADAPTER.validate_python(rentals, from_attributes=True)
+        return json.dumps(jsonable_encoder(validados), separators=(",", ":")).encode()
+
+
+def novo(engine) -> bytes:
+    with Session(engine) as db:
+        return RENTAL_OUT.dumps(db.execute(RENTAL_OUT.select().order_by(Rental.id)).all())
+
+
+def medir(func, engine, repeticoes: int) -> float:
+    func(engine)
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        func(engine)
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'linhas':>7} {'antigo (ms)':>12} {'novo (ms)':>10} {'ganho':>7}")
+    for total in (100, 1_000, 10_000):
+        engine = create_engine("sqlite://")
+        popular(engine, total)
+        assert json.loads(antigo(engine)) == json.loads(novo(engine)), "saídas diferentes"
+        t_antigo = medir(antigo, engine, repeticoes)
+        t_novo = medir(novo, engine, repeticoes)
+        print(f"{total:7d} {t_antigo:12.2f} {t_novo:10.2f} {t_antigo / t_novo:6.1f}x")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: leitores e escritores concorrentes no SQLite, journal rollback x perfil WAL.
+
+Uso:
+    python benchmarks/bench_sqlite_wal.py [segundos] [leitores] [escritores]
+
+Para cada modo cria um banco temporário com o esquema da aplicação e 200
+carros, e durante `segundos` roda `leitores` threads listando carros
+disponíveis e `escritores` threads inserindo locações (uma transação por
+locação, como em `RentalService.create_rental`). Mostra leituras/s,
+escritas/s, a latência p95 de leitura e quantos "database is locked"
+ocorreram.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from src.config.database import Base, import_models  # noqa: E402
+from src.config.sqlite import apply_sqlite_profile  # noqa: E402
+
+
+def _preparar(url: str, profile: str):
+    import_models()
+    from src.models.car import Car, CarCategory, CarStatus, FuelType, TransmissionType
+    from src.models.clientes import Cliente
+
+    engine = create_engine(url, connect_args={"check_same_thread": False}, pool_size=32)
+    apply_sqlite_profile(engine, profile)
+    Base.metadata.create_all(engine)
+    carros = [uuid.uuid4() for _ in range(200)]
+    with engine.begin() as conn:
+        conn.execute(insert(Cliente), [{
+            "nome": "Cliente Bench", "email": "bench@example.com", "cpf_cnpj": "00000000000",
+            "password_hash": "x", "ativo": True,
+        }])
+        conn.execute(insert(Car), [{
+            "id": car_id, "brand": "VW", "model": "Gol", "year": 2020, "color": "Prata",
+            "license_plate": f"BCH{i:04d}", "category": CarCategory.ECONOMICO, "daily_rate": 100,
+            "mileage": 0, "status": CarStatus.DISPONIVEL, "fuel_type": FuelType.FLEX,
+            "transmission_type": TransmissionType.MANUAL, "passengers": 5,
+        } for i, car_id in enumerate(carros)])
+    return engine, carros
+
+
+def medir(profile: str, segundos: float, leitores: int, escritores: int):
+    from src.models.car import Car, CarStatus
+    from src.models.rental import PaymentMethod, Rental
+
+    diretorio = tempfile.mkdtemp()
+    engine, carros = _preparar(f"sqlite:///{os.path.join(diretorio, 'bench.db')}", profile)
+    fim = time.perf_counter() + segundos
+    latencias, escritas, bloqueios = [], [0], [0]
+    trava = threading.Lock()
+
+    def leitor():
+        stmt = select(Car.id, Car.license_plate, Car.daily_rate).where(Car.status == CarStatus.DISPONIVEL)
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(stmt).all()
+            except OperationalError:
+                with trava:
+                    bloqueios[0] += 1
+                continue
+            with trava:
+                latencias.append(time.perf_counter() - inicio)
+
+    def escritor(n: int):
+        i = 0
+        while time.perf_counter() < fim:
+            i += 1
+            inicio = date.today() + timedelta(days=i)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(Rental).values(
+                        cliente_id=1, car_id=carros[(n * 7919 + i) % len(carros)],
+                        start_date=inicio, end_date=inicio + timedelta(days=3), total_days=3,
+                        daily_rate=100, total_amount=300, additional_fees=0, mileage_start=0,
+                        payment_method=PaymentMethod.PIX,
+                    ))
+            except OperationalError:
+                with trava:
+                    bloqueios[0] += 1
+                continue
+            with trava:
+                escritas[0] += 1
+
+    threads = [threading.Thread(target=leitor) for _ in range(leitores)]
+    threads += [threading.Thread(target=escritor, args=(n,)) for n in range(escritores)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    shutil.rmtree(diretorio, ignore_errors=True)
+
+    latencias.sort()
+    p95 = latencias[int(len(latencias) * 0.95)] * 1000 if latencias else float("nan")
+    print(
+        f"{profile:12s}: {len(latencias) / segundos:8.0f} leituras/s  {escritas[0] / segundos:7.0f} escritas/s  "
+        f"p95 leitura {p95:6.2f} ms  bloqueios {bloqueios[0]}"
+    )
+
+
+def main():
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    leitores = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    escritores = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    for profile in ("default", "performance"):
+        medir(profile, segundos, leitores, escritores)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "redis").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "2048"))
+
+
+def fora_do_loop(func, *args, **kwargs):
+    """
+    Executa uma chamada bloqueante (cliente Redis síncrono).
+
+    Dentro de `AsyncSession.run_sync` o código síncrono roda na thread do
+    event loop: a chamada vai para uma thread (`asyncio.to_thread`) e o
+    greenlet espera o resultado sem travar o loop. Fora dele (rotas
+    síncronas, threads do agendador/listener) é chamada direto.
+    """
+    if in_greenlet():
+        return await_only(asyncio.to_thread(func, *args, **kwargs))
+    return func(*args, **kwargs)
+
+
+class LocalCache:
+    """
+    Cache LRU em memória com TTL, usado quando o Redis não está disponível.
+
+    Implementa o mesmo subconjunto da API do Redis usado pelo projeto
+    (get/set/delete/incr), então também serve de substituto local em testes.
+    """
+
+    def __init__(self, max_entries: int = LOCAL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _valor(self, key: str):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expira_em = item
+        if expira_em is not None and expira_em <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._valor(key)
+
+    def set(self, key: str, value, ex: Optional[int] = None):
+        if isinstance(value, str):
+            value = value.encode()
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._valor(key) or 0) + 1
+            self._data[key] = (str(value).encode(), None)
+            return value
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """
+    Adaptador fino sobre um cliente Redis (ou fakeredis).
+
+    Erros de conexão viram "cache miss": o cache nunca derruba uma requisição.
+    As chamadas feitas de dentro de `run_sync` saem do event loop (`fora_do_loop`).
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return fora_do_loop(self.client.get, key)
+        except Exception as e:
+            logger.warning(f"Cache Redis indisponível (get): {e}")
+            return None
+
+    def set(self, key: str, value, ex: Optional[int] = None):
+        try:
+            return fora_do_loop(self.client.set, key, value, ex=ex)
+        except Exception as e:
+            logger.warning(f"Cache Redis indisponível (set): {e}")
+            return False
+
+    def delete(self, *keys: str) -> int:
+        try:
+            return fora_do_loop(self.client.delete, *keys)
+        except Exception as e:
+            logger.warning(f"Cache Redis indisponível (delete): {e}")
+            return 0
+
+    def incr(self, key: str) -> Optional[int]:
+        try:
+            return fora_do_loop(self.client.incr, key)
+        except Exception as e:
+            logger.warning(f"Cache Redis indisponível (incr): {e}")
+            return None
+
+    def flushdb(self):
+        self.client.flushdb()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _criar_cache():
+    if CACHE_BACKEND == "redis":
+        try:
+            import redis
+
+            client = redis.Redis.from_url(REDIS_URL, socket_timeout=0.2, socket_connect_timeout=0.2)
+            client.ping()
+            logger.info(f"Cache usando Redis ({REDIS_URL})")
+            return RedisCache(client)
+        except Exception as e:
+            logger.warning(f"Redis indisponível ({e}); usando cache LRU em memória")
+    return LocalCache()
+
+
+def get_cache():
+    """Retorna o backend de cache do processo (Redis ou LRU local), criado na primeira chamada."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _criar_cache()
+    return _cache
+
+
+def set_cache(backend):
+    """Substitui o backend de cache (ex.: `LocalCache()` ou `RedisCache(fakeredis.FakeRedis())` em testes)."""
+    global _cache
+    with _cache_lock:
+        _cache = backend
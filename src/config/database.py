@@ -1,8 +1,15 @@
 import os
 import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.exc import SQLAlchemyError
+from src.config.pool import pool_options, pool_stats
+from src.config.sqlite import apply_sqlite_profile
 
 # Configuração básica de logging
 logging.basicConfig(level=logging.INFO)
@@ -36,28 +43,192 @@ def get_database_url():
         os.makedirs(os.path.join(os.getcwd(), "database"), exist_ok=True)
         return f"sqlite:///{os.path.join(os.getcwd(), 'database', 'locacar.db')}"
 
-# Criar engine com configurações seguras
-DATABASE_URL = get_database_url()
+def get_async_database_url(url: str) -> str:
+    """Converte a URL síncrona para o driver assíncrono equivalente (aiosqlite/asyncpg)"""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
 
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
+def get_replica_database_url():
+    """
+    URL da réplica de leitura, ou None se não houver réplica configurada.
+
+    DB_REPLICA_URL tem precedência (útil para testar com dois arquivos
+    SQLite); senão a URL é montada com DB_REPLICA_HOST e, quando não
+    informados, usuário/senha/porta/banco do primário.
+    """
+    if os.getenv("DB_REPLICA_URL"):
+        return os.getenv("DB_REPLICA_URL")
+    if not os.getenv("DB_REPLICA_HOST"):
+        return None
+    DB_USER = os.getenv("DB_REPLICA_USER", os.getenv("DB_USER"))
+    DB_PASSWORD = os.getenv("DB_REPLICA_PASSWORD", os.getenv("DB_PASSWORD"))
+    DB_HOST = os.getenv("DB_REPLICA_HOST")
+    DB_PORT = os.getenv("DB_REPLICA_PORT", os.getenv("DB_PORT", "5432"))
+    DB_NAME = os.getenv("DB_REPLICA_NAME", os.getenv("DB_NAME"))
+    return f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+
+def _build_engine(url: str):
+    if url.startswith("sqlite"):
+        engine = create_engine(
+            url,
+            echo=(ENV == "development"),
+            connect_args={"check_same_thread": False},
+            **pool_options(url)
+        )
+        apply_sqlite_profile(engine)
+        return engine
+    return create_engine(
+        url,
         echo=(ENV == "development"),
-        connect_args={"check_same_thread": False}
+        **pool_options(url)
     )
-else:
-    engine = create_engine(
-        DATABASE_URL,
+
+
+def _build_async_engine(url: str):
+    url = get_async_database_url(url)
+    engine = create_async_engine(
+        url,
         echo=(ENV == "development"),
-        pool_pre_ping=True,
-        pool_recycle=3600
+        **pool_options(url, asynchronous=True)
     )
+    if url.startswith("sqlite"):
+        apply_sqlite_profile(engine)
+    return engine
+
+
+# Os engines são criados na primeira utilização (e não na importação), então
+# importar modelos/rotas não abre conexões nem lê variáveis de banco.
+_engines = {}
+_engine_lock = threading.Lock()
+
+
+def _lazy_engine(nome: str, builder, url_getter):
+    engine = _engines.get(nome)
+    if engine is None:
+        with _engine_lock:
+            engine = _engines.get(nome)
+            if engine is None:
+                engine = _engines[nome] = builder(url_getter())
+    return engine
+
+
+def get_engine():
+    """Engine síncrono do processo, criado na primeira chamada."""
+    return _lazy_engine("sync", _build_engine, get_database_url)
+
+
+def get_async_engine():
+    """
+    Engine assíncrono, usado pelas rotas `async def` para não bloquear o event loop.
+
+    Observação: em ENV=test (":memory:") o engine assíncrono abre um banco separado.
+    """
+    return _lazy_engine("async", _build_async_engine, get_database_url)
+
+
+def get_read_engine():
+    """Engine síncrono da réplica de leitura (o primário, se não houver réplica)."""
+    if get_replica_database_url() is None:
+        return get_engine()
+    return _lazy_engine("replica", _build_engine, get_replica_database_url)
+
+
+def get_async_read_engine():
+    """Engine assíncrono da réplica de leitura (o primário, se não houver réplica)."""
+    if get_replica_database_url() is None:
+        return get_async_engine()
+    return _lazy_engine("replica_async", _build_async_engine, get_replica_database_url)
+
+
+def active_engines() -> dict:
+    """Engines já criados neste processo ({"sync": ..., "async": ...}), sem criar novos."""
+    return {
+        nome: getattr(engine, "sync_engine", engine)
+        for nome, engine in list(_engines.items())
+    }
+
+
+class _LazySessionmaker:
+    """Fábrica de sessões que só associa o engine na primeira sessão criada."""
+
+    def __init__(self, factory, engine_getter):
+        self.factory = factory
+        self._engine_getter = engine_getter
+
+    def __call__(self, **kwargs):
+        if self.factory.kw.get("bind") is None:
+            self.factory.configure(bind=self._engine_getter())
+        return self.factory(**kwargs)
+
+
+SessionLocal = _LazySessionmaker(
+    sessionmaker(autocommit=False, autoflush=False),
+    get_engine
+)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: os objetos retornados continuam legíveis após o commit
+# sem disparar lazy loads (que não são permitidos fora do contexto assíncrono)
+AsyncSessionLocal = _LazySessionmaker(
+    async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False),
+    get_async_engine
+)
 
-def get_db():
-    """Dependency para injeção de dependência do FastAPI"""
-    db = SessionLocal()
+
+ReadSessionLocal = _LazySessionmaker(
+    sessionmaker(autocommit=False, autoflush=False),
+    get_read_engine
+)
+
+AsyncReadSessionLocal = _LazySessionmaker(
+    async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False),
+    get_async_read_engine
+)
+
+
+def __getattr__(name):
+    # Compatibilidade: `from src.config.database import engine` continua funcionando
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    if name == "DATABASE_URL":
+        return get_database_url()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def create_schema():
+    """
+    Cria as tabelas que faltarem (apenas desenvolvimento/testes).
+
+    Em produção o esquema é gerenciado pelo Alembic (`alembic upgrade head`).
+    """
+    import_models()
+    Base.metadata.create_all(bind=get_engine())
+    logger.info("Tabelas sincronizadas")
+
+
+# Read-your-writes: após uma escrita o cliente recebe este cookie e, até o
+# instante gravado nele, suas leituras vão para o primário (a réplica pode
+# ainda não ter aplicado a escrita).
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+
+
+def prefers_primary(request: Request) -> bool:
+    """Indica se as leituras desta requisição devem ir para o primário."""
+    try:
+        return float(request.cookies.get(PRIMARY_STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _session_scope(factory, request: Request):
+    db = factory()
+    pool_stats.sessao_aberta(id(db), f"{request.method} {request.url.path}")
     try:
         yield db
     except SQLAlchemyError as e:
@@ -66,6 +237,50 @@ def get_db():
         raise
     finally:
         db.close()
+        pool_stats.sessao_fechada(id(db))
+
+
+@asynccontextmanager
+async def _async_session_scope(factory, request: Request):
+    async with factory() as db:
+        pool_stats.sessao_aberta(id(db), f"{request.method} {request.url.path}")
+        try:
+            yield db
+        except SQLAlchemyError as e:
+            logger.error(f"Erro na sessão assíncrona do banco: {e}")
+            await db.rollback()
+            raise
+        finally:
+            pool_stats.sessao_fechada(id(db))
+
+
+def get_db(request: Request):
+    """
+    Dependency para injeção de dependência do FastAPI.
+
+    Sessões mantidas abertas por mais de DB_SESSION_LEAK_SECONDS são
+    registradas em log e nas métricas do pool.
+    """
+    yield from _session_scope(SessionLocal, request)
+
+async def get_async_db(request: Request):
+    """Dependency assíncrona (AsyncSession) para as rotas `async def`"""
+    async with _async_session_scope(AsyncSessionLocal, request) as db:
+        yield db
+
+def get_read_db(request: Request):
+    """
+    Dependency para rotas somente leitura: usa a réplica (DB_REPLICA_*),
+    exceto logo após uma escrita do mesmo cliente (ver `prefers_primary`).
+    """
+    factory = SessionLocal if prefers_primary(request) else ReadSessionLocal
+    yield from _session_scope(factory, request)
+
+async def get_async_read_db(request: Request):
+    """Variante assíncrona de `get_read_db`"""
+    factory = AsyncSessionLocal if prefers_primary(request) else AsyncReadSessionLocal
+    async with _async_session_scope(factory, request) as db:
+        yield db
 
 def import_models():
     """Importa todos os modelos de forma segura"""
@@ -74,6 +289,9 @@ def import_models():
         from src.models.clientes import Cliente
         from src.models.car import Car
         from src.models.rental import Rental
+        from src.models.idempotency import IdempotencyRecord
+        from src.models.overdue import OverdueRental
+        from src.models.report import DailyCarUsage, DailyRevenue
         
         logger.info("Modelos importados com sucesso")
         return True
@@ -88,6 +306,7 @@ def connect_db():
     """Conecta ao banco e cria tabelas se necessário"""
     try:
         # Testar conexão
+        engine = get_engine()
         with engine.connect() as conn:
             logger.info(f"Banco conectado ({engine.url.drivername})")
 
@@ -106,7 +325,7 @@ def connect_db():
                 logger.error(f"Erro ao criar tabelas: {table_error}")
                 
                 # Tentar recriar o banco limpo apenas para SQLite
-                if DATABASE_URL.startswith("sqlite"):
+                if engine.url.drivername.startswith("sqlite"):
                     logger.info("Recriando banco SQLite...")
                     try:
                         # Remover arquivo do banco se existir
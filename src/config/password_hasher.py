@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+# Mesmo contexto usado pelos serviços (bcrypt)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasherBusy(Exception):
+    """A fila de hashing atingiu o limite configurado."""
+
+
+class PasswordHasher:
+    """
+    Executor de bcrypt em um pool de processos.
+
+    O bcrypt consome ~250 ms de CPU por chamada; rodá-lo na thread da
+    requisição (ou no event loop) trava o restante da API. Aqui o trabalho
+    vai para processos separados e as rotas apenas aguardam o resultado.
+    A quantidade de operações pendentes é limitada: acima de
+    `max_queue`, a chamada falha imediatamente com `PasswordHasherBusy`.
+
+    Configuração por ambiente:
+        PASSWORD_HASH_WORKERS: número de processos (padrão: núcleos da máquina)
+        PASSWORD_HASH_MAX_QUEUE: máximo de operações pendentes (padrão: 8 por processo)
+    """
+
+    def __init__(self, max_workers: int = None, max_queue: int = None):
+        self.max_workers = max_workers or int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+        self.max_queue = max_queue or int(os.getenv("PASSWORD_HASH_MAX_QUEUE", self.max_workers * 8))
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._concluidas = 0
+        self._rejeitadas = 0
+        self._falhas = 0
+        self._tempo_total = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # "spawn" evita herdar threads/conexões abertas do worker web
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._executor
+
+    async def _submit(self, fn, *args):
+        with self._lock:
+            if self._pendentes >= self.max_queue:
+                self._rejeitadas += 1
+                raise PasswordHasherBusy("Fila de hashing de senha cheia")
+            self._pendentes += 1
+
+        inicio = time.perf_counter()
+        sucesso = False
+        try:
+            loop = asyncio.get_running_loop()
+            resultado = await loop.run_in_executor(self._get_executor(), partial(fn, *args))
+            sucesso = True
+            return resultado
+        finally:
+            with self._lock:
+                self._pendentes -= 1
+                self._tempo_total += time.perf_counter() - inicio
+                if sucesso:
+                    self._concluidas += 1
+                else:
+                    self._falhas += 1
+
+    async def hash(self, password: str) -> str:
+        """Gera o hash bcrypt da senha sem bloquear o event loop."""
+        return await self._submit(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifica a senha contra o hash sem bloquear o event loop."""
+        return await self._submit(_verify, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        """Métricas do executor (para logs e para o endpoint de métricas)."""
+        with self._lock:
+            total = self._concluidas + self._falhas
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "pendentes": self._pendentes,
+                "concluidas": self._concluidas,
+                "falhas": self._falhas,
+                "rejeitadas": self._rejeitadas,
+                "tempo_medio_ms": (self._tempo_total / total * 1000) if total else 0.0,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("Pool de hashing de senha encerrado")
+
+
+# Instância única por worker
+password_hasher = PasswordHasher()
@@ -0,0 +1,175 @@
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from src.middleware.metrics import LATENCY_BUCKETS, registry
+
+logger = logging.getLogger(__name__)
+
+# Configuração por ambiente:
+#   DB_POOL_SIZE / DB_MAX_OVERFLOW: tamanho fixo do pool por engine
+#   DB_MAX_CONNECTIONS: limite de conexões do banco para a aplicação inteira;
+#       sem DB_POOL_SIZE, o pool de cada engine é derivado dele e de WEB_CONCURRENCY
+#   DB_POOL_TIMEOUT: segundos esperando uma conexão livre antes de falhar
+#   DB_POOL_RECYCLE: segundos até reciclar uma conexão
+#   DB_STATEMENT_TIMEOUT_MS: statement_timeout do PostgreSQL (0 = sem limite)
+#   DB_PGBOUNCER=1: NullPool (o pooling fica a cargo do PgBouncer)
+#   DB_SESSION_LEAK_SECONDS: sessões abertas por mais tempo são reportadas
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "0") == "1"
+DB_SESSION_LEAK_SECONDS = float(os.getenv("DB_SESSION_LEAK_SECONDS", "30"))
+
+# Engines por worker: o síncrono e o assíncrono (rotas async)
+ENGINES_PER_WORKER = 2
+
+registry.histogram("db_pool_checkout_seconds", "Tempo para obter uma conexão do pool", LATENCY_BUCKETS)
+
+
+def worker_count() -> int:
+    """Número de workers do uvicorn/gunicorn (WEB_CONCURRENCY)."""
+    return max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+
+def pool_sizing() -> Tuple[int, int]:
+    """
+    (pool_size, max_overflow) de cada engine.
+
+    Com DB_MAX_CONNECTIONS, divide o limite entre workers e engines para
+    que a soma de todos os pools nunca passe do que o banco aceita.
+    """
+    if os.getenv("DB_POOL_SIZE"):
+        return int(os.environ["DB_POOL_SIZE"]), int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    limite = os.getenv("DB_MAX_CONNECTIONS")
+    if limite:
+        por_engine = max(2, int(limite) // (worker_count() * ENGINES_PER_WORKER))
+        pool_size = math.ceil(por_engine / 2)
+        return pool_size, por_engine - pool_size
+    return 5, int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+
+class PoolStats:
+    """Contadores de checkout dos pools e das sessões abertas pelas dependências."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_max = 0.0
+        self.vazamentos = 0
+        self._sessoes: Dict[int, Tuple[float, str]] = {}
+
+    def registrar_checkout(self, duracao: float, timeout: bool = False):
+        registry.observe("db_pool_checkout_seconds", (), duracao)
+        with self._lock:
+            self.checkouts += 1
+            self.espera_max = max(self.espera_max, duracao)
+            if timeout:
+                self.timeouts += 1
+
+    def sessao_aberta(self, chave: int, origem: str):
+        with self._lock:
+            self._sessoes[chave] = (time.monotonic(), origem)
+
+    def sessao_fechada(self, chave: int):
+        with self._lock:
+            inicio, origem = self._sessoes.pop(chave, (None, None))
+        if inicio is None:
+            return
+        duracao = time.monotonic() - inicio
+        if duracao > DB_SESSION_LEAK_SECONDS:
+            with self._lock:
+                self.vazamentos += 1
+            logger.warning(f"Sessão do banco mantida por {duracao:.1f}s ({origem})")
+
+    def sessoes_presas(self) -> int:
+        """Sessões abertas há mais de DB_SESSION_LEAK_SECONDS neste momento."""
+        limite = time.monotonic() - DB_SESSION_LEAK_SECONDS
+        with self._lock:
+            return sum(1 for inicio, _ in self._sessoes.values() if inicio < limite)
+
+    def sessoes_abertas(self) -> int:
+        with self._lock:
+            return len(self._sessoes)
+
+
+pool_stats = PoolStats()
+
+
+class _TimedPoolMixin:
+    """Mede o tempo de cada checkout (espera por conexão livre + conexão nova/pre-ping)."""
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super().connect()
+        except exc.TimeoutError:
+            pool_stats.registrar_checkout(time.perf_counter() - inicio, timeout=True)
+            logger.error(f"Pool esgotado: {self.status()}")
+            raise
+        pool_stats.registrar_checkout(time.perf_counter() - inicio)
+        return conexao
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(url: str, asynchronous: bool = False) -> dict:
+    """Argumentos de pool/conexão para `create_engine`/`create_async_engine`."""
+    if ":memory:" in url:
+        # Banco em memória: o pool padrão do SQLAlchemy mantém a mesma conexão
+        return {}
+    if url.startswith("postgresql") and DB_PGBOUNCER:
+        opcoes = {"poolclass": NullPool}
+    else:
+        pool_size, max_overflow = pool_sizing()
+        opcoes = {
+            "poolclass": TimedAsyncAdaptedQueuePool if asynchronous else TimedQueuePool,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+        }
+    if url.startswith("postgresql"):
+        opcoes["pool_pre_ping"] = True
+        opcoes["connect_args"] = _postgres_connect_args(asynchronous)
+    return opcoes
+
+
+def _postgres_connect_args(asynchronous: bool) -> dict:
+    if asynchronous:
+        args: dict = {}
+        if DB_STATEMENT_TIMEOUT_MS:
+            args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        if DB_PGBOUNCER:
+            # Prepared statements não sobrevivem ao modo transaction do PgBouncer
+            args["statement_cache_size"] = 0
+        return args
+    if DB_STATEMENT_TIMEOUT_MS:
+        return {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return {}
+
+
+def pool_gauges(engine) -> list:
+    """Estado atual do pool de um engine, para o endpoint de métricas."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return []
+    return [
+        ("size", pool.size()),
+        ("checked_out", pool.checkedout()),
+        ("overflow", max(0, pool.overflow())),
+        ("idle", pool.checkedin()),
+    ]
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import os
+
+from sqlalchemy import event, text
+
+logger = logging.getLogger(__name__)
+
+# Perfil aplicado a cada conexão SQLite (dev e filiais):
+#   SQLITE_PROFILE: "performance" (padrão) ou "default" (pragmas do SQLite, journal rollback)
+#   SQLITE_MMAP_SIZE: bytes mapeados em memória (padrão 256 MiB)
+#   SQLITE_CACHE_SIZE_KB: cache de páginas por conexão (padrão 64 MiB)
+#   SQLITE_BUSY_TIMEOUT_MS: espera por lock antes de "database is locked"
+#   SQLITE_MAINTENANCE_INTERVAL: segundos entre wal_checkpoint/optimize (0 desliga)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "performance").lower()
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MAINTENANCE_INTERVAL = int(os.getenv("SQLITE_MAINTENANCE_INTERVAL", "600"))
+
+
+def performance_pragmas() -> list:
+    """
+    Pragmas do perfil de desempenho.
+
+    WAL permite leituras simultâneas a uma escrita (no modo rollback cada
+    escrita bloqueia todos os leitores); com WAL, synchronous=NORMAL só
+    perde as últimas transações em queda de energia, sem corromper o banco.
+    """
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+        # Valor negativo = tamanho em KiB (e não em páginas)
+        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA foreign_keys=ON",
+    ]
+
+
+def apply_sqlite_profile(engine, profile: str = None):
+    """
+    Registra o evento `connect` que aplica o perfil em toda conexão nova.
+
+    Aceita o engine síncrono ou o assíncrono (usa o `sync_engine`, cujas
+    conexões DBAPI do aiosqlite também expõem `cursor().execute`).
+    """
+    profile = (profile or SQLITE_PROFILE).lower()
+    if profile != "performance":
+        return
+    pragmas = performance_pragmas()
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "connect")
+    def _aplicar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def run_sqlite_maintenance(engine) -> dict:
+    """Checkpoint do WAL (truncando o arquivo) e `PRAGMA optimize`."""
+    with engine.connect() as conn:
+        ocupado, paginas_wal, paginas_copiadas = conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)")).one()
+        conn.execute(text("PRAGMA optimize"))
+        conn.commit()
+    return {"ocupado": bool(ocupado), "paginas_wal": paginas_wal, "paginas_copiadas": paginas_copiadas}
+
+
+async def sqlite_maintenance_loop(engine, interval: int = None):
+    """Executa `run_sqlite_maintenance` periodicamente (cancelado no shutdown)."""
+    interval = interval or SQLITE_MAINTENANCE_INTERVAL
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            resultado = await asyncio.to_thread(run_sqlite_maintenance, engine)
+            logger.info(f"Manutenção SQLite: {resultado}")
+        except Exception as e:
+            logger.warning(f"Falha na manutenção do SQLite: {e}")
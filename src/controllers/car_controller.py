@@ -1,8 +1,25 @@
+import uuid
+from datetime import date
+import orjson
 from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from src.models.car import Car, CarCategory, CarStatus
+from src.models.car import Car, CarCategory, CarStatus, FuelType, TransmissionType
 from src.models.car import CarCreate
-from typing import Optional
+from src.services.availability_service import availability_index
+from src.services.change_feed import change_feed
+from src.services.fleet_snapshot import fleet_snapshot
+from src.services.pricing_service import pricing_service
+from src.services.pagination import decode_cursor, encode_cursor
+from src.services.car_cache import (
+    get_cached_car, get_cached_list, invalidate_car, list_cache_key, set_cached_car, set_cached_list
+)
+from typing import List, Optional, Tuple
+
+
+# Limite de períodos por cotação em lote
+MAX_QUOTE_RANGES = 31
 
 
 class CarController:
@@ -10,49 +27,162 @@ class CarController:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_all(self, status: Optional[str] = None, category: Optional[str] = None, page: int = 1, limit: int = 10):
-        try:
-            query = self.db.query(Car)
+    def get_all(self, status: Optional[str] = None, category: Optional[str] = None, page: int = 1, limit: int = 10,
+                cursor: Optional[str] = None, with_total: bool = True) -> bytes:
+        """
+        Lista carros ordenados por (created_at, id), já serializada em JSON.
 
+        Sem `cursor` pagina por `page` (OFFSET); com `cursor` (o `next_cursor`
+        da resposta anterior) faz paginação por chave. `with_total=False`
+        omite o total.
+
+        A página sai do `fleet_snapshot` (filtros como máscaras sobre os
+        arrays, ordem pré-calculada), sem COUNT nem SELECT, e é cacheada
+        como bytes (Redis ou LRU local) pelos parâmetros normalizados; um
+        acerto no cache é devolvido sem desserializar. O cache é invalidado
+        sempre que algum carro é alterado.
+        """
+        cache_params = {
+            "status": status, "category": category, "page": None if cursor else page,
+            "limit": limit, "cursor": cursor, "with_total": with_total
+        }
+        # Chave fixada antes da consulta (geração lida uma única vez)
+        cache_key = list_cache_key(cache_params)
+        cached = get_cached_list(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
             if status:
                 try:
-                    status_enum = CarStatus(status)
-                    query = query.filter(Car.status == status_enum)
+                    status = CarStatus(status)
                 except ValueError:
                     raise HTTPException(status_code=400, detail="Status inválido")
             if category:
                 try:
-                    category_enum = CarCategory(category)
-                    query = query.filter(Car.category == category_enum)
+                    category = CarCategory(category)
                 except ValueError:
                     raise HTTPException(status_code=400, detail="Categoria inválida")
 
-            total = query.count()
-            cars = query.offset((page - 1) * limit).limit(limit).all()
+            after = None
+            if cursor:
+                try:
+                    created_at, car_id = decode_cursor(cursor, 2)
+                    after = (created_at, uuid.UUID(car_id))
+                except ValueError:
+                    raise HTTPException(status_code=400, detail="Cursor inválido")
 
-            return {
+            fleet_snapshot.ensure_fresh(self.db)
+            total, cars, tem_proxima = fleet_snapshot.page(
+                category=category or None, status=status or None, limit=limit,
+                offset=(page - 1) * limit, after=after
+            )
+            next_cursor = encode_cursor([cars[-1]["created_at"], cars[-1]["id"]]) if tem_proxima else None
+            if not with_total:
+                total = None
+
+            return set_cached_list(cache_key, orjson.dumps({
                 "success": True,
                 "data": cars,
                 "pagination": {
-                    "page": page,
+                    "page": None if cursor else page,
                     "limit": limit,
                     "total": total,
-                    "pages": (total // limit) + (1 if total % limit > 0 else 0)
+                    "pages": (total // limit) + (1 if total % limit > 0 else 0) if total is not None else None,
+                    "next_cursor": next_cursor
                 }
-            }
+            }))
+        except HTTPException:
+            raise
         except Exception as e:
             self.db.rollback()
             raise HTTPException(status_code=500, detail=str(e))
 
 
+    def get_available(
+        self,
+        start_date: date,
+        end_date: date,
+        category: Optional[CarCategory] = None,
+        fuel_type: Optional[FuelType] = None,
+        transmission_type: Optional[TransmissionType] = None,
+        passengers: Optional[int] = None,
+    ):
+        """
+        Carros livres no período, respondidos pelo snapshot da frota e pelo calendário de ocupação em memória.
+
+        Segue as mesmas regras de `RentalService.create_rental`: só entram
+        carros DISPONIVEL (um carro ALUGADO é recusado na reserva mesmo fora
+        do período da locação) e sem locação que se sobreponha ao período.
+        """
+        if end_date < start_date:
+            raise HTTPException(status_code=400, detail="Data de fim deve ser após a data de início.")
+
+        fleet_snapshot.ensure_fresh(self.db)
+        cars = fleet_snapshot.filter(
+            category=category, fuel_type=fuel_type, transmission_type=transmission_type,
+            passengers=passengers, status=CarStatus.DISPONIVEL
+        )
+        availability_index.ensure_loaded(self.db)
+        livres = set(availability_index.free_cars([car["id"] for car in cars], start_date, end_date))
+        cars = [car for car in cars if car["id"] in livres]
+
+        return {
+            "success": True,
+            "data": cars,
+            "periodo": {"start_date": start_date, "end_date": end_date},
+            "total": len(cars)
+        }
+
+    def get_quotes(self, car_ids: Optional[List[uuid.UUID]], ranges: List[Tuple[date, date]]):
+        """
+        Preço de cada carro em cada período candidato (página de disponibilidade).
+
+        Os preços saem de uma única chamada vetorizada do PricingService e
+        cada cotação indica se o carro pode ser reservado no período.
+        """
+        if not ranges:
+            raise HTTPException(status_code=400, detail="Informe ao menos um período.")
+        if len(ranges) > MAX_QUOTE_RANGES:
+            raise HTTPException(status_code=400, detail=f"Máximo de {MAX_QUOTE_RANGES} períodos por cotação.")
+        if any(fim < inicio for inicio, fim in ranges):
+            raise HTTPException(status_code=400, detail="Data de fim deve ser após a data de início.")
+
+        query = self.db.query(Car).filter(Car.status != CarStatus.MANUTENCAO)
+        if car_ids:
+            query = query.filter(Car.id.in_(car_ids))
+        cars = query.order_by(Car.created_at, Car.id).all()
+
+        cotacoes = pricing_service.quote_many(cars, ranges)
+        availability_index.ensure_loaded(self.db)
+        for j, (inicio, fim) in enumerate(ranges):
+            livres = set(availability_index.free_cars([car.id for car in cars], inicio, fim))
+            for car, cotacao in zip(cars, cotacoes):
+                # Mesmas regras da reserva: status DISPONIVEL e período livre
+                cotacao["quotes"][j]["disponivel"] = car.status == CarStatus.DISPONIVEL and car.id in livres
+
+        return {"success": True, "data": cotacoes, "total": len(cotacoes)}
+
     def get_by_id(self, car_id: int):
+        cached = get_cached_car("id", car_id)
+        if cached is not None:
+            return cached
         car = self.db.query(Car).filter(Car.id == car_id).first()
         if not car:
             raise HTTPException(status_code=404, detail="Carro não encontrado")
-        return car
+        return set_cached_car(car)
     
     def get_by_plate(self, plate: str):
-        car = self.db.query(Car).filter(Car.license_plate == plate).first()
+        fleet_snapshot.ensure_fresh(self.db)
+        return fleet_snapshot.get_by_plate(plate)
+
+    def _get_by_plate_or_404(self, plate: str) -> Car:
+        """Resolve a placa pelo snapshot da frota e carrega o carro pela chave primária."""
+        fleet_snapshot.ensure_fresh(self.db)
+        car_id = fleet_snapshot.car_id(plate)
+        car = self.db.get(Car, car_id) if car_id is not None else None
+        if not car:
+            raise HTTPException(status_code=404, detail="Carro não encontrado")
         return car
 
 
@@ -60,8 +190,11 @@ class CarController:
         try:
             car = Car(**data.dict())
             self.db.add(car)
+            self.db.flush()
+            change_feed.publish("cars", car.id, self.db)
             self.db.commit()
             self.db.refresh(car)
+            invalidate_car(car.id, car.license_plate)
             return car
         except Exception as e:
             self.db.rollback()
@@ -75,8 +208,11 @@ class CarController:
             car_dict['mileage'] = car_dict.pop('km')
             db_car = Car(**car_dict)
             self.db.add(db_car)
+            self.db.flush()
+            change_feed.publish("cars", db_car.id, self.db)
             self.db.commit()
             self.db.refresh(db_car)
+            invalidate_car(db_car.id, db_car.license_plate)
             return db_car
         except Exception as e:
             self.db.rollback()
@@ -84,15 +220,15 @@ class CarController:
 
 
     def update_by_plate(self, plate: str, data: dict):
-        car = self.db.query(Car).filter(Car.license_plate == plate).first()
-        if not car:
-            raise HTTPException(status_code=404, detail="Carro não encontrado")
+        car = self._get_by_plate_or_404(plate)
         try:
             for key, value in data.items():
                 if hasattr(car, key):
                     setattr(car, key, value)
+            change_feed.publish("cars", car.id, self.db)
             self.db.commit()
             self.db.refresh(car)
+            invalidate_car(car.id, plate, car.license_plate)
             return {
                 "success": True,
                 "message": "Carro atualizado com sucesso",
@@ -103,12 +239,13 @@ class CarController:
             raise HTTPException(status_code=500, detail=str(e))
 
     def delete_by_plate(self, plate: str): # <--- Esta função está correta
-        car = self.db.query(Car).filter(Car.license_plate == plate).first()
-        if not car:
-            raise HTTPException(status_code=404, detail="Carro não encontrado")
+        car = self._get_by_plate_or_404(plate)
+        car_id = car.id
         try:
             self.db.delete(car)
+            change_feed.publish("cars", car_id, self.db)
             self.db.commit()
+            invalidate_car(car_id, plate)
             return {"success": True, "message": "Carro deletado com sucesso"}
         except Exception as e:
             self.db.rollback()
@@ -120,18 +257,26 @@ class CarController:
         except ValueError:
             raise HTTPException(status_code=400, detail="Status inválido")
 
-        car = self.db.query(Car).filter(Car.license_plate == plate).first()
-        if not car:
+        fleet_snapshot.ensure_fresh(self.db)
+        car_id = fleet_snapshot.car_id(plate)
+        if car_id is None:
             raise HTTPException(status_code=404, detail="Carro não encontrado")
 
         try:
-            car.status = status_enum
+            # UPDATE direto pela chave primária; o carro atualizado sai do snapshot
+            alterados = self.db.execute(update(Car).where(Car.id == car_id).values(status=status_enum)).rowcount
+            if alterados:
+                change_feed.publish("cars", car_id, self.db)
             self.db.commit()
-            self.db.refresh(car)
-            return {"success": True, "message": "Status do carro atualizado com sucesso", "data": car}
         except Exception as e:
             self.db.rollback()
             raise HTTPException(status_code=500, detail=str(e))
+
+        invalidate_car(car_id, plate)
+        if not alterados:
+            raise HTTPException(status_code=404, detail="Carro não encontrado")
+        fleet_snapshot.ensure_fresh(self.db)
+        return {"success": True, "message": "Status do carro atualizado com sucesso", "data": fleet_snapshot.get_by_plate(plate)}
         
     def buscar_carros(self):
         try:
@@ -139,4 +284,46 @@ class CarController:
             return carros
         except Exception as e:
             self.db.rollback()
-            raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=str(e))
+
+class AsyncCarController:
+    """
+    Variante assíncrona do CarController para as rotas `async def`.
+
+    Cada chamada executa o método do controller síncrono via `AsyncSession.run_sync`.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_all(self, status: Optional[str] = None, category: Optional[str] = None, page: int = 1, limit: int = 10,
+                      cursor: Optional[str] = None, with_total: bool = True) -> bytes:
+        return await self.db.run_sync(lambda s: CarController(s).get_all(status, category, page, limit, cursor, with_total))
+
+    async def get_available(self, start_date: date, end_date: date, category: Optional[CarCategory] = None,
+                            fuel_type: Optional[FuelType] = None, transmission_type: Optional[TransmissionType] = None,
+                            passengers: Optional[int] = None):
+        return await self.db.run_sync(lambda s: CarController(s).get_available(
+            start_date, end_date, category, fuel_type, transmission_type, passengers
+        ))
+
+    async def get_quotes(self, car_ids: Optional[List[uuid.UUID]], ranges: List[Tuple[date, date]]):
+        return await self.db.run_sync(lambda s: CarController(s).get_quotes(car_ids, ranges))
+
+    async def get_by_id(self, car_id):
+        return await self.db.run_sync(lambda s: CarController(s).get_by_id(car_id))
+
+    async def get_by_plate(self, plate: str):
+        return await self.db.run_sync(lambda s: CarController(s).get_by_plate(plate))
+
+    async def create(self, data: CarCreate):
+        return await self.db.run_sync(lambda s: CarController(s).create(data))
+
+    async def update_by_plate(self, plate: str, data: dict):
+        return await self.db.run_sync(lambda s: CarController(s).update_by_plate(plate, data))
+
+    async def delete_by_plate(self, plate: str):
+        return await self.db.run_sync(lambda s: CarController(s).delete_by_plate(plate))
+
+    async def update_status_by_plate(self, plate: str, status: str):
+        return await self.db.run_sync(lambda s: CarController(s).update_status_by_plate(plate, status))
@@ -1,9 +1,15 @@
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from uuid import uuid4
 from fastapi import HTTPException
-from datetime import date
+from datetime import date, datetime
 from src.models.rental import Rental, RentalStatus, PaymentStatus, RentalCreate
-from src.models.car import Car
+from src.models.car import Car, CarStatus
+from src.services.availability_service import availability_index
+from src.services.car_cache import invalidate_car
+from src.services.change_feed import change_feed
+from src.services.pricing_service import pricing_service
 
 # class RentalController
 
@@ -11,22 +17,17 @@ def criar_locacao(db: Session, dados: RentalCreate):
     if dados.end_date <= dados.start_date:
         raise HTTPException(status_code=400, detail="Data de fim deve ser após a data de início.")
 
-    conflito = db.query(Rental).filter(
-        Rental.car_id == dados.car_id,
-        Rental.status == RentalStatus.ATIVA,
-        Rental.start_date <= dados.end_date,
-        Rental.end_date >= dados.start_date
-    ).first()
-
-    if conflito:
+    availability_index.ensure_loaded(db)
+    if not availability_index.is_free(dados.car_id, dados.start_date, dados.end_date):
         raise HTTPException(status_code=400, detail="Carro já reservado nesse período.")
 
     carro = db.query(Car).filter(Car.id == dados.car_id).first()
     if not carro:
         raise HTTPException(status_code=404, detail="Carro não encontrado.")
 
-    dias = (dados.end_date - dados.start_date).days or 1
-    total = dias * carro.daily_rate
+    cotacao = pricing_service.quote(carro, dados.start_date, dados.end_date)
+    dias = cotacao["total_days"]
+    total = cotacao["total_amount"]
 
     locacao = Rental(
         id=uuid4(),
@@ -47,7 +48,26 @@ def criar_locacao(db: Session, dados: RentalCreate):
         payment_method=dados.payment_method
     )
 
+    # Reserva o carro na mesma transação (ver RentalService.create_rental)
+    resultado = db.execute(
+        update(Car)
+        .where(Car.id == dados.car_id, Car.status == CarStatus.DISPONIVEL)
+        .values(status=CarStatus.ALUGADO, updated_at=datetime.now().isoformat())
+    )
+    if resultado.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Carro não está disponível.")
+
     db.add(locacao)
-    db.commit()
+    try:
+        db.flush()
+        change_feed.publish("cars", carro.id, db)
+        change_feed.publish("locacoes", locacao.id, db)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Carro já reservado nesse período.")
     db.refresh(locacao)
+    invalidate_car(carro.id, carro.license_plate)
+    availability_index.sync_rental(locacao)
     return locacao
@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+
+from fastapi import Header, HTTPException, Request, Response, status
+from starlette.datastructures import UploadFile
+
+from src.services.idempotency_service import StoredResponse, get_idempotency_store
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotentReplay(Exception):
+    """Levantada pela dependência para devolver a resposta guardada sem executar a rota."""
+
+    def __init__(self, registro: StoredResponse):
+        self.registro = registro
+
+
+async def _fingerprint(request: Request) -> str:
+    """Hash do método, caminho, query string e corpo (JSON ou formulário já lidos pelo FastAPI)."""
+    digest = hashlib.sha256(f"{request.method} {request.url.path}?{request.url.query}\n".encode())
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(("multipart/form-data", "application/x-www-form-urlencoded")):
+        form = await request.form()
+        for campo, valor in sorted(form.multi_items(), key=lambda item: item[0]):
+            if isinstance(valor, UploadFile):
+                valor = f"<arquivo {valor.filename} {valor.size}>"
+            digest.update(f"{campo}={valor}\n".encode())
+    else:
+        digest.update(await request.body())
+    return digest.hexdigest()
+
+
+async def idempotency_key(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, max_length=MAX_KEY_LENGTH),
+) -> Optional[str]:
+    """
+    Dependência para rotas de escrita: `dependencies=[Depends(idempotency_key)]`.
+
+    Sem o header a rota funciona como antes. Com ele, a primeira requisição
+    reserva a chave e segue normalmente (o `idempotency_middleware` guarda a
+    resposta); repetições com o mesmo corpo recebem a resposta guardada sem
+    passar pela rota, e a mesma chave com outro corpo é rejeitada com 422.
+    """
+    if not idempotency_key:
+        return None
+    fingerprint = await _fingerprint(request)
+    chave = f"idem:{request.method}:{request.url.path}:{idempotency_key}"
+    try:
+        registro = await asyncio.to_thread(get_idempotency_store().reserve, chave, fingerprint)
+    except Exception as e:
+        # Como no cache: indisponibilidade do store não derruba a requisição
+        logger.warning(f"Store de idempotência indisponível: {e}")
+        return None
+
+    if registro is None:
+        request.state.idempotency = (chave, fingerprint)
+        return idempotency_key
+    if registro.fingerprint != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{IDEMPOTENCY_HEADER} já utilizada com outra requisição"
+        )
+    if registro.status_code is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Requisição com este {IDEMPOTENCY_HEADER} ainda em processamento",
+            headers={"Retry-After": "1"}
+        )
+    raise IdempotentReplay(registro)
+
+
+async def idempotent_replay_handler(request: Request, exc: IdempotentReplay) -> Response:
+    registro = exc.registro
+    return Response(
+        content=registro.body,
+        status_code=registro.status_code,
+        media_type=registro.content_type,
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+async def idempotency_middleware(request: Request, call_next):
+    """
+    Guarda a resposta das requisições que reservaram um Idempotency-Key.
+
+    Respostas 5xx (e exceções) liberam a chave, para que o cliente possa
+    tentar de novo; as demais ficam disponíveis para replay por IDEMPOTENCY_TTL.
+    """
+    try:
+        response = await call_next(request)
+    except Exception:
+        reserva = getattr(request.state, "idempotency", None)
+        if reserva is not None:
+            await _liberar(reserva[0])
+        raise
+
+    reserva = getattr(request.state, "idempotency", None)
+    if reserva is None:
+        return response
+    chave, fingerprint = reserva
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    try:
+        if response.status_code >= 500:
+            await _liberar(chave)
+        else:
+            registro = StoredResponse(
+                fingerprint=fingerprint, status_code=response.status_code,
+                content_type=response.headers.get("content-type"), body=body,
+            )
+            await asyncio.to_thread(get_idempotency_store().complete, chave, registro)
+    except Exception as e:
+        logger.warning(f"Falha ao guardar resposta idempotente ({chave}): {e}")
+
+    nova = Response(content=body, status_code=response.status_code)
+    nova.raw_headers = response.raw_headers
+    return nova
+
+
+async def _liberar(chave: str):
+    try:
+        await asyncio.to_thread(get_idempotency_store().release, chave)
+    except Exception as e:
+        logger.warning(f"Falha ao liberar {IDEMPOTENCY_HEADER} ({chave}): {e}")
@@ -0,0 +1,200 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class RequestStats:
+    """Contadores de uma requisição (preenchidos pelos eventos do SQLAlchemy)."""
+
+    __slots__ = ("sql_count", "sql_time", "statements")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.statements: List[str] = []
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def set_request_stats(stats: Optional[RequestStats]):
+    """Ativa `stats` no contexto atual; retorna o token para `reset_request_stats`."""
+    return _request_stats.set(stats)
+
+
+def reset_request_stats(token):
+    _request_stats.reset(token)
+
+
+# Funções chamadas ao fim de cada requisição com (request, stats), ex.: orçamento de queries
+request_hooks: List[Callable[[Request, RequestStats], None]] = []
+
+
+# Os listeners são registrados na classe Engine, então valem para o engine
+# síncrono, para o `sync_engine` do engine assíncrono e para qualquer outro
+# engine criado depois (réplicas, scripts).
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info["_query_start"].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_time += time.perf_counter() - inicio
+        stats.statements.append(statement)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # Query que falhou não passa pelo after_cursor_execute: descarta o início pendente
+    if context.connection is not None:
+        pendentes = context.connection.info.get("_query_start")
+        if pendentes:
+            pendentes.pop()
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Histogramas por rota, exportados no formato texto do Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Tuple, _Histogram]] = {}
+        self._buckets: Dict[str, Tuple] = {}
+        self._help: Dict[str, str] = {}
+        self._gauges = []
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple):
+        self._histograms.setdefault(name, {})
+        self._buckets[name] = buckets
+        self._help[name] = help_text
+
+    def observe(self, name: str, labels: Tuple[Tuple[str, str], ...], value: float):
+        with self._lock:
+            series = self._histograms[name]
+            hist = series.get(labels)
+            if hist is None:
+                hist = series[labels] = _Histogram(self._buckets[name])
+            hist.observe(value)
+
+    def register_gauges(self, collector):
+        """Registra uma função que retorna [(nome, ajuda, valor), ...] no momento da coleta."""
+        self._gauges.append(collector)
+
+    def render(self) -> str:
+        linhas = []
+        with self._lock:
+            for name, series in self._histograms.items():
+                linhas.append(f"# HELP {name} {self._help[name]}")
+                linhas.append(f"# TYPE {name} histogram")
+                for labels, hist in series.items():
+                    base = ",".join(f'{k}="{v}"' for k, v in labels)
+                    prefixo = base + "," if base else ""
+                    sufixo = f"{{{base}}}" if base else ""
+                    acumulado = 0
+                    for limite, quantidade in zip(hist.buckets, hist.counts):
+                        acumulado += quantidade
+                        linhas.append(f'{name}_bucket{{{prefixo}le="{limite}"}} {acumulado}')
+                    linhas.append(f'{name}_bucket{{{prefixo}le="+Inf"}} {hist.count}')
+                    linhas.append(f"{name}_sum{sufixo} {hist.total}")
+                    linhas.append(f"{name}_count{sufixo} {hist.count}")
+        for collector in self._gauges:
+            for name, help_text, value in collector():
+                linhas.append(f"# HELP {name} {help_text}")
+                linhas.append(f"# TYPE {name} gauge")
+                linhas.append(f"{name} {value}")
+        return "\n".join(linhas) + "\n"
+
+
+registry = MetricsRegistry()
+registry.histogram("http_request_duration_seconds", "Latência das requisições por rota", LATENCY_BUCKETS)
+registry.histogram("http_request_sql_queries", "Quantidade de queries SQL por requisição", SQL_COUNT_BUCKETS)
+registry.histogram("http_request_sql_seconds", "Tempo total em SQL por requisição", LATENCY_BUCKETS)
+registry.histogram("http_response_size_bytes", "Tamanho do corpo da resposta", SIZE_BUCKETS)
+
+
+def _route_label(request: Request) -> str:
+    # Usa o template da rota (/rental/locacoes/{rental_id}) para não explodir a cardinalidade
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "desconhecida"
+
+
+async def metrics_middleware(request: Request, call_next):
+    """
+    Mede latência, queries SQL (quantidade e tempo) e tamanho da resposta
+    de cada requisição. Os valores vão para `registry` (endpoint /metrics)
+    e para o cabeçalho `Server-Timing` da própria resposta.
+    """
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    inicio = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _request_stats.reset(token)
+    duracao = time.perf_counter() - inicio
+
+    labels = (
+        ("method", request.method),
+        ("route", _route_label(request)),
+    )
+    registry.observe("http_request_duration_seconds", labels + (("status", str(response.status_code)),), duracao)
+    registry.observe("http_request_sql_queries", labels, stats.sql_count)
+    registry.observe("http_request_sql_seconds", labels, stats.sql_time)
+
+    response.headers["Server-Timing"] = (
+        f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} queries", '
+        f"app;dur={(duracao - stats.sql_time) * 1000:.1f}, "
+        f"total;dur={duracao * 1000:.1f}"
+    )
+
+    for hook in request_hooks:
+        hook(request, stats)
+
+    content_length = response.headers.get("content-length")
+    if content_length is not None:
+        registry.observe("http_response_size_bytes", labels, int(content_length))
+    else:
+        # Respostas em streaming: conta os bytes conforme são enviados
+        response.body_iterator = _count_body(response.body_iterator, labels)
+    return response
+
+
+async def _count_body(body_iterator, labels):
+    tamanho = 0
+    async for chunk in body_iterator:
+        tamanho += len(chunk)
+        yield chunk
+    registry.observe("http_response_size_bytes", labels, tamanho)
@@ -0,0 +1,150 @@
+import functools
+import inspect
+import logging
+import os
+from collections import Counter
+from typing import List, Optional
+
+from fastapi import Request
+
+from src.middleware.metrics import (
+    RequestStats,
+    current_request_stats,
+    request_hooks,
+    reset_request_stats,
+    set_request_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+# off: não verifica | log: registra violações (staging) | raise: falha (testes)
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off").lower()
+# Acima disso, a mesma instrução SQL repetida é tratada como N+1
+QUERY_BUDGET_MAX_REPEATS = int(os.getenv("QUERY_BUDGET_MAX_REPEATS", "2"))
+
+
+class QueryBudgetExceeded(Exception):
+    """Um bloco/rota executou mais queries do que o orçamento declarado."""
+
+
+def _modo(mode: Optional[str]) -> str:
+    return (mode or QUERY_BUDGET_MODE).lower()
+
+
+def find_violations(stats: RequestStats, max_queries: Optional[int], max_repeats: Optional[int]) -> List[str]:
+    """Lista as violações de orçamento (total de queries e instruções repetidas)."""
+    violacoes = []
+    if max_queries is not None and stats.sql_count > max_queries:
+        violacoes.append(f"{stats.sql_count} queries (orçamento: {max_queries})")
+    if max_repeats is not None:
+        for statement, vezes in Counter(stats.statements).most_common():
+            if vezes <= max_repeats:
+                break
+            resumo = " ".join(statement.split())[:200]
+            violacoes.append(f"possível N+1, executada {vezes}x: {resumo}")
+    return violacoes
+
+
+def enforce(stats: RequestStats, max_queries: Optional[int], max_repeats: Optional[int],
+            label: str, mode: Optional[str] = None):
+    """Registra (modo log) ou levanta `QueryBudgetExceeded` (modo raise) se houver violações."""
+    modo = _modo(mode)
+    if modo == "off":
+        return
+    violacoes = find_violations(stats, max_queries, max_repeats)
+    if not violacoes:
+        return
+    mensagem = f"Orçamento de queries excedido em {label}: " + "; ".join(violacoes)
+    if modo == "raise":
+        raise QueryBudgetExceeded(mensagem)
+    logger.warning(mensagem)
+
+
+class query_budget:
+    """
+    Conta as queries executadas em um bloco e aplica um orçamento.
+
+    Pode ser usado como context manager ou decorator (funções síncronas
+    ou assíncronas):
+
+        with query_budget(3, label="listagem"):
+            service.get_rentals()
+
+        @query_budget(max_queries=2)
+        def get_cliente_with_locacoes(...): ...
+
+    Com `max_queries=None` apenas a detecção de N+1 é feita. O modo padrão
+    vem de QUERY_BUDGET_MODE; as queries do bloco continuam sendo somadas
+    às estatísticas da requisição (Server-Timing e /metrics).
+    """
+
+    def __init__(self, max_queries: Optional[int] = None, max_repeats: Optional[int] = QUERY_BUDGET_MAX_REPEATS,
+                 label: Optional[str] = None, mode: Optional[str] = None):
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+        self.label = label
+        self.mode = mode
+        self.stats = RequestStats()
+        self._externo = None
+        self._token = None
+
+    def __enter__(self) -> RequestStats:
+        self.stats = RequestStats()
+        self._externo = current_request_stats()
+        self._token = set_request_stats(self.stats)
+        return self.stats
+
+    def __exit__(self, exc_type, exc, tb):
+        reset_request_stats(self._token)
+        if self._externo is not None:
+            self._externo.sql_count += self.stats.sql_count
+            self._externo.sql_time += self.stats.sql_time
+            self._externo.statements.extend(self.stats.statements)
+        if exc_type is None:
+            enforce(self.stats, self.max_queries, self.max_repeats, self.label or "bloco", self.mode)
+        return False
+
+    def _copia(self, label: str) -> "query_budget":
+        # Cada chamada usa um bloco próprio (chamadas concorrentes não compartilham contadores)
+        return type(self)(self.max_queries, self.max_repeats, self.label or label, self.mode)
+
+    def __call__(self, func):
+        label = func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with self._copia(label):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self._copia(label):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def route_budget(max_queries: Optional[int] = None, max_repeats: Optional[int] = QUERY_BUDGET_MAX_REPEATS):
+    """
+    Declara o orçamento de queries de uma rota.
+
+    Diferente de `query_budget`, a verificação é feita pelo middleware de
+    métricas ao fim da requisição, então inclui as queries disparadas na
+    serialização da resposta (lazy loads de `response_model`).
+    """
+    def decorator(endpoint):
+        endpoint.__query_budget__ = (max_queries, max_repeats)
+        return endpoint
+    return decorator
+
+
+def _verificar_orcamento_da_rota(request: Request, stats: RequestStats):
+    endpoint = getattr(request.scope.get("route"), "endpoint", None)
+    orcamento = getattr(endpoint, "__query_budget__", None)
+    if orcamento is not None:
+        label = f"{request.method} {request.scope['route'].path}"
+        enforce(stats, *orcamento, label=label)
+
+
+request_hooks.append(_verificar_orcamento_da_rota)
+
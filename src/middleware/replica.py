@@ -0,0 +1,34 @@
+import math
+import time
+
+from fastapi import Request
+
+from src.config.database import (
+    DB_REPLICA_STICKY_SECONDS,
+    PRIMARY_STICKY_COOKIE,
+    get_replica_database_url,
+)
+
+_MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+async def read_your_writes_middleware(request: Request, call_next):
+    """
+    Após uma escrita bem-sucedida, marca o cliente com o cookie de
+    aderência ao primário por DB_REPLICA_STICKY_SECONDS, para que as
+    leituras seguintes (get_read_db) já enxerguem o que ele gravou.
+    """
+    response = await call_next(request)
+    if (
+        request.method in _MUTATING_METHODS
+        and response.status_code < 400
+        and get_replica_database_url() is not None
+    ):
+        response.set_cookie(
+            PRIMARY_STICKY_COOKIE,
+            f"{time.time() + DB_REPLICA_STICKY_SECONDS:.3f}",
+            max_age=math.ceil(DB_REPLICA_STICKY_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
@@ -2,10 +2,15 @@ from .car import Car, CarCreate, CarCategory, CarStatus
 from .clientes import Cliente, ClienteCreate, ClienteOut, ClienteUpdate, ClienteList, ClienteComLocacoes
 from .rental import Rental, RentalCreate, RentalOut, RentalStatus, PaymentStatus, PaymentMethod
 from .login import User
+from .idempotency import IdempotencyRecord
+from .overdue import OverdueRental, OverdueRentalOut, OverdueSummary, OverdueList
+from .report import DailyRevenue, DailyCarUsage, RevenueReport, UtilizationReport
 
 __all__ = [
     "Car", "CarCreate", "CarCategory", "CarStatus",
     "Cliente", "ClienteCreate", "ClienteOut", "ClienteUpdate", "ClienteList", "ClienteComLocacoes",
     "Rental", "RentalCreate", "RentalOut", "RentalStatus", "PaymentStatus", "PaymentMethod",
-    "User"
+    "User", "IdempotencyRecord",
+    "OverdueRental", "OverdueRentalOut", "OverdueSummary", "OverdueList",
+    "DailyRevenue", "DailyCarUsage", "RevenueReport", "UtilizationReport"
 ]
\ No newline at end of file
@@ -8,6 +8,7 @@ from src.models.rental import RentalOut # Certifique-se de que este import está
 
 # Importar o PasswordContext para hashing de senha
 from passlib.context import CryptContext
+from src.config.password_hasher import password_hasher
 
 # Configuração do contexto de hashing de senha
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -86,6 +87,10 @@ class ClienteCreate(BaseModel):
     def hash_password(self) -> str:
         return pwd_context.hash(self.senha)
 
+    # Variante para rotas assíncronas: o bcrypt roda no pool de processos
+    async def hash_password_async(self) -> str:
+        return await password_hasher.hash(self.senha)
+
 class ClienteOut(BaseModel):
     id: int
     nome: str
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String
+
+from src.config.database import Base
+
+
+class IdempotencyRecord(Base):
+    """
+    Resposta guardada para um Idempotency-Key (usada quando o Redis não está disponível).
+
+    `status_code` nulo significa que a requisição original ainda está em
+    processamento; `expires_at` é o fim da trava (em processamento) ou do TTL
+    da resposta guardada.
+    """
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(300), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    content_type = Column(String(100), nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyRecord(key='{self.key}', status_code={self.status_code})>"
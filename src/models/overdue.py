@@ -0,0 +1,55 @@
+import datetime
+import uuid
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, Numeric, String
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from src.config.database import Base
+
+
+class OverdueRental(Base):
+    """
+    Resumo desnormalizado das locações em atraso, mantido pelo job `overdue_sweep`.
+
+    Os painéis leem daqui (sem joins nem varredura de `locacoes`). Cada
+    varredura carimba `refreshed_at` nas linhas que continuam em atraso e
+    remove as que não foram carimbadas.
+    """
+    __tablename__ = "overdue_rentals"
+
+    rental_id = Column(Integer, ForeignKey("locacoes.id", ondelete="CASCADE"), primary_key=True)
+    cliente_id = Column(Integer, nullable=False, index=True)
+    cliente_nome = Column(String(100), nullable=True)
+    car_id = Column(PG_UUID(as_uuid=True), nullable=False)
+    license_plate = Column(String(10), nullable=True)
+    end_date = Column(Date, nullable=False)
+    days_overdue = Column(Integer, nullable=False, index=True)
+    total_amount = Column(Numeric(10, 2), nullable=False)
+    refreshed_at = Column(DateTime, nullable=False, index=True)
+
+
+class OverdueRentalOut(BaseModel):
+    rental_id: int
+    cliente_id: int
+    cliente_nome: Optional[str] = None
+    car_id: uuid.UUID
+    license_plate: Optional[str] = None
+    end_date: datetime.date
+    days_overdue: int
+    total_amount: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class OverdueSummary(BaseModel):
+    total: int = 0
+    valor_total: float = 0.0
+    maior_atraso_dias: int = 0
+    atualizado_em: Optional[datetime.datetime] = None
+
+
+class OverdueList(BaseModel):
+    resumo: OverdueSummary
+    data: List[OverdueRentalOut]
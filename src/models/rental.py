@@ -1,7 +1,7 @@
 import datetime
 import enum
 from datetime import date
-from typing import Optional, TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING
 import uuid 
 
 from pydantic import BaseModel, ConfigDict
@@ -79,9 +79,10 @@ class RentalCreate(BaseModel):
     car_id: uuid.UUID
     start_date: date
     end_date: date
-    total_days: int
-    daily_rate: float # Corrigido para ser obrigatório
-    total_amount: float
+    # Calculados no servidor (PricingService); valores enviados são ignorados
+    total_days: Optional[int] = None
+    daily_rate: Optional[float] = None
+    total_amount: Optional[float] = None
     additional_fees: float = 0
     mileage_start: int
     observations: Optional[str] = None
@@ -136,7 +137,17 @@ class FinishRentalRequest(BaseModel):
     return_date: date
     final_mileage: int
     fuel_level: int
-    late_fee: float
+    # Taxas manuais da devolução (avarias, combustível); a multa por atraso é calculada no servidor
+    late_fee: float = 0
     return_notes: Optional[str] = None
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class QuoteRange(BaseModel):
+    start_date: date
+    end_date: date
+
+class BatchQuoteRequest(BaseModel):
+    # Sem car_ids: todos os carros fora de manutenção
+    car_ids: Optional[List[uuid.UUID]] = None
+    ranges: List[QuoteRange]
\ No newline at end of file
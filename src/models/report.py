@@ -0,0 +1,68 @@
+import datetime
+import uuid
+from typing import List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import Column, Date, Enum, Integer, Numeric
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from src.config.database import Base
+from src.models.car import CarCategory
+from src.models.rental import PaymentMethod
+
+
+class DailyRevenue(Base):
+    """
+    Rollup diário de receita: locações e valor por dia x categoria x forma de pagamento.
+
+    A receita de uma locação é atribuída ao dia de `start_date`. Mantido de
+    forma incremental pelo RentalService e reconstruído pelo job noturno
+    `reports_rebuild`.
+    """
+    __tablename__ = "daily_revenue"
+
+    dia = Column(Date, primary_key=True)
+    category = Column(Enum(CarCategory), primary_key=True)
+    payment_method = Column(Enum(PaymentMethod, name='paymentmethod'), primary_key=True)
+    rentals = Column(Integer, nullable=False, default=0)
+    amount = Column(Numeric(12, 2), nullable=False, default=0)
+
+
+class DailyCarUsage(Base):
+    """Uma linha por carro e dia ocupado (dias cobrados da locação, ou até a devolução)."""
+    __tablename__ = "daily_car_usage"
+
+    dia = Column(Date, primary_key=True)
+    car_id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    rental_id = Column(Integer, nullable=False, index=True)
+
+
+class RevenueReportRow(BaseModel):
+    chave: str
+    rentals: int
+    amount: float
+
+
+class RevenueReport(BaseModel):
+    inicio: datetime.date
+    fim: datetime.date
+    agrupado_por: str
+    total_rentals: int
+    total_amount: float
+    data: List[RevenueReportRow]
+
+
+class CarUtilizationRow(BaseModel):
+    car_id: uuid.UUID
+    license_plate: Optional[str] = None
+    category: Optional[CarCategory] = None
+    days_rented: int
+    utilization: float
+
+
+class UtilizationReport(BaseModel):
+    inicio: datetime.date
+    fim: datetime.date
+    dias_no_periodo: int
+    utilizacao_media: float
+    data: List[CarUtilizationRow]
@@ -1,12 +1,20 @@
+import json
+from datetime import date
+from typing import Literal
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 # Ajuste conforme o caminho real da sua sessão de banco de dados 
 # Ajuste conforme o caminho real do seu CarController
-from src.controllers.car_controller import CarController 
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body
-from src.models.car import CarCreate
-from src.config.database import SessionLocal, get_db
-from src.controllers.car_controller import CarController
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body, Request
+from fastapi.responses import StreamingResponse
+from src.models.car import Car, CarCreate, CarCategory, CarStatus, FuelType, TransmissionType
+from src.models.rental import BatchQuoteRequest
+from src.services.export_service import CAR_EXPORT_COLUMNS, EXPORT_MEDIA_TYPES, stream_export
+from src.config.database import get_async_db
+from src.controllers.car_controller import AsyncCarController
+from src.services.car_import_service import AsyncCarImportService, parse_csv_rows
+from src.middleware.query_budget import route_budget
+from src.services.serializers import json_response
 
 
 backend = APIRouter(tags=["Carros"])
@@ -19,36 +27,103 @@ backend = APIRouter(tags=["Carros"])
 #     return car
 
 @backend.get("/carros")
-def list_cars(
+@route_budget(max_queries=3)
+async def list_cars(
     status: str | None = Query(None),
     category: str | None = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db) # <-- Adicione aqui
+    cursor: str | None = Query(None, description="`next_cursor` da página anterior (paginação por chave)"),
+    with_total: bool = Query(True, description="Incluir o total de registros"),
+    db: AsyncSession = Depends(get_async_db) # <-- Adicione aqui
 ):
-    controller = CarController(db) # <-- Instancie aqui
-    return controller.get_all(status, category, page, limit)
+    controller = AsyncCarController(db) # <-- Instancie aqui
+    return json_response(await controller.get_all(status, category, page, limit, cursor, with_total))
+
+@backend.get("/availability")
+@route_budget(max_queries=3)
+async def search_available_cars(
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    category: CarCategory | None = Query(None),
+    fuel_type: FuelType | None = Query(None),
+    transmission_type: TransmissionType | None = Query(None),
+    passengers: int | None = Query(None, ge=1, le=10),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Busca os carros livres entre `start_date` e `end_date` (inclusive) com filtros opcionais"""
+    controller = AsyncCarController(db)
+    return await controller.get_available(start_date, end_date, category, fuel_type, transmission_type, passengers)
+
+@backend.post("/quotes")
+@route_budget(max_queries=3)
+async def quote_cars(data: BatchQuoteRequest, db: AsyncSession = Depends(get_async_db)):
+    """Preços de vários carros em vários períodos candidatos, com a disponibilidade de cada um"""
+    controller = AsyncCarController(db)
+    return await controller.get_quotes(data.car_ids, [(r.start_date, r.end_date) for r in data.ranges])
+
+@backend.get("/export")
+def export_cars(
+    formato: Literal["csv", "ndjson"] = "csv",
+    status: CarStatus | None = Query(None),
+    category: CarCategory | None = Query(None)
+):
+    """Exportar a frota em streaming (CSV ou NDJSON)"""
+    where = []
+    if status:
+        where.append(Car.status == status)
+    if category:
+        where.append(Car.category == category)
+    return StreamingResponse(
+        stream_export(CAR_EXPORT_COLUMNS, formato, where),
+        media_type=EXPORT_MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="carros.{formato}"'}
+    )
 
 @backend.post("/carros")
-def create_car(data: CarCreate = Body(...), db: Session = Depends(get_db)): # <-- Adicione aqui
-    controller = CarController(db) # <-- Instancie aqui
-    return controller.create(data)
+async def create_car(data: CarCreate = Body(...), db: AsyncSession = Depends(get_async_db)): # <-- Adicione aqui
+    controller = AsyncCarController(db) # <-- Instancie aqui
+    return await controller.create(data)
+
+@backend.post("/carros/import")
+async def import_cars(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Importação em lote de carros.
+
+    Corpo em JSON (array de objetos no formato de `CarCreate`) ou CSV
+    (`Content-Type: text/csv`, cabeçalho com os mesmos campos). Retorna
+    um relatório por linha com os carros criados e os erros encontrados.
+    """
+    content_type = request.headers.get("content-type", "")
+    body = await request.body()
+    try:
+        if "csv" in content_type:
+            rows = parse_csv_rows(body)
+        else:
+            rows = json.loads(body)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Arquivo inválido: {e}")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Envie um array JSON ou um CSV")
+
+    service = AsyncCarImportService(db)
+    return await service.import_rows(rows)
 
 @backend.put("/carros/{plate}") # <-- Corrigido: falta a barra '/' antes do '{plate}'
-def update_car(plate: str, data: dict = Body(...), db: Session = Depends(get_db)): # <-- Adicione aqui
-    controller = CarController(db) # <-- Instancie aqui
-    return controller.update_by_plate(plate, data)
+async def update_car(plate: str, data: dict = Body(...), db: AsyncSession = Depends(get_async_db)): # <-- Adicione aqui
+    controller = AsyncCarController(db) # <-- Instancie aqui
+    return await controller.update_by_plate(plate, data)
 
 # A rota de DELETE já está correta!
 @backend.delete("/carros/{plate}", status_code=status.HTTP_200_OK)
 async def delete_car_route(
     plate: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    controller = CarController(db)
-    return controller.delete_by_plate(plate)
+    controller = AsyncCarController(db)
+    return await controller.delete_by_plate(plate)
 
 @backend.patch("/carros/{plate}/status") # <-- Corrigido o caminho para ser consistente
-def change_status(plate: str, status: str = Body(...), db: Session = Depends(get_db)): # <-- Adicione aqui
-    controller = CarController(db) # <-- Instancie aqui
-    return controller.update_status_by_plate(plate, status)
\ No newline at end of file
+async def change_status(plate: str, status: str = Body(...), db: AsyncSession = Depends(get_async_db)): # <-- Adicione aqui
+    controller = AsyncCarController(db) # <-- Instancie aqui
+    return await controller.update_status_by_plate(plate, status)
\ No newline at end of file
@@ -1,46 +1,94 @@
-from typing import List
-from fastapi import APIRouter, Body, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import List, Literal
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.controllers.clientes import ClienteController
-from src.config.database import SessionLocal, get_db
+from src.config.database import get_async_db, get_async_read_db
+from src.config.password_hasher import PasswordHasherBusy
+from src.middleware.query_budget import route_budget
 from src.models.clientes import (
     Cliente, ClienteCreate, ClienteOut, ClienteUpdate, 
     ClienteList, ClienteComLocacoes
 )
-from src.services.cliente_service import ClienteService
+from src.services.cliente_service import AsyncClienteService
+from src.services.export_service import CLIENTE_EXPORT_COLUMNS, EXPORT_MEDIA_TYPES, stream_export
+from src.services.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from src.services.serializers import CLIENTE_LIST, json_response
 
 backend = APIRouter()
 
-db = SessionLocal()
 # cliente_controller = ClienteController(db)
 
 
 
 
 @backend.post("/", response_model=ClienteOut, status_code=status.HTTP_201_CREATED)
-def create_cliente(cliente: ClienteCreate, db: Session = Depends(get_db)):
+async def create_cliente(cliente: ClienteCreate, db: AsyncSession = Depends(get_async_db)):
     """Criar um novo cliente"""
-    service = ClienteService(db)
-    return service.create_cliente(cliente)
+    service = AsyncClienteService(db)
+    try:
+        return await service.create_cliente(cliente)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado. Tente novamente em instantes.",
+            headers={"Retry-After": "1"}
+        )
 
 
 @backend.get("/", response_model=List[ClienteList])
-def get_clientes(
-    skip: int = 0,
-    limit: int = 100,
+@route_budget(max_queries=2)
+async def get_clientes(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     ativo: bool = None,
-    db: Session = Depends(get_db)
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Listar clientes.
+    Com `cursor` (valor do cabeçalho X-Next-Cursor da página anterior) a paginação é por chave e `skip` é ignorado.
+    """
+    after_id = None
+    if cursor:
+        try:
+            after_id = int(decode_cursor(cursor, 1)[0])
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    service = AsyncClienteService(db)
+    clientes = await service.get_cliente_rows(skip=skip, limit=limit, ativo=ativo, after_id=after_id)
+    headers = {NEXT_CURSOR_HEADER: encode_cursor([clientes[-1].id])} if clientes and len(clientes) == limit else None
+    # Linhas do Core serializadas direto para bytes (mesmo formato de ClienteList)
+    return json_response(CLIENTE_LIST.dumps(clientes), headers=headers)
+
+
+@backend.get("/export")
+def export_clientes(formato: Literal["csv", "ndjson"] = "csv", ativo: bool = None):
+    """Exportar clientes em streaming (CSV ou NDJSON), sem o hash da senha"""
+    where = [Cliente.ativo == ativo] if ativo is not None else []
+    return StreamingResponse(
+        stream_export(CLIENTE_EXPORT_COLUMNS, formato, where),
+        media_type=EXPORT_MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="clientes.{formato}"'}
+    )
+
+
+@backend.get("/search", response_model=List[ClienteList])
+async def search_clientes(
+    q: str = Query(..., min_length=1, description="Início do nome, email, CPF/CNPJ ou telefone"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Listar clientes"""
-    service = ClienteService(db)
-    return service.get_clientes(skip=skip, limit=limit, ativo=ativo)
+    """Buscar clientes (resultados ordenados por relevância e limitados)"""
+    service = AsyncClienteService(db)
+    return await service.search_clientes(q, limit)
 
 
 @backend.get("/search/cpf/{cpf}")
-def search_by_cpf(cpf: str, db: Session = Depends(get_db)):
+async def search_by_cpf(cpf: str, db: AsyncSession = Depends(get_async_db)):
     """Buscar cliente por CPF"""
-    service = ClienteService(db)
-    cliente = service.get_cliente_by_cpf(cpf)
+    service = AsyncClienteService(db)
+    cliente = await service.get_cliente_by_cpf_cnpj(cpf)
     if not cliente:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -50,10 +98,11 @@ def search_by_cpf(cpf: str, db: Session = Depends(get_db)):
 
 
 @backend.get("/{cliente_id}/locacoesx", response_model=ClienteComLocacoes)
-def get_cliente_com_locacoes(cliente_id: int, db: Session = Depends(get_db)):
+@route_budget(max_queries=2)
+async def get_cliente_com_locacoes(cliente_id: int, db: AsyncSession = Depends(get_async_db)):
     """Buscar cliente com suas locações"""
-    service = ClienteService(db)
-    cliente = service.get_cliente_with_locacoes(cliente_id)
+    service = AsyncClienteService(db)
+    cliente = await service.get_cliente_with_locacoes(cliente_id)
     if not cliente:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -63,10 +112,10 @@ def get_cliente_com_locacoes(cliente_id: int, db: Session = Depends(get_db)):
 
 
 @backend.get("/{cliente_id}", response_model=ClienteOut)
-def get_cliente(cliente_id: int, db: Session = Depends(get_db)):
+async def get_cliente(cliente_id: int, db: AsyncSession = Depends(get_async_db)):
     """Buscar cliente por ID"""
-    service = ClienteService(db)
-    cliente = service.get_cliente_by_id(cliente_id)
+    service = AsyncClienteService(db)
+    cliente = await service.get_cliente_by_id(cliente_id)
     if not cliente:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -76,14 +125,14 @@ def get_cliente(cliente_id: int, db: Session = Depends(get_db)):
 
 
 @backend.put("/{cliente_id}", response_model=ClienteOut)
-def update_cliente(
+async def update_cliente(
     cliente_id: int, 
     cliente_update: ClienteUpdate, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Atualizar cliente"""
-    service = ClienteService(db)
-    cliente = service.update_cliente(cliente_id, cliente_update)
+    service = AsyncClienteService(db)
+    cliente = await service.update_cliente(cliente_id, cliente_update)
     if not cliente:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -92,11 +141,11 @@ def update_cliente(
     return cliente
 
 @backend.delete("/{cliente_id}") # Sua rota atual
-def delete_cliente(cliente_id: int, db: Session = Depends(get_db)):
+async def delete_cliente(cliente_id: int, db: AsyncSession = Depends(get_async_db)):
     """Deletar cliente"""
-    service = ClienteService(db)
+    service = AsyncClienteService(db)
     try:
-        success = service.delete_cliente(cliente_id)
+        success = await service.delete_cliente(cliente_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -8,27 +8,36 @@ from src.services.cliente_service import ClienteService
 backend = APIRouter()
 from typing import Union
 from fastapi import APIRouter, Body, Depends, HTTPException, status, Response # Importe Response
-from sqlalchemy.orm import Session
-from src.config.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config.database import get_async_db
+from src.config.password_hasher import PasswordHasherBusy
 from src.models.clientes import ClienteOut
-from src.services.cliente_service import ClienteService
+from src.services.cliente_service import AsyncClienteService
 
 backend = APIRouter()
 
 @backend.post("/user/login", response_model=ClienteOut, summary="Autenticar Usuario")
-def login_cliente(
+async def login_cliente(
     # Adicione `response: Response` para poder definir o cookie
     response: Response,
     cpf_cnpj: str = Body(..., alias="cpf_cnpj", description="CPF ou CNPJ do cliente"), 
     senha: Union[str, int] = Body(..., description="Senha do Usuario"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Autentica um cliente com CPF/CNPJ e senha.
     Retorna os dados do cliente autenticado e define o cookie de acesso.
     """
-    service = ClienteService(db)
-    cliente = service.autenticar_cliente(cpf_cnpj, str(senha))
+    service = AsyncClienteService(db)
+    try:
+        cliente = await service.autenticar_cliente(cpf_cnpj, str(senha))
+    except PasswordHasherBusy:
+        # Fila de bcrypt cheia: melhor recusar rápido do que degradar o resto da API
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Muitas tentativas de login simultâneas. Tente novamente em instantes.",
+            headers={"Retry-After": "1"}
+        )
     
     if not cliente:
         raise HTTPException(
@@ -0,0 +1,48 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.config.database import active_engines
+from src.config.password_hasher import password_hasher
+from src.config.pool import pool_gauges, pool_stats
+from src.middleware.metrics import registry
+from src.services.change_feed import change_feed
+from src.services.scheduler import scheduler
+
+backend = APIRouter()
+
+
+def _password_hasher_gauges():
+    stats = password_hasher.stats()
+    return [
+        ("password_hash_pending", "Operações bcrypt pendentes no pool", stats["pendentes"]),
+        ("password_hash_completed_total", "Operações bcrypt concluídas", stats["concluidas"]),
+        ("password_hash_rejected_total", "Operações bcrypt recusadas por fila cheia", stats["rejeitadas"]),
+        ("password_hash_avg_ms", "Tempo médio por operação bcrypt (ms)", stats["tempo_medio_ms"]),
+    ]
+
+
+def _pool_gauges():
+    gauges = [
+        ("db_pool_checkouts_total", "Conexões obtidas dos pools", pool_stats.checkouts),
+        ("db_pool_timeouts_total", "Checkouts que estouraram DB_POOL_TIMEOUT", pool_stats.timeouts),
+        ("db_pool_checkout_max_seconds", "Maior espera por conexão desde o início", pool_stats.espera_max),
+        ("db_sessions_open", "Sessões abertas pelas dependências get_db/get_async_db", pool_stats.sessoes_abertas()),
+        ("db_sessions_stuck", "Sessões abertas há mais de DB_SESSION_LEAK_SECONDS", pool_stats.sessoes_presas()),
+        ("db_sessions_leaked_total", "Sessões fechadas após DB_SESSION_LEAK_SECONDS", pool_stats.vazamentos),
+    ]
+    for nome, engine in active_engines().items():
+        for campo, valor in pool_gauges(engine):
+            gauges.append((f"db_pool_{nome}_{campo}", f"Pool do engine {nome}: {campo}", valor))
+    return gauges
+
+
+registry.register_gauges(_password_hasher_gauges)
+registry.register_gauges(_pool_gauges)
+registry.register_gauges(scheduler.gauges)
+registry.register_gauges(change_feed.gauges)
+
+
+@backend.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Métricas no formato texto do Prometheus"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,44 +1,84 @@
-import os
-import shutil
+import logging
 import traceback
 import uuid
 from datetime import datetime, date
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Body
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Form, Body
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config.database import get_db
-from src.models.rental import FinishRentalRequest, RentalCreate, RentalOut, RentalStatus, RentalUpdate, PaymentMethod
-from src.services.rental_service import RentalService
+from src.config.database import get_async_db, get_async_read_db
+from src.middleware.idempotency import idempotency_key
+from src.middleware.query_budget import route_budget
+from src.models.overdue import OverdueList
+from src.models.rental import FinishRentalRequest, Rental, RentalCreate, RentalOut, RentalStatus, RentalUpdate, PaymentMethod
+from src.services.export_service import EXPORT_MEDIA_TYPES, RENTAL_EXPORT_COLUMNS, stream_export
+from src.services.overdue_service import AsyncOverdueService
+from src.services.rental_service import AsyncRentalService, RentalConflictError
+from src.services.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from src.services.serializers import RENTAL_OUT, json_response
+from src.services.upload_service import (
+    MULTIPART_OVERHEAD, CnhStorage, MultipartFileReader, UnsupportedUpload, UploadTooLarge
+)
+
+logger = logging.getLogger(__name__)
 
 backend = APIRouter()
 
+# Criado no startup da aplicação (lifespan), não na importação
 UPLOAD_DIRECTORY = "uploads/cnh_images"
-os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
+# Temporários dos uploads em andamento: fora do diretório servido, no mesmo disco (rename atômico)
+UPLOAD_TMP_DIRECTORY = "uploads/tmp"
+
+cnh_storage = CnhStorage(UPLOAD_DIRECTORY, UPLOAD_TMP_DIRECTORY)
+
+# O corpo é lido em streaming (sem UploadFile); documenta o formulário esperado
+CNH_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["cnh_file"],
+            "properties": {"cnh_file": {"type": "string", "format": "binary"}},
+        }}},
+    }
+}
 
 # 1. Rota para upload da CNH
-@backend.post("/upload-cnh/", status_code=status.HTTP_201_CREATED)
-async def upload_cnh_photo(cnh_file: UploadFile = File(...)):
+@backend.post("/upload-cnh/", status_code=status.HTTP_201_CREATED, openapi_extra=CNH_UPLOAD_OPENAPI)
+async def upload_cnh_photo(request: Request):
     """
-    Endpoint para fazer o upload da CNH e retornar o caminho de acesso.
+    Upload da CNH (JPEG, PNG ou PDF) no campo multipart `cnh_file`; retorna o caminho de acesso.
+
+    O corpo é lido em streaming direto para o armazenamento, com limite de
+    CNH_UPLOAD_MAX_BYTES; a mesma CNH enviada de novo reaproveita o arquivo.
     """
+    tamanho_declarado = request.headers.get("content-length")
+    if tamanho_declarado and tamanho_declarado.isdigit() \
+            and int(tamanho_declarado) > cnh_storage.max_bytes + MULTIPART_OVERHEAD:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Arquivo muito grande.")
     try:
-        cnh_filename = f"{uuid.uuid4()}_{cnh_file.filename}"
-        file_path = os.path.join(UPLOAD_DIRECTORY, cnh_filename)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(cnh_file.file, buffer)
-            
-        return {"cnh_url": f"/cnh_images/{cnh_filename}"}
-        
-    except Exception as e:
-        print("Erro ao salvar a foto da CNH:", e)
-        traceback.print_exc()
+        leitor = MultipartFileReader(request.headers.get("content-type", ""), "cnh_file", request.stream())
+        upload = await cnh_storage.salvar(leitor)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except UnsupportedUpload as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception:
+        logger.exception("Erro ao salvar a foto da CNH")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro ao salvar a foto da CNH."
         )
+    return {
+        "cnh_url": f"/cnh_images/{upload.nome}",
+        "sha256": upload.sha256,
+        "bytes": upload.tamanho,
+        "duplicado": upload.duplicado,
+    }
 
 # --- Modelo para criação da locação (usado para requisições JSON) ---
 # Se a sua aplicação cliente (front-end) envia dados JSON,
@@ -48,9 +88,10 @@ class RentalCreateRequest(BaseModel):
     car_id: uuid.UUID
     start_date: date
     end_date: date
-    total_days: int
-    daily_rate: float
-    total_amount: float
+    # Calculados no servidor (PricingService); mantidos por compatibilidade
+    total_days: Optional[int] = None
+    daily_rate: Optional[float] = None
+    total_amount: Optional[float] = None
     additional_fees: float = 0
     mileage_start: int
     observations: str = ""
@@ -61,23 +102,29 @@ class RentalCreateRequest(BaseModel):
 # 2. Rota de criação de locação (Corrigida para JSON)
 # Esta é a sua rota de criação de locação, corrigida para
 # esperar um corpo de requisição JSON.
-@backend.post("/locacoes", response_model=RentalOut, status_code=status.HTTP_201_CREATED)
+@backend.post("/locacoes", response_model=RentalOut, status_code=status.HTTP_201_CREATED,
+              dependencies=[Depends(idempotency_key)])
 async def create_rental_route(
     rental_data: RentalCreateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Cria uma nova locação a partir de um corpo de requisição JSON.
     A validação é feita automaticamente pelo FastAPI usando o modelo Pydantic.
     """
     try:
-        service = RentalService(db)
+        service = AsyncRentalService(db)
         
         # O FastAPI já validou e converteu os tipos, basta passar para o serviço
-        created_rental = service.create_rental(rental_data)
+        created_rental = await service.create_rental(rental_data)
         
         return created_rental
 
+    except RentalConflictError as e:
+        # Carro já tomado por outra requisição: 409 para o cliente não repetir às cegas
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         print("--- ERRO INTERNO DURANTE A CRIAÇÃO DA LOCAÇÃO ---")
         traceback.print_exc()
@@ -90,21 +137,81 @@ async def create_rental_route(
 # O restante das rotas permanece inalterado e está correto
 # -------------------------------------------------------------
 @backend.get("/locacoes", response_model=List[RentalOut])
-def get_rentals(
-    skip: int = 0,
-    limit: int = 100,
+@route_budget(max_queries=2)
+async def get_rentals(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     status_filter: Optional[RentalStatus] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Listar locações"""
-    service = RentalService(db)
-    return service.get_rentals(skip=skip, limit=limit, status_filter=status_filter)
+    """
+    Listar locações.
+    Com `cursor` (valor do cabeçalho X-Next-Cursor da página anterior) a paginação é por chave e `skip` é ignorado.
+    """
+    after_id = None
+    if cursor:
+        try:
+            after_id = int(decode_cursor(cursor, 1)[0])
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    service = AsyncRentalService(db)
+    rentals = await service.get_rental_rows(skip=skip, limit=limit, status_filter=status_filter, after_id=after_id)
+    headers = {NEXT_CURSOR_HEADER: encode_cursor([rentals[-1].id])} if rentals and len(rentals) == limit else None
+    # Linhas do Core serializadas direto para bytes (mesmo formato de RentalOut)
+    return json_response(RENTAL_OUT.dumps(rentals), headers=headers)
+
+@backend.get("/export")
+def export_rentals(
+    formato: Literal["csv", "ndjson"] = "csv",
+    status_filter: Optional[RentalStatus] = None,
+    start_from: Optional[date] = None,
+    start_to: Optional[date] = None
+):
+    """Exportar locações em streaming (CSV ou NDJSON), com memória constante"""
+    where = []
+    if status_filter:
+        where.append(Rental.status == status_filter)
+    if start_from:
+        where.append(Rental.start_date >= start_from)
+    if start_to:
+        where.append(Rental.start_date <= start_to)
+    return StreamingResponse(
+        stream_export(RENTAL_EXPORT_COLUMNS, formato, where),
+        media_type=EXPORT_MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="locacoes.{formato}"'}
+    )
+
+@backend.get("/atrasadas", response_model=OverdueList)
+async def get_overdue_rentals(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Locações em atraso e totais, a partir do resumo mantido pelo agendador"""
+    service = AsyncOverdueService(db)
+    return {"resumo": await service.get_summary(), "data": await service.list_overdue(skip, limit)}
+
+@backend.get("/quote")
+async def quote_rental(
+    car_id: uuid.UUID,
+    start_date: date,
+    end_date: date,
+    additional_fees: float = 0,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Cotação de uma locação calculada no servidor (diárias, temporada e descontos)"""
+    service = AsyncRentalService(db)
+    try:
+        return await service.quote_rental(car_id, start_date, end_date, additional_fees)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @backend.get("/locacoes/{rental_id}", response_model=RentalOut)
-def get_rental(rental_id: int, db: Session = Depends(get_db)):
+async def get_rental(rental_id: int, db: AsyncSession = Depends(get_async_db)):
     """Buscar locação por ID"""
-    service = RentalService(db)
-    rental = service.get_rental_by_id(rental_id)
+    service = AsyncRentalService(db)
+    rental = await service.get_rental_by_id(rental_id)
     if not rental:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -113,15 +220,15 @@ def get_rental(rental_id: int, db: Session = Depends(get_db)):
     return rental
 
 @backend.put("/locacoes/{rental_id}", response_model=RentalOut)
-def update_rental(
+async def update_rental(
     rental_id: int, 
     rental_update: RentalUpdate, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Atualiza a locação, incluindo a quilometragem"""
-    service = RentalService(db)
+    service = AsyncRentalService(db)
     
-    rental = service.update_rental(rental_id, rental_update)
+    rental = await service.update_rental(rental_id, rental_update)
     
     if not rental:
         raise HTTPException(
@@ -131,10 +238,10 @@ def update_rental(
     return rental
 
 @backend.delete("/locacoes/{rental_id}")
-def delete_rental(rental_id: int, db: Session = Depends(get_db)):
+async def delete_rental(rental_id: int, db: AsyncSession = Depends(get_async_db)):
     """Deletar locação"""
-    service = RentalService(db)
-    success = service.delete_rental(rental_id)
+    service = AsyncRentalService(db)
+    success = await service.delete_rental(rental_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -143,10 +250,10 @@ def delete_rental(rental_id: int, db: Session = Depends(get_db)):
     return {"message": "Locação deletada com sucesso"}
 
 @backend.post("/locacoes/{rental_id}/finish")
-def finish_rental(rental_id: int, rental_data: FinishRentalRequest, db: Session = Depends(get_db)):
+async def finish_rental(rental_id: int, rental_data: FinishRentalRequest, db: AsyncSession = Depends(get_async_db)):
     """Finalizar locação"""
-    service = RentalService(db)
-    rental = service.finish_rental(rental_id, rental_data)
+    service = AsyncRentalService(db)
+    rental = await service.finish_rental(rental_id, rental_data)
     if not rental:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -155,16 +262,16 @@ def finish_rental(rental_id: int, rental_data: FinishRentalRequest, db: Session
     return rental
 
 @backend.patch("/locacoes/{rental_id}/finalizar", response_model=RentalOut)
-def finalize_rental_endpoint(
+async def finalize_rental_endpoint(
     rental_id: int, 
     request_data: FinishRentalRequest, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Finaliza uma locação existente."""
-    service = RentalService(db)
+    service = AsyncRentalService(db)
     
     try:
-        updated_rental = service.finish_rental(rental_id, request_data)
+        updated_rental = await service.finish_rental(rental_id, request_data)
         if not updated_rental:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -179,13 +286,15 @@ def finalize_rental_endpoint(
         )
 
 @backend.get("/cliente/{cliente_id}", response_model=List[RentalOut])
-def get_rentals_by_cliente(cliente_id: int, db: Session = Depends(get_db)):
+@route_budget(max_queries=1)
+async def get_rentals_by_cliente(cliente_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Listar locações por cliente"""
-    service = RentalService(db)
-    return service.get_rentals_by_cliente(cliente_id)
+    service = AsyncRentalService(db)
+    return await service.get_rentals_by_cliente(cliente_id)
 
 @backend.get("/car/{car_id}", response_model=List[RentalOut])
-def get_rentals_by_car(car_id: str, db: Session = Depends(get_db)):
+@route_budget(max_queries=1)
+async def get_rentals_by_car(car_id: uuid.UUID, db: AsyncSession = Depends(get_async_read_db)):
     """Listar locações por carro"""
-    service = RentalService(db)
-    return service.get_rentals_by_car(car_id)
\ No newline at end of file
+    service = AsyncRentalService(db)
+    return await service.get_rentals_by_car(car_id)
\ No newline at end of file
@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import get_async_read_db
+from src.models.report import RevenueReport, UtilizationReport
+from src.services.report_service import AsyncReportService
+
+backend = APIRouter()
+
+# Período padrão dos relatórios quando `inicio`/`fim` não são informados
+DEFAULT_PERIOD_DAYS = 30
+
+
+def _periodo(inicio: Optional[date], fim: Optional[date]):
+    fim = fim or date.today()
+    inicio = inicio or fim - timedelta(days=DEFAULT_PERIOD_DAYS - 1)
+    if fim < inicio:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Data de fim deve ser após a data de início")
+    return inicio, fim
+
+
+@backend.get("/revenue", response_model=RevenueReport)
+async def revenue_report(
+    inicio: Optional[date] = None,
+    fim: Optional[date] = None,
+    agrupar: Literal["category", "payment_method", "dia"] = "category",
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Receita por categoria, forma de pagamento ou dia (rollup `daily_revenue`)"""
+    inicio, fim = _periodo(inicio, fim)
+    return await AsyncReportService(db).revenue(inicio, fim, agrupar)
+
+
+@backend.get("/payment-methods", response_model=RevenueReport)
+async def payment_method_report(
+    inicio: Optional[date] = None,
+    fim: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Distribuição das locações por forma de pagamento"""
+    inicio, fim = _periodo(inicio, fim)
+    return await AsyncReportService(db).revenue(inicio, fim, "payment_method")
+
+
+@backend.get("/utilization", response_model=UtilizationReport)
+async def utilization_report(
+    inicio: Optional[date] = None,
+    fim: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Dias alugados e taxa de ocupação por carro (rollup `daily_car_usage`)"""
+    inicio, fim = _periodo(inicio, fim)
+    return await AsyncReportService(db).utilization(inicio, fim)
+
+
+@backend.get("/fleet")
+async def fleet_report(db: AsyncSession = Depends(get_async_read_db)):
+    """Carros por status e resumo das locações em atraso"""
+    return await AsyncReportService(db).fleet()
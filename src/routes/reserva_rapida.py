@@ -4,11 +4,12 @@ from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, Depends, status, Form, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config.database import get_db
+from src.config.database import get_async_db
+from src.middleware.idempotency import idempotency_key
 from src.models.rental import RentalCreate, RentalOut
-from src.services.rental_service import RentalService
+from src.services.rental_service import AsyncRentalService, RentalConflictError
 
 # Importe os modelos e serviços necessários
 # from .database import get_db
@@ -17,17 +18,19 @@ from src.services.rental_service import RentalService
 
 backend = APIRouter()
 
-@backend.post("/reserva_rapida", response_model=RentalOut, status_code=status.HTTP_201_CREATED)
+@backend.post("/reserva_rapida", response_model=RentalOut, status_code=status.HTTP_201_CREATED,
+              dependencies=[Depends(idempotency_key)])
 async def create_quick_rental_route(
     cliente_id: int = Form(...),
     car_id: str = Form(...),
     start_date: str = Form(...),
     end_date: str = Form(...),
-    total_days: int = Form(...),
-    daily_rate: float = Form(...),
-    total_amount: float = Form(...),
+    # Calculados no servidor; aceitos apenas por compatibilidade com o formulário
+    total_days: Optional[int] = Form(None),
+    daily_rate: Optional[float] = Form(None),
+    total_amount: Optional[float] = Form(None),
     payment_method: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Cria uma nova locação a partir do formulário de reserva rápida.
@@ -35,7 +38,7 @@ async def create_quick_rental_route(
     Define o status inicial como 'PENDENTE'.
     """
     try:
-        service = RentalService(db)
+        service = AsyncRentalService(db)
         rental_data = RentalCreate(
             cliente_id=cliente_id,
             car_id=uuid.UUID(car_id),
@@ -52,9 +55,14 @@ async def create_quick_rental_route(
             payment_method=payment_method,
             cnh_photo_path=None
         )
-        created_rental = service.create_rental(rental_data)
+        created_rental = await service.create_rental(rental_data)
         return created_rental
 
+    except RentalConflictError as ce:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(ce)
+        )
     except ValueError as ve:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
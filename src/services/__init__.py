@@ -1,6 +1,9 @@
-from .car_service import CarService
-from .cliente_service import ClienteService
-from .rental_service import RentalService
-from .login_service import UserService
+from .car_service import CarService, AsyncCarService
+from .cliente_service import ClienteService, AsyncClienteService
+from .rental_service import RentalService, AsyncRentalService
+from .login_service import UserService, AsyncUserService
 
-__all__ = ["CarService", "ClienteService", "RentalService", "UserService"]
\ No newline at end of file
+__all__ = [
+    "CarService", "ClienteService", "RentalService", "UserService",
+    "AsyncCarService", "AsyncClienteService", "AsyncRentalService", "AsyncUserService"
+]
@@ -0,0 +1,220 @@
+import threading
+from bisect import bisect_right
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.config.database import SessionLocal
+from src.models.rental import Rental, RentalStatus
+from src.services.change_feed import ChangeEvent, change_feed
+
+
+def _car_key(car_id) -> str:
+    """Normaliza o id do carro (UUID ou str) para a chave usada no índice."""
+    return str(car_id).replace("-", "").lower()
+
+
+class _CarCalendar:
+    """
+    Reservas de um único carro.
+
+    Guarda as locações individuais (para remoção/atualização), uma lista
+    ordenada de intervalos já mesclados [início, fim] (datas inclusivas),
+    usada nas consultas via busca binária, e um bitmap de ocupação diária
+    (bit i = dia `base + i`) dentro do horizonte do calendário.
+    """
+
+    __slots__ = ("reservas", "inicios", "fins", "bitmap")
+
+    def __init__(self):
+        self.reservas: Dict[int, Tuple[date, date]] = {}
+        self.inicios: List[date] = []
+        self.fins: List[date] = []
+        self.bitmap = 0
+
+    def _reconstruir(self, base: date, horizonte: int):
+        inicios: List[date] = []
+        fins: List[date] = []
+        for inicio, fim in sorted(self.reservas.values()):
+            # Intervalos sobrepostos (dados legados) são mesclados
+            if fins and inicio <= fins[-1]:
+                if fim > fins[-1]:
+                    fins[-1] = fim
+            else:
+                inicios.append(inicio)
+                fins.append(fim)
+        self.inicios = inicios
+        self.fins = fins
+
+        bitmap = 0
+        for inicio, fim in zip(inicios, fins):
+            primeiro = max((inicio - base).days, 0)
+            ultimo = min((fim - base).days, horizonte - 1)
+            if primeiro <= ultimo:
+                bitmap |= ((1 << (ultimo - primeiro + 1)) - 1) << primeiro
+        self.bitmap = bitmap
+
+    def livre(self, inicio: date, fim: date) -> bool:
+        # Último intervalo que começa até o fim do período pedido
+        pos = bisect_right(self.inicios, fim) - 1
+        return pos < 0 or self.fins[pos] < inicio
+
+
+class AvailabilityIndex:
+    """
+    Índice em memória dos períodos reservados por carro.
+
+    Substitui a varredura da tabela `locacoes` na checagem de conflito:
+    cada carro mantém uma lista ordenada de intervalos disjuntos, então
+    "o carro X está livre neste período?" custa O(log n) no número de
+    reservas daquele carro. Apenas locações ATIVAS ocupam o carro.
+
+    Para a busca de frota por período, cada carro também mantém um bitmap
+    de ocupação dos próximos `HORIZONTE_DIAS` dias: um período dentro do
+    horizonte vira uma máscara de bits e a checagem é um AND por carro.
+    """
+
+    HORIZONTE_DIAS = 365
+
+    def __init__(self):
+        self._carros: Dict[str, _CarCalendar] = {}
+        self._lock = threading.RLock()
+        self._base = date.today()
+        self.carregado = False
+
+    def _atualizar_base(self):
+        """Avança o início do horizonte quando o dia vira, recalculando os bitmaps."""
+        hoje = date.today()
+        if hoje != self._base:
+            self._base = hoje
+            for calendario in self._carros.values():
+                calendario._reconstruir(hoje, self.HORIZONTE_DIAS)
+
+    def _mascara(self, start_date: date, end_date: date) -> Optional[int]:
+        """Máscara de bits do período, ou None se ele sai do horizonte."""
+        primeiro = (start_date - self._base).days
+        ultimo = (end_date - self._base).days
+        if primeiro < 0 or ultimo >= self.HORIZONTE_DIAS:
+            return None
+        return ((1 << (ultimo - primeiro + 1)) - 1) << primeiro
+
+    def load(self, db: Session) -> int:
+        """(Re)carrega o índice a partir das locações ativas do banco."""
+        rows = db.query(
+            Rental.id, Rental.car_id, Rental.start_date, Rental.end_date
+        ).filter(Rental.status == RentalStatus.ATIVA).all()
+
+        base = date.today()
+        carros: Dict[str, _CarCalendar] = {}
+        for rental_id, car_id, inicio, fim in rows:
+            calendario = carros.setdefault(_car_key(car_id), _CarCalendar())
+            calendario.reservas[rental_id] = (inicio, fim)
+        for calendario in carros.values():
+            calendario._reconstruir(base, self.HORIZONTE_DIAS)
+
+        with self._lock:
+            self._carros = carros
+            self._base = base
+            self.carregado = True
+        return len(rows)
+
+    def ensure_loaded(self, db: Session):
+        """Carrega o índice na primeira utilização, se ainda não foi carregado."""
+        if not self.carregado:
+            with self._lock:
+                if not self.carregado:
+                    self.load(db)
+
+    def add(self, rental_id: int, car_id, start_date: date, end_date: date):
+        with self._lock:
+            self._atualizar_base()
+            calendario = self._carros.setdefault(_car_key(car_id), _CarCalendar())
+            calendario.reservas[rental_id] = (start_date, end_date)
+            calendario._reconstruir(self._base, self.HORIZONTE_DIAS)
+
+    def remove(self, rental_id: int, car_id) -> bool:
+        with self._lock:
+            self._atualizar_base()
+            calendario = self._carros.get(_car_key(car_id))
+            if calendario is None or calendario.reservas.pop(rental_id, None) is None:
+                return False
+            calendario._reconstruir(self._base, self.HORIZONTE_DIAS)
+            return True
+
+    def sync_rental(self, rental: Rental, previous_car_id=None):
+        """Atualiza o índice de acordo com o estado atual de uma locação."""
+        with self._lock:
+            if previous_car_id is not None:
+                self.remove(rental.id, previous_car_id)
+            if rental.status == RentalStatus.ATIVA:
+                self.add(rental.id, rental.car_id, rental.start_date, rental.end_date)
+            else:
+                self.remove(rental.id, rental.car_id)
+
+    def discard(self, rental_id: int) -> bool:
+        """Remove a locação de qualquer carro (quando o carro anterior não é conhecido)."""
+        with self._lock:
+            for calendario in self._carros.values():
+                if calendario.reservas.pop(rental_id, None) is not None:
+                    self._atualizar_base()
+                    calendario._reconstruir(self._base, self.HORIZONTE_DIAS)
+                    return True
+            return False
+
+    def on_change(self, evento: ChangeEvent):
+        """
+        Locação alterada por outro worker (change feed): relê a locação pelo id.
+
+        Alterações deste processo já foram aplicadas por `sync_rental`; um
+        evento sem chave descarta o índice, recarregado na próxima consulta.
+        """
+        if evento.local or not self.carregado:
+            return
+        if evento.chave is None:
+            with self._lock:
+                self.carregado = False
+            return
+        rental_id = int(evento.chave)
+        db = SessionLocal()
+        try:
+            rental = db.get(Rental, rental_id)
+        finally:
+            db.close()
+        with self._lock:
+            self.discard(rental_id)
+            if rental is not None:
+                self.sync_rental(rental)
+
+    def is_free(self, car_id, start_date: date, end_date: date) -> bool:
+        """Retorna True se o carro não tem locação ativa que se sobreponha ao período."""
+        with self._lock:
+            calendario = self._carros.get(_car_key(car_id))
+            return calendario is None or calendario.livre(start_date, end_date)
+
+    def free_cars(self, car_ids: Iterable, start_date: date, end_date: date) -> List:
+        """
+        Filtra `car_ids`, mantendo apenas os carros livres no período.
+
+        Dentro do horizonte a checagem usa os bitmaps pré-calculados;
+        fora dele, cai na busca binária dos intervalos.
+        """
+        with self._lock:
+            self._atualizar_base()
+            mascara = self._mascara(start_date, end_date)
+            livres = []
+            for car_id in car_ids:
+                calendario = self._carros.get(_car_key(car_id))
+                if calendario is None:
+                    livres.append(car_id)
+                elif mascara is not None:
+                    if not calendario.bitmap & mascara:
+                        livres.append(car_id)
+                elif calendario.livre(start_date, end_date):
+                    livres.append(car_id)
+            return livres
+
+
+# Instância única por processo (cada worker do uvicorn tem a sua)
+availability_index = AvailabilityIndex()
+change_feed.subscribe("locacoes", availability_index.on_change)
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+from typing import Callable, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from src.config.cache import LocalCache, get_cache
+from src.models.car import Car
+from src.services.change_feed import ChangeEvent, change_feed
+
+CAR_CACHE_TTL = int(os.getenv("CAR_CACHE_TTL", "300"))
+
+# Toda alteração em carros incrementa a geração, o que invalida de uma vez
+# todas as listagens (qualquer carro pode entrar/sair de qualquer filtro).
+_GENERATION_KEY = "cars:gen"
+
+# Chamados após cada invalidação com (car_id, nova geração); car_id None = alteração em lote
+_listeners: List[Callable] = []
+
+
+def car_to_dict(car: Car) -> dict:
+    """Converte um Car em dicionário serializável (apenas colunas)."""
+    return jsonable_encoder({
+        attr.key: getattr(car, attr.key) for attr in Car.__mapper__.column_attrs
+    })
+
+
+def _generation(cache) -> int:
+    value = cache.get(_GENERATION_KEY)
+    return int(value) if value else 0
+
+
+def current_generation() -> int:
+    """Geração atual das listagens (muda a cada alteração de carro, em qualquer worker com Redis)."""
+    return _generation(get_cache())
+
+
+def on_car_change(listener: Callable):
+    """Registra uma função notificada a cada `invalidate_car` (ex.: o snapshot da frota)."""
+    _listeners.append(listener)
+    return listener
+
+
+def list_cache_key(params: dict) -> str:
+    """
+    Chave de uma página da listagem na geração atual.
+
+    Deve ser calculada uma vez, antes da consulta, e usada no get e no set:
+    se um carro for alterado no meio, a página fica guardada sob a geração
+    antiga (já descartada) em vez de ser servida como atual.
+    """
+    normalized = json.dumps(params, sort_keys=True, default=str)
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    return f"cars:list:{_generation(get_cache())}:{digest}"
+
+
+def _car_key(kind: str, value) -> str:
+    if kind == "id":
+        value = str(value).replace("-", "").lower()
+    return f"cars:{kind}:{value}"
+
+
+def get_cached_list(key: str) -> Optional[bytes]:
+    """Página da listagem já serializada (JSON), ou None."""
+    return get_cache().get(key)
+
+
+def set_cached_list(key: str, payload: bytes) -> bytes:
+    """Guarda uma página da listagem já serializada (JSON) sob a chave de `list_cache_key`."""
+    get_cache().set(key, payload, ex=CAR_CACHE_TTL)
+    return payload
+
+
+def get_cached_car(kind: str, value) -> Optional[dict]:
+    raw = get_cache().get(_car_key(kind, value))
+    return json.loads(raw) if raw else None
+
+
+def set_cached_car(car: Car) -> dict:
+    """Guarda o carro sob as chaves de id e de placa."""
+    cache = get_cache()
+    payload = car_to_dict(car)
+    serialized = json.dumps(payload)
+    cache.set(_car_key("id", car.id), serialized, ex=CAR_CACHE_TTL)
+    cache.set(_car_key("plate", car.license_plate), serialized, ex=CAR_CACHE_TTL)
+    return payload
+
+
+def invalidate_car(car_id=None, *plates: str):
+    """
+    Invalida as entradas de um carro alterado/criado/removido.
+
+    Remove as chaves do próprio carro (id e placas, inclusive a antiga em
+    caso de troca de placa) e avança a geração das listagens. Chamada após
+    o commit; o evento para os outros workers é publicado na transação
+    (`change_feed.publish("cars", car_id, db)`).
+    """
+    cache = get_cache()
+    keys = [_car_key("plate", plate) for plate in plates if plate]
+    if car_id is not None:
+        keys.append(_car_key("id", car_id))
+    if keys:
+        cache.delete(*keys)
+    geracao = cache.incr(_GENERATION_KEY)
+    for listener in _listeners:
+        listener(car_id, geracao)
+
+
+@change_feed.subscribe("cars")
+def _on_remote_change(evento: ChangeEvent):
+    """
+    Alteração feita por outro worker: com Redis as chaves já foram invalidadas
+    por ele; com o cache LRU local (um por worker) é preciso invalidar aqui.
+    """
+    cache = get_cache()
+    if evento.local or not isinstance(cache, LocalCache):
+        return
+    if evento.chave is not None:
+        cache.delete(_car_key("id", evento.chave))
+    cache.incr(_GENERATION_KEY)
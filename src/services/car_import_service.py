@@ -0,0 +1,192 @@
+import csv
+import io
+import json
+import logging
+import os
+import uuid
+from typing import Dict, List
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.models.car import Car, CarCreate
+from src.services.car_cache import invalidate_car
+from src.services.change_feed import change_feed
+
+logger = logging.getLogger(__name__)
+
+# Linhas por INSERT em lote (executemany / multi-VALUES do driver)
+CAR_IMPORT_BATCH_SIZE = int(os.getenv("CAR_IMPORT_BATCH_SIZE", "500"))
+
+_LIST_FIELDS = ("features", "images")
+
+
+def parse_csv_rows(content: bytes) -> List[dict]:
+    """
+    Converte um CSV (com cabeçalho nos nomes de campo de `CarCreate`) em dicionários.
+
+    Células vazias são omitidas (usam o padrão do modelo). `features` e
+    `images` aceitam um array JSON ou valores separados por ";".
+    """
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    rows = []
+    for raw in reader:
+        row = {}
+        for key, value in raw.items():
+            if key is None or value is None:
+                continue
+            key, value = key.strip(), value.strip()
+            if not value:
+                continue
+            if key in _LIST_FIELDS:
+                value = json.loads(value) if value.startswith("[") else [v.strip() for v in value.split(";") if v.strip()]
+            row[key] = value
+        rows.append(row)
+    return rows
+
+
+class CarImportService:
+    """
+    Importação em lote de carros.
+
+    Valida todas as linhas com `CarCreate`, detecta placas repetidas no
+    próprio arquivo e placas já cadastradas (uma única query) e insere as
+    válidas em lotes de `CAR_IMPORT_BATCH_SIZE` com `insert(Car)` +
+    executemany, um commit por lote. Retorna um relatório por linha.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def import_rows(self, rows: List[dict]) -> dict:
+        resultados: List[Dict] = []
+        validos: List[dict] = []
+        linhas_por_placa: Dict[str, int] = {}
+
+        for linha, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                resultados.append({"linha": linha, "status": "erro", "erros": ["Linha deve ser um objeto"]})
+                continue
+            try:
+                data = CarCreate(**row)
+            except ValidationError as e:
+                resultados.append({
+                    "linha": linha,
+                    "license_plate": row.get("license_plate"),
+                    "status": "erro",
+                    "erros": [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()]
+                })
+                continue
+
+            plate = data.license_plate.strip()
+            if plate in linhas_por_placa:
+                resultados.append({
+                    "linha": linha,
+                    "license_plate": plate,
+                    "status": "erro",
+                    "erros": [f"Placa repetida no arquivo (linha {linhas_por_placa[plate]})"]
+                })
+                continue
+            linhas_por_placa[plate] = linha
+
+            values = data.dict()
+            values["license_plate"] = plate
+            values["id"] = uuid.uuid4()
+            validos.append({"linha": linha, "values": values})
+
+        # Placas já cadastradas: uma única consulta para o arquivo inteiro
+        if linhas_por_placa:
+            existentes = set(self.db.scalars(
+                select(Car.license_plate).where(Car.license_plate.in_(list(linhas_por_placa)))
+            ))
+            if existentes:
+                pendentes = []
+                for item in validos:
+                    plate = item["values"]["license_plate"]
+                    if plate in existentes:
+                        resultados.append({
+                            "linha": item["linha"],
+                            "license_plate": plate,
+                            "status": "erro",
+                            "erros": ["Placa já cadastrada"]
+                        })
+                    else:
+                        pendentes.append(item)
+                validos = pendentes
+
+        inseridos = 0
+        for inicio in range(0, len(validos), CAR_IMPORT_BATCH_SIZE):
+            lote = validos[inicio:inicio + CAR_IMPORT_BATCH_SIZE]
+            inseridos += self._insert_batch(lote, resultados)
+
+        if inseridos:
+            # Carros novos só afetam as listagens: basta avançar a geração
+            invalidate_car()
+
+        resultados.sort(key=lambda r: r["linha"])
+        return {
+            "success": True,
+            "total": len(rows),
+            "inseridos": inseridos,
+            "erros": len(rows) - inseridos,
+            "resultados": resultados
+        }
+
+    def _insert_batch(self, lote: List[dict], resultados: List[Dict]) -> int:
+        try:
+            self.db.execute(insert(Car), [item["values"] for item in lote])
+            change_feed.publish("cars", db=self.db)
+            self.db.commit()
+        except IntegrityError:
+            # Conflito concorrente (ex.: placa cadastrada entre a checagem e o insert):
+            # refaz o lote linha a linha para identificar as que falharam
+            self.db.rollback()
+            return self._insert_one_by_one(lote, resultados)
+
+        for item in lote:
+            resultados.append(self._sucesso(item))
+        return len(lote)
+
+    def _insert_one_by_one(self, lote: List[dict], resultados: List[Dict]) -> int:
+        inseridos = 0
+        for item in lote:
+            try:
+                with self.db.begin_nested():
+                    self.db.execute(insert(Car), [item["values"]])
+            except IntegrityError as e:
+                logger.info(f"Importação: linha {item['linha']} rejeitada: {e.orig}")
+                resultados.append({
+                    "linha": item["linha"],
+                    "license_plate": item["values"]["license_plate"],
+                    "status": "erro",
+                    "erros": ["Placa já cadastrada"]
+                })
+                continue
+            resultados.append(self._sucesso(item))
+            inseridos += 1
+        if inseridos:
+            change_feed.publish("cars", db=self.db)
+        self.db.commit()
+        return inseridos
+
+    @staticmethod
+    def _sucesso(item: dict) -> dict:
+        return {
+            "linha": item["linha"],
+            "license_plate": item["values"]["license_plate"],
+            "status": "criado",
+            "id": str(item["values"]["id"])
+        }
+
+
+class AsyncCarImportService:
+    """Variante assíncrona do CarImportService (executa via `AsyncSession.run_sync`)."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def import_rows(self, rows: List[dict]) -> dict:
+        return await self.db.run_sync(lambda s: CarImportService(s).import_rows(rows))
@@ -1,6 +1,9 @@
 from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from src.models.car import Car, CarCreate, CarStatus
+from src.services.car_cache import invalidate_car
+from src.services.change_feed import change_feed
 from datetime import datetime
 
 class CarService:
@@ -15,8 +18,11 @@ class CarService:
         
         db_car = Car(**car_dict)
         self.db.add(db_car)
+        self.db.flush()
+        change_feed.publish("cars", db_car.id, self.db)
         self.db.commit()
         self.db.refresh(db_car)
+        invalidate_car(db_car.id, db_car.license_plate)
         return db_car
     
     def get_cars(self, skip: int = 0, limit: int = 100, status_filter: Optional[CarStatus] = None) -> List[Car]:
@@ -42,6 +48,8 @@ class CarService:
         if not db_car:
             return None
         
+        previous_plate = db_car.license_plate
+        
         # Mapear 'km' para 'mileage'
         car_dict = car_data.dict()
         car_dict['mileage'] = car_dict.pop('km')
@@ -50,8 +58,10 @@ class CarService:
             setattr(db_car, key, value)
         
         db_car.updated_at = datetime.now().isoformat()
+        change_feed.publish("cars", db_car.id, self.db)
         self.db.commit()
         self.db.refresh(db_car)
+        invalidate_car(db_car.id, previous_plate, db_car.license_plate)
         return db_car
     
     def delete_car(self, car_id: str) -> bool:
@@ -60,8 +70,11 @@ class CarService:
         if not db_car:
             return False
         
+        car_id, plate = db_car.id, db_car.license_plate
         self.db.delete(db_car)
+        change_feed.publish("cars", car_id, self.db)
         self.db.commit()
+        invalidate_car(car_id, plate)
         return True
     
     def get_available_cars(self) -> List[Car]:
@@ -76,6 +89,38 @@ class CarService:
         
         db_car.status = status
         db_car.updated_at = datetime.now().isoformat()
+        change_feed.publish("cars", db_car.id, self.db)
         self.db.commit()
         self.db.refresh(db_car)
-        return db_car
\ No newline at end of file
+        invalidate_car(db_car.id, db_car.license_plate)
+        return db_car
+
+class AsyncCarService:
+    """Variante assíncrona do CarService (mesma lógica via `run_sync`)."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_car(self, car_data: CarCreate) -> Car:
+        return await self.db.run_sync(lambda s: CarService(s).create_car(car_data))
+
+    async def get_cars(self, skip: int = 0, limit: int = 100, status_filter: Optional[CarStatus] = None) -> List[Car]:
+        return await self.db.run_sync(lambda s: CarService(s).get_cars(skip, limit, status_filter))
+
+    async def get_car_by_id(self, car_id: str) -> Optional[Car]:
+        return await self.db.run_sync(lambda s: CarService(s).get_car_by_id(car_id))
+
+    async def get_car_by_license_plate(self, license_plate: str) -> Optional[Car]:
+        return await self.db.run_sync(lambda s: CarService(s).get_car_by_license_plate(license_plate))
+
+    async def update_car(self, car_id: str, car_data: CarCreate) -> Optional[Car]:
+        return await self.db.run_sync(lambda s: CarService(s).update_car(car_id, car_data))
+
+    async def delete_car(self, car_id: str) -> bool:
+        return await self.db.run_sync(lambda s: CarService(s).delete_car(car_id))
+
+    async def get_available_cars(self) -> List[Car]:
+        return await self.db.run_sync(lambda s: CarService(s).get_available_cars())
+
+    async def update_car_status(self, car_id: str, status: CarStatus) -> Optional[Car]:
+        return await self.db.run_sync(lambda s: CarService(s).update_car_status(car_id, status))
@@ -0,0 +1,304 @@
+import json
+import logging
+import os
+import socket
+import threading
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from src.config.cache import REDIS_URL, fora_do_loop, get_cache
+
+logger = logging.getLogger(__name__)
+
+# CHANGE_FEED_BACKEND: "auto" (PostgreSQL -> LISTEN/NOTIFY, senão Redis se o
+# cache usa Redis, senão em processo), "postgres", "redis" ou "local"
+# CHANGE_FEED_CHANNEL: canal do NOTIFY / pub-sub
+# CHANGE_FEED_RETRY: segundos entre tentativas de reconexão do listener
+CHANGE_FEED_BACKEND = os.getenv("CHANGE_FEED_BACKEND", "auto").lower()
+CHANGE_FEED_CHANNEL = os.getenv("CHANGE_FEED_CHANNEL", "muviscar_changes")
+CHANGE_FEED_RETRY = float(os.getenv("CHANGE_FEED_RETRY", "5"))
+
+# Chave em `Session.info` dos eventos que aguardam o commit da sessão
+_PENDENTES = "change_feed_pendentes"
+
+
+def origem_local() -> str:
+    """Identifica este processo nos eventos (calculado a cada chamada: sobrevive a fork)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """
+    Alteração confirmada em uma tabela.
+
+    `chave` é o id da linha (texto); None indica alteração em lote ou
+    eventos possivelmente perdidos (reconexão do listener): quem recebe
+    deve recarregar tudo. `origem` é o processo que fez a alteração.
+    """
+    tabela: str
+    chave: Optional[str] = None
+    origem: Optional[str] = None
+
+    @property
+    def local(self) -> bool:
+        """True se a alteração foi feita por este processo (já aplicada pelos hooks diretos)."""
+        return self.origem == origem_local()
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, payload) -> "ChangeEvent":
+        dados = json.loads(payload)
+        return cls(dados["tabela"], dados.get("chave"), dados.get("origem"))
+
+
+class LocalTransport:
+    """Em processo (SQLite/dev, um único worker): entrega o evento na hora, sem listener."""
+
+    distribuido = False
+    transacional = False
+
+    def __init__(self, feed: "ChangeFeed"):
+        self.feed = feed
+
+    def publicar(self, evento: ChangeEvent):
+        self.feed.dispatch(evento)
+
+
+class RedisTransport:
+    """Pub/sub do Redis: cada worker assina o canal numa conexão própria."""
+
+    distribuido = True
+    transacional = False
+
+    def __init__(self, feed: "ChangeFeed", client=None):
+        self.feed = feed
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=1)
+        self.client = client
+
+    def publicar(self, evento: ChangeEvent):
+        fora_do_loop(self.client.publish, CHANGE_FEED_CHANNEL, evento.to_json())
+
+    def escutar(self, conectado: Callable[[], None], parar: threading.Event):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(CHANGE_FEED_CHANNEL)
+            conectado()
+            while not parar.is_set():
+                mensagem = pubsub.get_message(timeout=1.0)
+                if mensagem and mensagem["type"] == "message":
+                    self.feed.receive(mensagem["data"])
+        finally:
+            pubsub.close()
+
+
+class PostgresTransport:
+    """
+    LISTEN/NOTIFY do PostgreSQL.
+
+    O listener mantém uma conexão dedicada (fora do pool) em autocommit com
+    LISTEN no canal. A publicação é um `pg_notify` na própria conexão da
+    sessão, antes do commit: o PostgreSQL só entrega a notificação quando a
+    transação é confirmada (e a descarta no rollback), sem conexão extra.
+    """
+
+    distribuido = True
+    transacional = True
+
+    def __init__(self, feed: "ChangeFeed", engine):
+        self.feed = feed
+        self.engine = engine
+
+    def publicar(self, evento: ChangeEvent, db: Session):
+        db.execute(
+            text("SELECT pg_notify(:canal, :payload)"),
+            {"canal": CHANGE_FEED_CHANNEL, "payload": evento.to_json()},
+        )
+
+    def escutar(self, conectado: Callable[[], None], parar: threading.Event):
+        import select
+
+        bruta = self.engine.raw_connection()
+        bruta.detach()
+        conexao = bruta.driver_connection
+        try:
+            conexao.autocommit = True
+            with conexao.cursor() as cursor:
+                cursor.execute(f'LISTEN "{CHANGE_FEED_CHANNEL}"')
+            conectado()
+            while not parar.is_set():
+                if select.select([conexao], [], [], 1.0) == ([], [], []):
+                    continue
+                conexao.poll()
+                while conexao.notifies:
+                    self.feed.receive(conexao.notifies.pop(0).payload)
+        finally:
+            bruta.close()
+
+
+class ChangeFeed:
+    """
+    Eventos de alteração entre workers, para manter coerentes os caches locais.
+
+    Os serviços publicam na transação da alteração, antes do commit
+    (`publish("cars", car_id, db)`), e cada cache local se registra com
+    `subscribe(tabela, handler)`. Com backend
+    distribuído, um listener em thread recebe os eventos de todos os
+    workers (inclusive os próprios: `evento.local`) e chama os handlers;
+    a cada (re)conexão os handlers recebem um evento sem chave, já que
+    alterações podem ter sido perdidas. Os handlers devem ser idempotentes
+    e rápidos.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Callable[[ChangeEvent], None]]] = defaultdict(list)
+        self._transporte = LocalTransport(self)
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.publicados = 0
+        self.recebidos = 0
+        self.falhas = 0
+        self.conectado = False
+
+    @property
+    def distribuido(self) -> bool:
+        """True quando os eventos de outros workers chegam por este feed."""
+        return self._transporte.distribuido and self._thread is not None
+
+    def subscribe(self, tabela: str, handler: Optional[Callable[[ChangeEvent], None]] = None):
+        """Registra um handler para `tabela` ("cars", "clientes", "locacoes"); também serve de decorator."""
+        if handler is None:
+            return lambda func: self.subscribe(tabela, func)
+        self._handlers[tabela].append(handler)
+        return handler
+
+    def publish(self, tabela: str, chave=None, db: Optional[Session] = None):
+        """
+        Publica a alteração de uma linha (chave None = lote). Falhas só são registradas.
+
+        Com `db` (chamado antes do commit) o evento segue a transação: no
+        PostgreSQL o `pg_notify` roda na conexão da sessão; nos outros
+        backends o evento fica na sessão e é publicado após o commit. Nos
+        dois casos um rollback o descarta.
+        """
+        evento = ChangeEvent(tabela, None if chave is None else str(chave), origem_local())
+        if db is not None and not self._transporte.transacional:
+            db.info.setdefault(_PENDENTES, []).append(evento)
+            return
+        self._publicar(evento, db)
+
+    def _publicar(self, evento: ChangeEvent, db: Optional[Session] = None):
+        try:
+            if self._transporte.transacional:
+                if db is None:
+                    raise RuntimeError("publicação sem a sessão da alteração")
+                self._transporte.publicar(evento, db)
+            else:
+                self._transporte.publicar(evento)
+            self.publicados += 1
+        except Exception as e:
+            self.falhas += 1
+            logger.warning(f"Falha ao publicar evento de alteração ({evento.tabela}): {e}")
+
+    def receive(self, payload):
+        try:
+            evento = ChangeEvent.from_json(payload)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Evento de alteração inválido ignorado: {e}")
+            return
+        self.recebidos += 1
+        self.dispatch(evento)
+
+    def dispatch(self, evento: ChangeEvent):
+        for handler in self._handlers.get(evento.tabela, ()):
+            try:
+                handler(evento)
+            except Exception:
+                logger.exception(f"Handler de alteração falhou para {evento}")
+
+    def _ao_conectar(self):
+        # Eventos podem ter sido perdidos enquanto estava desconectado
+        self.conectado = True
+        for tabela in list(self._handlers):
+            self.dispatch(ChangeEvent(tabela))
+
+    def _escolher_transporte(self, engine):
+        backend = CHANGE_FEED_BACKEND
+        if backend == "auto":
+            if engine.dialect.name == "postgresql":
+                backend = "postgres"
+            elif getattr(get_cache(), "client", None) is not None:
+                backend = "redis"
+            else:
+                backend = "local"
+        if backend == "postgres":
+            return PostgresTransport(self, engine)
+        if backend == "redis":
+            return RedisTransport(self, getattr(get_cache(), "client", None))
+        return LocalTransport(self)
+
+    def start(self, engine, transporte=None):
+        """Escolhe o backend e, se distribuído, inicia o listener em thread."""
+        if self._thread is not None:
+            return
+        self._transporte = transporte or self._escolher_transporte(engine)
+        if not self._transporte.distribuido:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="change-feed", daemon=True)
+        self._thread.start()
+        logger.info(f"Change feed iniciado ({type(self._transporte).__name__})")
+
+    def _executar(self):
+        while not self._parar.is_set():
+            try:
+                self._transporte.escutar(self._ao_conectar, self._parar)
+            except Exception as e:
+                logger.warning(f"Listener do change feed desconectado: {e}")
+            self.conectado = False
+            self._parar.wait(CHANGE_FEED_RETRY)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._parar.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self._transporte = LocalTransport(self)
+
+    def gauges(self) -> list:
+        return [
+            ("change_feed_connected", "1 se o listener do change feed está conectado", int(self.conectado)),
+            ("change_feed_published_total", "Eventos de alteração publicados", self.publicados),
+            ("change_feed_received_total", "Eventos de alteração recebidos pelo listener", self.recebidos),
+            ("change_feed_publish_failures_total", "Falhas ao publicar eventos de alteração", self.falhas),
+        ]
+
+
+# Instância única por processo (cada worker do uvicorn tem a sua)
+change_feed = ChangeFeed()
+
+
+@event.listens_for(Session, "after_commit")
+def _publicar_pendentes(sessao: Session):
+    # Também disparado ao liberar um savepoint: só o commit da transação externa publica
+    if sessao.in_nested_transaction():
+        return
+    for evento in sessao.info.pop(_PENDENTES, ()):
+        change_feed._publicar(evento)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _descartar_pendentes(sessao: Session, transacao):
+    # Fim da transação externa sem commit (rollback ou close): os eventos não aconteceram
+    if transacao.parent is None:
+        sessao.info.pop(_PENDENTES, None)
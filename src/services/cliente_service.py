@@ -1,11 +1,65 @@
+import logging
+import re
 from typing import List, Optional
+from sqlalchemy import func, or_, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from src.models.clientes import Cliente, ClienteCreate, ClienteUpdate
 from passlib.context import CryptContext # Importar o contexto de hashing
+from src.config.password_hasher import password_hasher
+from src.services.change_feed import change_feed
+from src.services.serializers import CLIENTE_LIST
 
 # Configuração do contexto de hashing de senha
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+logger = logging.getLogger(__name__)
+
+# Tabela FTS5 "sombra" de `clientes` usada pela busca no SQLite (dev/filiais).
+# No PostgreSQL a busca usa os índices pg_trgm criados pela migração 5d2a9c4e7f10.
+SQLITE_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS clientes_fts USING fts5(
+        nome, email, cpf_cnpj, telefone,
+        content='clientes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS clientes_fts_ai AFTER INSERT ON clientes BEGIN
+        INSERT INTO clientes_fts(rowid, nome, email, cpf_cnpj, telefone)
+        VALUES (new.id, new.nome, new.email, new.cpf_cnpj, new.telefone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS clientes_fts_ad AFTER DELETE ON clientes BEGIN
+        INSERT INTO clientes_fts(clientes_fts, rowid, nome, email, cpf_cnpj, telefone)
+        VALUES ('delete', old.id, old.nome, old.email, old.cpf_cnpj, old.telefone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS clientes_fts_au AFTER UPDATE ON clientes BEGIN
+        INSERT INTO clientes_fts(clientes_fts, rowid, nome, email, cpf_cnpj, telefone)
+        VALUES ('delete', old.id, old.nome, old.email, old.cpf_cnpj, old.telefone);
+        INSERT INTO clientes_fts(rowid, nome, email, cpf_cnpj, telefone)
+        VALUES (new.id, new.nome, new.email, new.cpf_cnpj, new.telefone);
+    END""",
+]
+
+
+def ensure_sqlite_search_index(engine) -> bool:
+    """Cria (se preciso) e popula a tabela FTS5 de clientes. Não faz nada fora do SQLite."""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        existia = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'clientes_fts'")
+        ).first() is not None
+        for ddl in SQLITE_SEARCH_DDL:
+            conn.execute(text(ddl))
+        if not existia:
+            conn.execute(text("INSERT INTO clientes_fts(clientes_fts) VALUES ('rebuild')"))
+    return True
+
+
+def _escape_like(termo: str) -> str:
+    return termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 class ClienteService:
     def __init__(self, db: Session):
         self.db = db
@@ -30,10 +84,10 @@ class ClienteService:
             return None
         return cliente
 
-    def create_cliente(self, cliente_data: ClienteCreate) -> Cliente:
+    def create_cliente(self, cliente_data: ClienteCreate, password_hash: Optional[str] = None) -> Cliente:
         """Criar um novo cliente, fazendo o hash da senha antes de salvar."""
-        # Faz o hash da senha antes de criar o objeto Cliente
-        hashed_password = cliente_data.hash_password()
+        # Faz o hash da senha antes de criar o objeto Cliente (se ainda não veio pronto do pool)
+        hashed_password = password_hash or cliente_data.hash_password()
         
         # Cria um dicionário com os dados do cliente, excluindo a senha em texto claro
         cliente_dict = cliente_data.dict(exclude={'senha'})
@@ -41,19 +95,39 @@ class ClienteService:
         
         db_cliente = Cliente(**cliente_dict)
         self.db.add(db_cliente)
+        self.db.flush()
+        change_feed.publish("clientes", db_cliente.id, self.db)
         self.db.commit()
         self.db.refresh(db_cliente)
         return db_cliente
     
-    def get_clientes(self, skip: int = 0, limit: int = 100, ativo: Optional[bool] = None) -> List[Cliente]:
-        """Listar clientes"""
-        query = self.db.query(Cliente)
+    def get_clientes(self, skip: int = 0, limit: int = 100, ativo: Optional[bool] = None,
+                     after_id: Optional[int] = None) -> List[Cliente]:
+        """Listar clientes (ordenados por id; `after_id` ativa a paginação por chave)"""
+        # Só as colunas de ClienteList (sem password_hash, endereço etc.)
+        query = self.db.query(Cliente).options(CLIENTE_LIST.load_only())
         
         if ativo is not None:
             query = query.filter(Cliente.ativo == ativo)
         
+        query = query.order_by(Cliente.id)
+        if after_id is not None:
+            return query.filter(Cliente.id > after_id).limit(limit).all()
         return query.offset(skip).limit(limit).all()
     
+    def get_cliente_rows(self, skip: int = 0, limit: int = 100, ativo: Optional[bool] = None,
+                         after_id: Optional[int] = None) -> list:
+        """Mesma listagem de `get_clientes`, em linhas do Core com as colunas de ClienteList"""
+        stmt = CLIENTE_LIST.select()
+        if ativo is not None:
+            stmt = stmt.where(Cliente.ativo == ativo)
+        stmt = stmt.order_by(Cliente.id)
+        if after_id is not None:
+            stmt = stmt.where(Cliente.id > after_id)
+        else:
+            stmt = stmt.offset(skip)
+        return self.db.execute(stmt.limit(limit)).all()
+    
     def get_cliente_by_id(self, cliente_id: int) -> Optional[Cliente]:
         """Buscar cliente por ID"""
         return self.db.query(Cliente).filter(Cliente.id == cliente_id).first()
@@ -78,6 +152,7 @@ class ClienteService:
         for key, value in cliente_data.dict(exclude_unset=True).items():
             setattr(db_cliente, key, value)
         
+        change_feed.publish("clientes", cliente_id, self.db)
         self.db.commit()
         self.db.refresh(db_cliente)
         return db_cliente
@@ -90,6 +165,7 @@ class ClienteService:
         
         # **MUDANÇA AQUI:** Deleta o objeto do banco de dados
         self.db.delete(db_cliente) 
+        change_feed.publish("clientes", cliente_id, self.db)
         self.db.commit()
         return True
     
@@ -99,9 +175,111 @@ class ClienteService:
             joinedload(Cliente.locacoes)
         ).filter(Cliente.id == cliente_id).first()
     
-    def search_clientes(self, search_term: str) -> List[Cliente]:
-        """Buscar clientes por nome ou email"""
-        return self.db.query(Cliente).filter(
-            (Cliente.nome.ilike(f"%{search_term}%")) |
-            (Cliente.email.ilike(f"%{search_term}%"))
-        ).all()
+    def search_clientes(self, search_term: str, limit: int = 20) -> List[Cliente]:
+        """
+        Buscar clientes por prefixo de nome, email, CPF/CNPJ ou telefone.
+
+        Retorna no máximo `limit` resultados, ordenados por relevância:
+        FTS5 (bm25) no SQLite e similaridade trigram no PostgreSQL.
+        """
+        termo = search_term.strip()
+        if not termo:
+            return []
+
+        dialeto = self.db.get_bind().dialect.name
+        if dialeto == "sqlite":
+            try:
+                return self._search_sqlite_fts(termo, limit)
+            except OperationalError as e:
+                # Tabela FTS ainda não criada: cai na busca por prefixo
+                logger.warning(f"Busca FTS5 indisponível, usando LIKE: {e}")
+                self.db.rollback()
+
+        termo_like = _escape_like(termo)
+        digitos = ''.join(filter(str.isdigit, termo))
+        condicoes = [
+            Cliente.nome.ilike(f"{termo_like}%", escape="\\"),
+            Cliente.nome.ilike(f"% {termo_like}%", escape="\\"),
+            Cliente.email.ilike(f"{termo_like}%", escape="\\"),
+        ]
+        if digitos:
+            condicoes += [
+                Cliente.cpf_cnpj.like(f"{digitos}%"),
+                Cliente.telefone.like(f"{digitos}%"),
+            ]
+        query = self.db.query(Cliente).options(CLIENTE_LIST.load_only()).filter(or_(*condicoes))
+
+        if dialeto == "postgresql":
+            relevancia = func.greatest(
+                func.similarity(Cliente.nome, termo),
+                func.similarity(Cliente.email, termo),
+            )
+            query = query.order_by(relevancia.desc(), Cliente.id)
+        else:
+            query = query.order_by(Cliente.nome, Cliente.id)
+
+        return query.limit(limit).all()
+
+    def _search_sqlite_fts(self, termo: str, limit: int) -> List[Cliente]:
+        # Cada palavra do termo vira um prefixo ("ana silva" -> "ana"* "silva"*)
+        tokens = re.findall(r"\w+", termo)
+        if not tokens:
+            return []
+        consulta = " ".join(f'"{token}"*' for token in tokens)
+        colunas = ", ".join(f"clientes.{nome}" for nome in CLIENTE_LIST.fields)
+        stmt = text(
+            f"SELECT {colunas} FROM clientes_fts "
+            "JOIN clientes ON clientes.id = clientes_fts.rowid "
+            "WHERE clientes_fts MATCH :consulta "
+            "ORDER BY bm25(clientes_fts) LIMIT :limite"
+        )
+        return self.db.query(Cliente).from_statement(stmt).params(consulta=consulta, limite=limit).all()
+
+
+class AsyncClienteService:
+    """Variante assíncrona do ClienteService (mesma lógica via `run_sync`)."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def autenticar_cliente(self, cpf_cnpj: str, senha: str) -> Cliente | None:
+        """Autentica o cliente; a verificação bcrypt roda no pool de hashing."""
+        cliente = await self.get_cliente_by_cpf_cnpj(cpf_cnpj)
+        if not cliente:
+            return None
+        if not await password_hasher.verify(senha, cliente.password_hash):
+            return None
+        return cliente
+
+    async def create_cliente(self, cliente_data: ClienteCreate) -> Cliente:
+        hashed_password = await cliente_data.hash_password_async()
+        return await self.db.run_sync(lambda s: ClienteService(s).create_cliente(cliente_data, hashed_password))
+
+    async def get_clientes(self, skip: int = 0, limit: int = 100, ativo: Optional[bool] = None,
+                           after_id: Optional[int] = None) -> List[Cliente]:
+        return await self.db.run_sync(lambda s: ClienteService(s).get_clientes(skip, limit, ativo, after_id))
+
+    async def get_cliente_rows(self, skip: int = 0, limit: int = 100, ativo: Optional[bool] = None,
+                               after_id: Optional[int] = None) -> list:
+        return await self.db.run_sync(lambda s: ClienteService(s).get_cliente_rows(skip, limit, ativo, after_id))
+
+    async def get_cliente_by_id(self, cliente_id: int) -> Optional[Cliente]:
+        return await self.db.run_sync(lambda s: ClienteService(s).get_cliente_by_id(cliente_id))
+
+    async def get_cliente_by_cpf_cnpj(self, cpf_cnpj: str) -> Optional[Cliente]:
+        return await self.db.run_sync(lambda s: ClienteService(s).get_cliente_by_cpf_cnpj(cpf_cnpj))
+
+    async def get_cliente_by_email(self, email: str) -> Optional[Cliente]:
+        return await self.db.run_sync(lambda s: ClienteService(s).get_cliente_by_email(email))
+
+    async def update_cliente(self, cliente_id: int, cliente_data: ClienteUpdate) -> Optional[Cliente]:
+        return await self.db.run_sync(lambda s: ClienteService(s).update_cliente(cliente_id, cliente_data))
+
+    async def delete_cliente(self, cliente_id: int) -> bool:
+        return await self.db.run_sync(lambda s: ClienteService(s).delete_cliente(cliente_id))
+
+    async def get_cliente_with_locacoes(self, cliente_id: int) -> Optional[Cliente]:
+        return await self.db.run_sync(lambda s: ClienteService(s).get_cliente_with_locacoes(cliente_id))
+
+    async def search_clientes(self, search_term: str, limit: int = 20) -> List[Cliente]:
+        return await self.db.run_sync(lambda s: ClienteService(s).search_clientes(search_term, limit))
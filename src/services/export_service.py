@@ -0,0 +1,86 @@
+import csv
+import enum
+import io
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator, List, Optional
+
+from sqlalchemy import Column, select
+
+from src.config.database import get_read_engine
+from src.models.car import Car
+from src.models.clientes import Cliente
+from src.models.rental import Rental
+
+# Linhas buscadas por vez no cursor do servidor (e por bloco escrito na resposta)
+EXPORT_CHUNK_ROWS = 2000
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+RENTAL_EXPORT_COLUMNS: List[Column] = list(Rental.__table__.columns)
+CAR_EXPORT_COLUMNS: List[Column] = list(Car.__table__.columns)
+# Nunca exportar o hash da senha
+CLIENTE_EXPORT_COLUMNS: List[Column] = [
+    c for c in Cliente.__table__.columns if c.name != "password_hash"
+]
+
+
+def _normalize(value):
+    """Converte os tipos vindos do banco para valores serializáveis."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def _csv_value(value):
+    value = _normalize(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def stream_export(columns: List[Column], formato: str = "csv", where: Optional[list] = None) -> Iterator[bytes]:
+    """
+    Gera a exportação de uma tabela em blocos de bytes (CSV ou NDJSON).
+
+    Seleciona apenas colunas (sem hidratar objetos ORM) e usa cursor do
+    servidor (`stream_results`/`yield_per`), então a memória usada é
+    constante, independente do número de linhas. A conexão é aberta aqui
+    dentro porque o gerador é consumido depois que a dependência `get_db`
+    já foi encerrada.
+    """
+    nomes = [c.name for c in columns]
+    chave = list(columns[0].table.primary_key.columns)[0]
+    stmt = select(*columns).order_by(chave)
+    for condicao in where or []:
+        stmt = stmt.where(condicao)
+
+    with get_read_engine().connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_CHUNK_ROWS).execute(stmt)
+
+        if formato == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(nomes)
+            for linhas in result.partitions():
+                writer.writerows([_csv_value(v) for v in linha] for linha in linhas)
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode("utf-8")
+        else:
+            for linhas in result.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(nomes, map(_normalize, linha))), ensure_ascii=False) + "\n"
+                    for linha in linhas
+                ).encode("utf-8")
@@ -0,0 +1,364 @@
+import bisect
+import logging
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.models.car import Car, CarCategory, CarStatus, FuelType, TransmissionType
+from src.services.car_cache import current_generation, on_car_change
+from src.services.change_feed import ChangeEvent, change_feed
+
+logger = logging.getLogger(__name__)
+
+# Ordem fixa dos membros de cada Enum: o código uint8 é a posição na tupla
+CATEGORIAS = tuple(CarCategory)
+STATUS = tuple(CarStatus)
+COMBUSTIVEIS = tuple(FuelType)
+TRANSMISSOES = tuple(TransmissionType)
+
+_CODIGOS = {
+    enum: {membro: codigo for codigo, membro in enumerate(membros)}
+    for enum, membros in (
+        (CarCategory, CATEGORIAS), (CarStatus, STATUS), (FuelType, COMBUSTIVEIS), (TransmissionType, TRANSMISSOES)
+    )
+}
+
+# Colunas numéricas e de enum: (atributo, dtype)
+_NUMERICAS = (
+    ("year", np.int16),
+    ("mileage", np.int32),
+    ("daily_rate", np.float64),
+    ("passengers", np.uint8),
+    ("category", np.uint8),
+    ("status", np.uint8),
+    ("fuel_type", np.uint8),
+    ("transmission_type", np.uint8),
+)
+# Colunas de texto/JSON, guardadas em listas Python (listas só de textos viram tuplas;
+# outros valores JSON ficam como vieram do banco)
+_TEXTOS = ("brand", "model", "color", "license_plate", "features", "images", "created_at", "updated_at")
+# Colunas de texto com poucos valores distintos: cada valor fica uma única vez na memória
+_COMPARTILHADOS = ("brand", "model", "color", "created_at", "updated_at")
+
+
+def _json(valor):
+    """Valor de uma coluna JSON como guardado no snapshot, de volta ao formato da API."""
+    return list(valor) if isinstance(valor, tuple) else valor
+
+
+def _id_key(car_id) -> bytes:
+    """Normaliza o id do carro (UUID ou str) para os 16 bytes usados no snapshot."""
+    return car_id.bytes if isinstance(car_id, uuid.UUID) else uuid.UUID(str(car_id)).bytes
+
+
+class FleetSnapshot:
+    """
+    Cópia colunar da frota em memória, por processo.
+
+    Cada carro ocupa uma posição: ano, quilometragem, diária e passageiros
+    ficam em arrays NumPy; categoria, status, combustível e câmbio em
+    arrays uint8 com o código do Enum; os textos em listas, com valores
+    repetidos (marca, modelo, cor, datas) compartilhados. Um dicionário
+    placa -> posição responde as buscas por placa e os filtros do catálogo
+    viram máscaras booleanas sobre os arrays, sem SQL. A ordem do catálogo
+    (created_at, id) é calculada uma vez e refeita só após alterações.
+
+    O snapshot é mantido pelas notificações de `invalidate_car` e pelos
+    eventos do change feed: o carro alterado fica pendente e é relido (um
+    SELECT por id) na próxima consulta. Em alterações em lote, ou, sem
+    change feed distribuído, quando a geração das listagens no cache mudou
+    por fora (outro worker, com Redis), a frota é relida inteira.
+    Posições de carros removidos são reaproveitadas. Um carro que não cabe
+    no snapshot (valor inválido no banco) fica de fora e é registrado no log.
+    """
+
+    CAPACIDADE_INICIAL = 1024
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.carregado = False
+        self.geracao: Optional[int] = None
+        self._pendentes: set = set()
+        self._recarregar = False
+        self._alocar(0)
+
+    def _alocar(self, capacidade: int):
+        self.tamanho = 0
+        self.ativo = np.zeros(capacidade, dtype=bool)
+        for nome, dtype in _NUMERICAS:
+            setattr(self, nome, np.zeros(capacidade, dtype=dtype))
+        self.ids = np.zeros(capacidade, dtype="V16")
+        for nome in _TEXTOS:
+            setattr(self, nome, [None] * capacidade)
+        self.por_placa: Dict[str, int] = {}
+        self.por_id: Dict[bytes, int] = {}
+        self._livres: List[int] = []
+        self._valores: dict = {}
+        self._ordem: Optional[np.ndarray] = None
+        self._chaves: List[tuple] = []
+
+    def _crescer(self):
+        capacidade = max(len(self.ativo) * 2, self.CAPACIDADE_INICIAL)
+        extra = capacidade - len(self.ativo)
+        self.ativo = np.concatenate([self.ativo, np.zeros(extra, dtype=bool)])
+        for nome, dtype in _NUMERICAS:
+            setattr(self, nome, np.concatenate([getattr(self, nome), np.zeros(extra, dtype=dtype)]))
+        self.ids = np.concatenate([self.ids, np.zeros(extra, dtype="V16")])
+        for nome in _TEXTOS:
+            getattr(self, nome).extend([None] * extra)
+
+    # --- Escrita ---
+
+    def _converter(self, linha) -> dict:
+        """Valores da linha já nos tipos do snapshot; lança exceção, sem alterar nada, se algum não couber."""
+        valores = {
+            "year": linha.year,
+            "mileage": linha.mileage,
+            "daily_rate": float(linha.daily_rate),
+            "passengers": linha.passengers,
+            "category": _CODIGOS[CarCategory][linha.category],
+            "status": _CODIGOS[CarStatus][linha.status],
+            "fuel_type": _CODIGOS[FuelType][linha.fuel_type],
+            "transmission_type": _CODIGOS[TransmissionType][linha.transmission_type],
+        }
+        for nome, dtype in _NUMERICAS:
+            valores[nome] = dtype(valores[nome])
+        for nome in _TEXTOS:
+            valor = getattr(linha, nome)
+            if nome in _COMPARTILHADOS and isinstance(valor, str):
+                valor = self._valores.setdefault(valor, valor)
+            elif isinstance(valor, list) and all(isinstance(item, str) for item in valor):
+                valor = tuple(valor)
+            valores[nome] = valor
+        return valores
+
+    def _gravar(self, linha) -> bool:
+        """Grava (ou atualiza) o carro; False se a linha não pôde ser convertida."""
+        try:
+            valores = self._converter(linha)
+        except Exception:
+            logger.exception(f"Carro {linha.id} ignorado pelo snapshot da frota")
+            return False
+
+        self._ordem = None
+        chave = linha.id.bytes
+        pos = self.por_id.get(chave)
+        if pos is None:
+            if self._livres:
+                pos = self._livres.pop()
+            else:
+                if self.tamanho == len(self.ativo):
+                    self._crescer()
+                pos = self.tamanho
+                self.tamanho += 1
+            self.por_id[chave] = pos
+        else:
+            anterior = self.license_plate[pos]
+            if anterior != linha.license_plate:
+                self.por_placa.pop(anterior, None)
+
+        self.ativo[pos] = True
+        self.ids[pos] = chave
+        for nome, _ in _NUMERICAS:
+            getattr(self, nome)[pos] = valores[nome]
+        for nome in _TEXTOS:
+            getattr(self, nome)[pos] = valores[nome]
+        self.por_placa[linha.license_plate] = pos
+        return True
+
+    def _remover(self, chave: bytes):
+        pos = self.por_id.pop(chave, None)
+        if pos is None:
+            return
+        self._ordem = None
+        self.por_placa.pop(self.license_plate[pos], None)
+        self.ativo[pos] = False
+        for nome in _TEXTOS:
+            getattr(self, nome)[pos] = None
+        self._livres.append(pos)
+
+    def load(self, db: Session) -> int:
+        """(Re)carrega a frota inteira do banco."""
+        geracao = current_generation()
+        linhas = db.execute(select(*Car.__table__.c)).all()
+        with self._lock:
+            self._alocar(max(len(linhas), self.CAPACIDADE_INICIAL))
+            for linha in linhas:
+                self._gravar(linha)
+            self.geracao = geracao
+            self._pendentes.clear()
+            self._recarregar = False
+            self.carregado = True
+        return len(linhas)
+
+    def notify(self, car_id=None, geracao: Optional[int] = None):
+        """
+        Notificação de alteração (registrada em `invalidate_car`).
+
+        `geracao` é o valor da geração das listagens após o incremento feito
+        por esta alteração; qualquer salto indica alterações de outro
+        processo e força a releitura completa.
+        """
+        with self._lock:
+            if not self.carregado:
+                return
+            if car_id is None:
+                self._recarregar = True
+            elif change_feed.distribuido or (
+                geracao is not None and self.geracao is not None and geracao == self.geracao + 1
+            ):
+                self._pendentes.add(_id_key(car_id))
+            else:
+                self._recarregar = True
+            self.geracao = geracao
+
+    def on_change(self, evento: ChangeEvent):
+        """Evento do change feed (qualquer worker): o carro fica pendente, ou a frota é relida."""
+        with self._lock:
+            if not self.carregado:
+                return
+            if evento.chave is None:
+                self._recarregar = True
+            else:
+                self._pendentes.add(_id_key(evento.chave))
+
+    def ensure_fresh(self, db: Session):
+        """Carrega o snapshot, ou aplica as alterações notificadas, antes de uma consulta."""
+        with self._lock:
+            # Com o change feed distribuído os eventos de outros workers chegam por ele;
+            # sem ele, a geração das listagens é a única pista de alterações externas
+            externo = not change_feed.distribuido and current_generation() != self.geracao
+            if not self.carregado or self._recarregar or externo:
+                self.load(db)
+                return
+            if not self._pendentes:
+                return
+            pendentes = list(self._pendentes)
+            linhas = db.execute(
+                select(*Car.__table__.c).where(Car.id.in_([uuid.UUID(bytes=chave) for chave in pendentes]))
+            ).all()
+            # Removidos do banco, ou que não puderam ser convertidos, saem do snapshot
+            gravados = {linha.id.bytes for linha in linhas if self._gravar(linha)}
+            for chave in set(pendentes) - gravados:
+                self._remover(chave)
+            self._pendentes.difference_update(pendentes)
+
+    # --- Leitura ---
+
+    def _linha(self, pos: int) -> dict:
+        """Carro na posição `pos`, no mesmo formato de `car_to_dict`."""
+        return {
+            "id": str(uuid.UUID(bytes=self.ids[pos].tobytes())),
+            "brand": self.brand[pos],
+            "model": self.model[pos],
+            "year": int(self.year[pos]),
+            "color": self.color[pos],
+            "license_plate": self.license_plate[pos],
+            "category": CATEGORIAS[self.category[pos]].value,
+            "daily_rate": float(self.daily_rate[pos]),
+            "mileage": int(self.mileage[pos]),
+            "status": STATUS[self.status[pos]].value,
+            "fuel_type": COMBUSTIVEIS[self.fuel_type[pos]].value,
+            "transmission_type": TRANSMISSOES[self.transmission_type[pos]].value,
+            "passengers": int(self.passengers[pos]),
+            "features": _json(self.features[pos]),
+            "images": _json(self.images[pos]),
+            "created_at": self.created_at[pos],
+            "updated_at": self.updated_at[pos],
+        }
+
+    def car_id(self, plate: str) -> Optional[uuid.UUID]:
+        with self._lock:
+            pos = self.por_placa.get(plate)
+            return None if pos is None else uuid.UUID(bytes=self.ids[pos].tobytes())
+
+    def get_by_plate(self, plate: str) -> Optional[dict]:
+        with self._lock:
+            pos = self.por_placa.get(plate)
+            return None if pos is None else self._linha(pos)
+
+    def _mascara(
+        self,
+        category: Optional[CarCategory] = None,
+        status: Optional[CarStatus] = None,
+        fuel_type: Optional[FuelType] = None,
+        transmission_type: Optional[TransmissionType] = None,
+        passengers: Optional[int] = None,
+        exclude_status: Optional[CarStatus] = None,
+    ) -> np.ndarray:
+        n = self.tamanho
+        mascara = self.ativo[:n].copy()
+        if category is not None:
+            mascara &= self.category[:n] == _CODIGOS[CarCategory][category]
+        if status is not None:
+            mascara &= self.status[:n] == _CODIGOS[CarStatus][status]
+        if exclude_status is not None:
+            mascara &= self.status[:n] != _CODIGOS[CarStatus][exclude_status]
+        if fuel_type is not None:
+            mascara &= self.fuel_type[:n] == _CODIGOS[FuelType][fuel_type]
+        if transmission_type is not None:
+            mascara &= self.transmission_type[:n] == _CODIGOS[TransmissionType][transmission_type]
+        if passengers is not None:
+            mascara &= self.passengers[:n] >= passengers
+        return mascara
+
+    def _ordenar(self) -> np.ndarray:
+        """Posições ativas na ordem do catálogo, (created_at, id), como no ORDER BY do SQL."""
+        if self._ordem is None:
+            posicoes = sorted(
+                np.flatnonzero(self.ativo[:self.tamanho]).tolist(),
+                key=lambda pos: (self.created_at[pos] or "", self.ids[pos].tobytes()),
+            )
+            self._ordem = np.array(posicoes, dtype=np.intp)
+            self._chaves = [(self.created_at[pos] or "", self.ids[pos].tobytes()) for pos in posicoes]
+        return self._ordem
+
+    def filter(
+        self,
+        category: Optional[CarCategory] = None,
+        status: Optional[CarStatus] = None,
+        fuel_type: Optional[FuelType] = None,
+        transmission_type: Optional[TransmissionType] = None,
+        passengers: Optional[int] = None,
+        exclude_status: Optional[CarStatus] = None,
+    ) -> List[dict]:
+        """Carros que atendem a todos os filtros (`passengers` é o mínimo de lugares)."""
+        with self._lock:
+            mascara = self._mascara(category, status, fuel_type, transmission_type, passengers, exclude_status)
+            return [self._linha(pos) for pos in np.flatnonzero(mascara)]
+
+    def page(
+        self,
+        category: Optional[CarCategory] = None,
+        status: Optional[CarStatus] = None,
+        limit: int = 10,
+        offset: int = 0,
+        after: Optional[Tuple[str, uuid.UUID]] = None,
+    ) -> Tuple[int, List[dict], bool]:
+        """
+        Página do catálogo ordenado por (created_at, id).
+
+        `after` é a chave do último carro da página anterior (paginação por
+        chave, `offset` é ignorado). Devolve o total de carros filtrados, os
+        carros da página e se existe próxima página.
+        """
+        with self._lock:
+            ordem = self._ordenar()
+            # Índices (na ordem do catálogo) dos carros que passam nos filtros
+            filtrados = np.flatnonzero(self._mascara(category, status)[ordem])
+            if after is not None:
+                created_at, car_id = after
+                inicio = bisect.bisect_right(self._chaves, (created_at or "", _id_key(car_id)))
+                offset = int(np.searchsorted(filtrados, inicio))
+            selecionados = filtrados[offset:offset + limit + 1]
+            linhas = [self._linha(pos) for pos in ordem[selecionados[:limit]]]
+            return len(filtrados), linhas, len(selecionados) > limit
+
+# Instância única por processo (cada worker do uvicorn tem a sua)
+fleet_snapshot = FleetSnapshot()
+on_car_change(fleet_snapshot.notify)
+change_feed.subscribe("cars", fleet_snapshot.on_change)
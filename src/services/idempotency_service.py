@@ -0,0 +1,142 @@
+import base64
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.config.cache import RedisCache, get_cache
+from src.config.database import SessionLocal
+from src.models.idempotency import IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+# IDEMPOTENCY_TTL: segundos que a resposta fica disponível para replay
+# IDEMPOTENCY_LOCK_SECONDS: trava enquanto a requisição original é processada
+#     (se o worker morrer no meio, a chave volta a ser aceita depois disso)
+# IDEMPOTENCY_BACKEND: "auto" (Redis se disponível, senão banco), "redis" ou "db"
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+IDEMPOTENCY_BACKEND = os.getenv("IDEMPOTENCY_BACKEND", "auto").lower()
+
+
+@dataclass
+class StoredResponse:
+    """Registro de uma chave: `status_code` None = requisição original em andamento."""
+    fingerprint: str
+    status_code: Optional[int] = None
+    content_type: Optional[str] = None
+    body: bytes = b""
+
+
+class RedisIdempotencyStore:
+    """Registros em Redis: SET NX reserva a chave de forma atômica entre workers."""
+
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def _dump(registro: StoredResponse) -> str:
+        return json.dumps({
+            "fp": registro.fingerprint,
+            "status": registro.status_code,
+            "type": registro.content_type,
+            "body": base64.b64encode(registro.body).decode(),
+        })
+
+    @staticmethod
+    def _load(raw) -> StoredResponse:
+        dados = json.loads(raw)
+        return StoredResponse(dados["fp"], dados["status"], dados["type"], base64.b64decode(dados["body"]))
+
+    def reserve(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        pendente = self._dump(StoredResponse(fingerprint))
+        while True:
+            if self.client.set(key, pendente, nx=True, ex=IDEMPOTENCY_LOCK_SECONDS):
+                return None
+            raw = self.client.get(key)
+            if raw is not None:
+                return self._load(raw)
+            # Expirou entre o SET e o GET: tenta reservar de novo
+
+    def complete(self, key: str, registro: StoredResponse):
+        self.client.set(key, self._dump(registro), ex=IDEMPOTENCY_TTL)
+
+    def release(self, key: str):
+        self.client.delete(key)
+
+
+class DbIdempotencyStore:
+    """Registros na tabela `idempotency_keys`: a chave primária garante a reserva única."""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def reserve(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        agora = datetime.utcnow()
+        with self.session_factory() as db:
+            # Registro vencido (TTL ou trava de um worker que caiu) libera a chave
+            db.execute(delete(IdempotencyRecord).where(
+                IdempotencyRecord.key == key, IdempotencyRecord.expires_at <= agora
+            ))
+            db.add(IdempotencyRecord(
+                key=key, fingerprint=fingerprint,
+                expires_at=agora + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+            ))
+            try:
+                db.commit()
+                return None
+            except IntegrityError:
+                db.rollback()
+            registro = db.execute(select(IdempotencyRecord).where(IdempotencyRecord.key == key)).scalar_one_or_none()
+            if registro is None:
+                # Removido entre o INSERT e o SELECT: trata como em andamento
+                return StoredResponse(fingerprint)
+            return StoredResponse(registro.fingerprint, registro.status_code, registro.content_type, registro.body or b"")
+
+    def complete(self, key: str, registro: StoredResponse):
+        with self.session_factory() as db:
+            db.execute(update(IdempotencyRecord).where(IdempotencyRecord.key == key).values(
+                status_code=registro.status_code, content_type=registro.content_type, body=registro.body,
+                expires_at=datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_TTL),
+            ))
+            db.commit()
+
+    def release(self, key: str):
+        with self.session_factory() as db:
+            db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.key == key))
+            db.commit()
+
+    def purge_expired(self) -> int:
+        """Apaga registros vencidos; retorna quantos foram removidos."""
+        with self.session_factory() as db:
+            resultado = db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= datetime.utcnow()))
+            db.commit()
+            return resultado.rowcount
+
+
+_store = None
+
+
+def get_idempotency_store():
+    """Store do processo: Redis quando o cache principal é Redis, senão a tabela no banco."""
+    global _store
+    if _store is None:
+        cache = get_cache()
+        if IDEMPOTENCY_BACKEND != "db" and isinstance(cache, RedisCache):
+            _store = RedisIdempotencyStore(cache.client)
+        else:
+            if IDEMPOTENCY_BACKEND == "redis":
+                logger.warning("Redis indisponível; Idempotency-Key usando a tabela idempotency_keys")
+            _store = DbIdempotencyStore()
+    return _store
+
+
+def set_idempotency_store(store):
+    """Substitui o store (ex.: `RedisIdempotencyStore(fakeredis.FakeRedis())` em testes)."""
+    global _store
+    _store = store
@@ -1,7 +1,10 @@
 from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext
 
+from src.config.password_hasher import password_hasher
+
 from src.models.rental import User
 
 # Contexto para hash de senhas
@@ -79,4 +82,30 @@ class UserService:
         
         self.db.delete(user)
         self.db.commit()
-        return True
\ No newline at end of file
+        return True
+
+
+class AsyncUserService:
+    """
+    Variante assíncrona do UserService.
+
+    O acesso ao banco passa por `AsyncSession.run_sync` e o bcrypt roda no
+    pool de hashing, então a autenticação não bloqueia o event loop.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_user_by_username(self, username: str) -> Optional[User]:
+        return await self.db.run_sync(lambda s: UserService(s).get_user_by_username(username))
+
+    async def authenticate_user(self, username: str, password: str | int) -> Optional[User]:
+        """Autenticar usuário"""
+        user = await self.get_user_by_username(username)
+        if not user:
+            return None
+
+        if not await password_hasher.verify(str(password), user.password_hash):
+            return None
+
+        return user
@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config.cache import get_cache
+from src.config.database import SessionLocal
+from src.models.car import Car
+from src.models.clientes import Cliente
+from src.models.overdue import OverdueRental
+from src.models.rental import PaymentStatus, Rental, RentalStatus
+
+logger = logging.getLogger(__name__)
+
+# Locações processadas por transação na varredura
+OVERDUE_BATCH_SIZE = int(os.getenv("OVERDUE_BATCH_SIZE", "500"))
+# Segundos entre varreduras (job `overdue_sweep` do agendador)
+OVERDUE_SWEEP_INTERVAL = int(os.getenv("OVERDUE_SWEEP_INTERVAL", "300"))
+
+# Totais da última varredura, compartilhados entre workers pelo cache
+_SUMMARY_KEY = "rentals:overdue:summary"
+
+
+class OverdueService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def sweep(self, batch_size: Optional[int] = None, today: Optional[date] = None) -> dict:
+        """
+        Varre as locações ATIVAS vencidas em lotes (paginação por id).
+
+        Em cada lote, na mesma transação: pagamentos PENDENTES viram ATRASADO
+        e as linhas do lote em `overdue_rentals` são regravadas com
+        `refreshed_at` desta varredura. No fim, remove do resumo as locações
+        que deixaram de estar em atraso e publica os totais no cache.
+        """
+        batch_size = batch_size or OVERDUE_BATCH_SIZE
+        today = today or date.today()
+        agora = datetime.utcnow()
+        stmt = (
+            select(
+                Rental.id, Rental.cliente_id, Cliente.nome, Rental.car_id, Car.license_plate,
+                Rental.end_date, Rental.total_amount, Rental.payment_status,
+            )
+            .outerjoin(Cliente, Cliente.id == Rental.cliente_id)
+            .outerjoin(Car, Car.id == Rental.car_id)
+            .where(Rental.status == RentalStatus.ATIVA, Rental.end_date < today)
+            .order_by(Rental.id)
+            .limit(batch_size)
+        )
+
+        ultimo_id, marcadas, total, valor_total, maior_atraso = 0, 0, 0, Decimal("0"), 0
+        while True:
+            linhas = self.db.execute(stmt.where(Rental.id > ultimo_id)).all()
+            if not linhas:
+                break
+            ids = [linha.id for linha in linhas]
+            pendentes = [linha.id for linha in linhas if linha.payment_status == PaymentStatus.PENDENTE]
+            if pendentes:
+                marcadas += self.db.execute(
+                    update(Rental)
+                    .where(Rental.id.in_(pendentes), Rental.payment_status == PaymentStatus.PENDENTE)
+                    .values(payment_status=PaymentStatus.ATRASADO)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+            self.db.execute(delete(OverdueRental).where(OverdueRental.rental_id.in_(ids)))
+            self.db.execute(insert(OverdueRental), [{
+                "rental_id": linha.id,
+                "cliente_id": linha.cliente_id,
+                "cliente_nome": linha.nome,
+                "car_id": linha.car_id,
+                "license_plate": linha.license_plate,
+                "end_date": linha.end_date,
+                "days_overdue": (today - linha.end_date).days,
+                "total_amount": linha.total_amount,
+                "refreshed_at": agora,
+            } for linha in linhas])
+            self.db.commit()
+
+            total += len(linhas)
+            valor_total += sum((linha.total_amount or 0 for linha in linhas), Decimal("0"))
+            maior_atraso = max(maior_atraso, *((today - linha.end_date).days for linha in linhas))
+            ultimo_id = ids[-1]
+
+        removidas = self.db.execute(delete(OverdueRental).where(OverdueRental.refreshed_at < agora)).rowcount
+        self.db.commit()
+
+        resumo = {
+            "total": total,
+            "valor_total": float(valor_total),
+            "maior_atraso_dias": maior_atraso,
+            "atualizado_em": agora,
+        }
+        get_cache().set(_SUMMARY_KEY, json.dumps(jsonable_encoder(resumo)))
+        return {**resumo, "pagamentos_atrasados": marcadas, "removidas": removidas}
+
+    def get_summary(self) -> dict:
+        """Totais da última varredura (cache; sem ele, um agregado sobre `overdue_rentals`)."""
+        raw = get_cache().get(_SUMMARY_KEY)
+        if raw:
+            return json.loads(raw)
+        total, valor_total, maior_atraso, atualizado_em = self.db.execute(select(
+            func.count(), func.coalesce(func.sum(OverdueRental.total_amount), 0),
+            func.coalesce(func.max(OverdueRental.days_overdue), 0), func.max(OverdueRental.refreshed_at),
+        )).one()
+        return {
+            "total": total,
+            "valor_total": float(valor_total),
+            "maior_atraso_dias": maior_atraso,
+            "atualizado_em": atualizado_em,
+        }
+
+    def list_overdue(self, skip: int = 0, limit: int = 100) -> List[OverdueRental]:
+        """Locações em atraso, das mais atrasadas para as menos atrasadas"""
+        return self.db.execute(
+            select(OverdueRental)
+            .order_by(OverdueRental.days_overdue.desc(), OverdueRental.rental_id)
+            .offset(skip).limit(limit)
+        ).scalars().all()
+
+
+class AsyncOverdueService:
+    """Variante assíncrona do OverdueService (mesma lógica via `run_sync`)."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_summary(self) -> dict:
+        return await self.db.run_sync(lambda s: OverdueService(s).get_summary())
+
+    async def list_overdue(self, skip: int = 0, limit: int = 100) -> List[OverdueRental]:
+        return await self.db.run_sync(lambda s: OverdueService(s).list_overdue(skip, limit))
+
+
+def run_overdue_sweep() -> dict:
+    """Job do agendador: varredura completa numa sessão própria."""
+    db = SessionLocal()
+    try:
+        resultado = OverdueService(db).sweep()
+    finally:
+        db.close()
+    logger.info(f"Varredura de atrasos: {resultado}")
+    return resultado
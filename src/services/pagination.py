@@ -0,0 +1,28 @@
+import base64
+import json
+from typing import Any, List, Optional
+
+# Cabeçalho usado pelas listagens que retornam uma lista pura (clientes, locações)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Gera um cursor opaco a partir dos valores das chaves de ordenação do último item."""
+    raw = json.dumps([str(v) if v is not None else None for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Optional[str]]:
+    """
+    Decodifica um cursor gerado por `encode_cursor`.
+
+    Lança ValueError se o cursor estiver corrompido ou tiver outro formato.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Cursor inválido")
+    return values
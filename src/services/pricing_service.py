@@ -0,0 +1,181 @@
+import os
+from datetime import date
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from src.models.car import Car, CarCategory
+
+# Temporadas: (mês, dia) inicial e final, inclusive. Dias fora das faixas são "BAIXA".
+SEASONS = ("BAIXA", "MEDIA", "ALTA")
+SEASON_RANGES = {
+    "ALTA": [((12, 15), (12, 31)), ((1, 1), (1, 31)), ((7, 1), (7, 31))],
+    "MEDIA": [((2, 1), (2, 29)), ((6, 15), (6, 30)), ((11, 15), (12, 14))],
+}
+
+# Multiplicador da diária por categoria e temporada (na ordem de SEASONS)
+SEASON_MULTIPLIERS = {
+    CarCategory.ECONOMICO: (1.00, 1.10, 1.25),
+    CarCategory.INTERMEDIARIO: (1.00, 1.10, 1.25),
+    CarCategory.EXECUTIVO: (1.00, 1.05, 1.15),
+    CarCategory.LUXURY: (1.00, 1.15, 1.35),
+    CarCategory.SUV: (1.00, 1.15, 1.30),
+}
+
+# Desconto nas diárias de sábado e domingo
+WEEKEND_DISCOUNT = float(os.getenv("PRICING_WEEKEND_DISCOUNT", "0.10"))
+# (mínimo de dias, desconto sobre o total), do maior para o menor
+LONG_STAY_TIERS = ((30, 0.15), (15, 0.10), (7, 0.05))
+# Dias de atraso são cobrados pela diária da data (sem descontos) vezes este fator
+LATE_FEE_MULTIPLIER = float(os.getenv("PRICING_LATE_FEE_MULTIPLIER", "1.5"))
+
+_CATEGORIES = list(CarCategory)
+_CATEGORY_INDEX = {categoria: i for i, categoria in enumerate(_CATEGORIES)}
+# Matriz (categorias x temporadas)
+_MULTIPLIERS = np.array([SEASON_MULTIPLIERS[c] for c in _CATEGORIES], dtype=np.float64)
+
+
+def _season_table() -> np.ndarray:
+    """Temporada de cada (mês, dia): matriz 13 x 32 indexada diretamente."""
+    tabela = np.zeros((13, 32), dtype=np.int8)
+    for nome, faixas in SEASON_RANGES.items():
+        codigo = SEASONS.index(nome)
+        for (mes_ini, dia_ini), (mes_fim, dia_fim) in faixas:
+            for mes in range(mes_ini, mes_fim + 1):
+                primeiro = dia_ini if mes == mes_ini else 1
+                ultimo = dia_fim if mes == mes_fim else 31
+                tabela[mes, primeiro:ultimo + 1] = codigo
+    return tabela
+
+
+_SEASON_TABLE = _season_table()
+
+
+def _day_factors(first: np.datetime64, n_days: int, weekend_discount: float = None) -> np.ndarray:
+    """
+    Fator de cada dia do intervalo [first, first + n_days) por categoria.
+
+    Retorna matriz (categorias x dias) = multiplicador da temporada do dia
+    vezes (1 - desconto de fim de semana) nos sábados e domingos.
+    """
+    dias = first + np.arange(n_days)
+    meses = dias.astype("datetime64[M]")
+    mes = (meses - dias.astype("datetime64[Y]")).astype(np.int64) + 1
+    dia = (dias - meses).astype(np.int64) + 1
+    temporada = _SEASON_TABLE[mes, dia]
+    # 1970-01-01 foi uma quinta-feira: (n + 3) % 7 dá 0 = segunda ... 6 = domingo
+    fim_de_semana = (dias.astype(np.int64) + 3) % 7 >= 5
+    desconto = WEEKEND_DISCOUNT if weekend_discount is None else weekend_discount
+    return _MULTIPLIERS[:, temporada] * np.where(fim_de_semana, 1.0 - desconto, 1.0)
+
+
+def rental_days(start: date, end: date) -> int:
+    """Dias cobrados: diferença entre as datas, no mínimo uma diária."""
+    return max((end - start).days, 1)
+
+
+def long_stay_discount(days: np.ndarray) -> np.ndarray:
+    """Desconto de longa duração para cada quantidade de dias."""
+    desconto = np.zeros(np.shape(days), dtype=np.float64)
+    for minimo, valor in reversed(LONG_STAY_TIERS):
+        desconto = np.where(days >= minimo, valor, desconto)
+    return desconto
+
+
+def quote_matrix(daily_rates: Sequence[float], categories: Sequence[CarCategory],
+                 ranges: Sequence[Tuple[date, date]]) -> dict:
+    """
+    Cota N carros x M períodos de uma vez.
+
+    Os fatores diários (temporada x fim de semana) são calculados uma única
+    vez para o intervalo que cobre todos os períodos; a soma de cada período
+    sai de uma soma acumulada, então o custo é O(categorias x dias + N x M),
+    sem laços em Python por carro ou por dia.
+
+    Retorna arrays NumPy: `subtotal` e `total` (N x M, já com o desconto de
+    longa duração), `discount` (N x M) e `days` (M).
+    """
+    taxas = np.asarray(daily_rates, dtype=np.float64)
+    indices = np.array([_CATEGORY_INDEX[CarCategory(c)] for c in categories], dtype=np.intp)
+    inicios = np.array([inicio for inicio, _ in ranges], dtype="datetime64[D]")
+    fins = np.array([fim for _, fim in ranges], dtype="datetime64[D]")
+    fins = np.maximum(fins, inicios + 1)  # mínimo de uma diária
+    dias = (fins - inicios).astype(np.int64)
+
+    if len(taxas) == 0 or len(dias) == 0:
+        vazio = np.zeros((len(taxas), len(dias)))
+        return {"subtotal": vazio, "discount": vazio, "total": vazio, "days": dias}
+
+    primeiro = inicios.min()
+    fatores = _day_factors(primeiro, int((fins.max() - primeiro).astype(np.int64)))
+    acumulado = np.concatenate([np.zeros((len(_CATEGORIES), 1)), np.cumsum(fatores, axis=1)], axis=1)
+    posicao_ini = (inicios - primeiro).astype(np.intp)
+    posicao_fim = (fins - primeiro).astype(np.intp)
+    # Soma dos fatores de cada período, por categoria: (categorias x M)
+    soma_fatores = acumulado[:, posicao_fim] - acumulado[:, posicao_ini]
+
+    subtotal = np.round(taxas[:, None] * soma_fatores[indices], 2)
+    desconto = np.round(subtotal * long_stay_discount(dias)[None, :], 2)
+    return {"subtotal": subtotal, "discount": desconto, "total": subtotal - desconto, "days": dias}
+
+
+class PricingService:
+    """Cálculo de preços de locação no servidor (diárias, descontos e multas)."""
+
+    def quote(self, car: Car, start_date: date, end_date: date, additional_fees: float = 0.0) -> dict:
+        """Cotação de um carro para um período."""
+        resultado = quote_matrix([float(car.daily_rate)], [car.category], [(start_date, end_date)])
+        subtotal = float(resultado["subtotal"][0, 0])
+        desconto = float(resultado["discount"][0, 0])
+        return {
+            "car_id": car.id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "total_days": int(resultado["days"][0]),
+            "daily_rate": float(car.daily_rate),
+            "subtotal": subtotal,
+            "discount": desconto,
+            "additional_fees": round(additional_fees, 2),
+            "total_amount": round(subtotal - desconto + additional_fees, 2),
+        }
+
+    def quote_many(self, cars: List[Car], ranges: List[Tuple[date, date]]) -> List[dict]:
+        """Cotação de vários carros para vários períodos (uma chamada vetorizada)."""
+        resultado = quote_matrix(
+            [float(car.daily_rate) for car in cars], [car.category for car in cars], ranges
+        )
+        totais = resultado["total"].tolist()
+        descontos = resultado["discount"].tolist()
+        dias = resultado["days"].tolist()
+        return [
+            {
+                "car_id": car.id,
+                "license_plate": car.license_plate,
+                "category": car.category,
+                "daily_rate": float(car.daily_rate),
+                "quotes": [
+                    {
+                        "start_date": inicio,
+                        "end_date": fim,
+                        "total_days": dias[j],
+                        "discount": descontos[i][j],
+                        "total_amount": round(totais[i][j], 2),
+                    }
+                    for j, (inicio, fim) in enumerate(ranges)
+                ],
+            }
+            for i, car in enumerate(cars)
+        ]
+
+    def late_fee(self, car: Car, end_date: date, return_date: date) -> float:
+        """Multa por atraso: diárias da data (sem descontos) x LATE_FEE_MULTIPLIER."""
+        if return_date <= end_date:
+            return 0.0
+        # O desconto de fim de semana não vale para dias de atraso
+        fatores = _day_factors(np.datetime64(end_date, "D"), (return_date - end_date).days, weekend_discount=0.0)
+        soma = fatores[_CATEGORY_INDEX[CarCategory(car.category)]].sum()
+        return round(float(car.daily_rate) * float(soma) * LATE_FEE_MULTIPLIER, 2)
+
+
+
+pricing_service = PricingService()
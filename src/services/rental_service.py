@@ -1,10 +1,26 @@
+import uuid
 from typing import List, Optional
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from src.models.rental import Rental, RentalCreate, FinishRentalRequest, RentalStatus, RentalUpdate
-from src.models.car import CarStatus
+from src.models.car import Car, CarStatus
 from src.services.car_service import CarService
 from src.services.cliente_service import ClienteService
-from datetime import date
+from src.services.availability_service import availability_index
+from src.services.car_cache import invalidate_car
+from src.services.change_feed import change_feed
+from src.services.pricing_service import pricing_service
+from src.services.report_service import ReportService
+from src.services.serializers import RENTAL_OUT
+from datetime import date, datetime
+from decimal import Decimal
+
+
+class RentalConflictError(ValueError):
+    """O carro foi reservado por outra requisição (deve virar 409, não 500)."""
+
 
 class RentalService:
     def __init__(self, db: Session):
@@ -25,36 +41,92 @@ class RentalService:
             raise ValueError("Carro não encontrado")
         
         if car.status != CarStatus.DISPONIVEL:
-            raise ValueError("Carro não está disponível")
+            raise RentalConflictError("Carro não está disponível")
+        
+        # Checagem de conflito de datas pelo índice em memória (sem varrer `locacoes`)
+        availability_index.ensure_loaded(self.db)
+        if not availability_index.is_free(car.id, rental_data.start_date, rental_data.end_date):
+            raise RentalConflictError("Carro já reservado nesse período")
         
         # O Pydantic model 'RentalCreate' pode ter campos que não existem no ORM 'Rental'.
         # Removemos o campo 'cnh_photo_path' antes de criar a locação no banco.
         rental_data_dict = rental_data.dict()
         rental_data_dict.pop('cnh_photo_path', None)
+
+        # Preço calculado no servidor: valores enviados pelo cliente são descartados
+        cotacao = pricing_service.quote(
+            car, rental_data.start_date, rental_data.end_date, rental_data.additional_fees or 0.0
+        )
+        rental_data_dict['total_days'] = cotacao['total_days']
+        rental_data_dict['daily_rate'] = cotacao['daily_rate']
+        rental_data_dict['total_amount'] = cotacao['total_amount']
         
-        db_rental = Rental(**rental_data_dict)
+        # As checagens acima são só o caminho rápido: duas requisições simultâneas
+        # passam por elas. Quem decide é o UPDATE condicional, que troca o status
+        # DISPONIVEL -> ALUGADO na mesma transação do INSERT; o banco serializa as
+        # escritas na linha do carro e só uma delas afeta 1 linha.
+        resultado = self.db.execute(
+            update(Car)
+            .where(Car.id == car.id, Car.status == CarStatus.DISPONIVEL)
+            .values(status=CarStatus.ALUGADO, updated_at=datetime.now().isoformat())
+        )
+        if resultado.rowcount != 1:
+            self.db.rollback()
+            raise RentalConflictError("Carro não está disponível")
         
+        db_rental = Rental(**rental_data_dict)
         self.db.add(db_rental)
-        
-        # Atualizar status do carro para alugado
-        self.car_service.update_car_status(rental_data.car_id, CarStatus.ALUGADO)
-        
-        self.db.commit()
+        try:
+            self.db.flush()
+            ReportService(self.db).record_created(db_rental, car)
+            change_feed.publish("cars", car.id, self.db)
+            change_feed.publish("locacoes", db_rental.id, self.db)
+            self.db.commit()
+        except IntegrityError:
+            # Constraint de exclusão `ex_locacoes_carro_periodo` (PostgreSQL)
+            self.db.rollback()
+            raise RentalConflictError("Carro já reservado nesse período")
         self.db.refresh(db_rental)
+        invalidate_car(car.id, car.license_plate)
+        availability_index.sync_rental(db_rental)
         return db_rental
     
-    def get_rentals(self, skip: int = 0, limit: int = 100, status_filter: Optional[RentalStatus] = None) -> List[Rental]:
-        """Listar locações"""
-        query = self.db.query(Rental).options(
-            joinedload(Rental.cliente),
-            joinedload(Rental.carro)
-        )
+    def quote_rental(self, car_id, start_date: date, end_date: date, additional_fees: float = 0.0) -> dict:
+        """Cotação de uma locação (mesmo cálculo usado em `create_rental`)"""
+        if end_date < start_date:
+            raise ValueError("Data de fim deve ser após a data de início")
+        car = self.car_service.get_car_by_id(car_id)
+        if not car:
+            raise ValueError("Carro não encontrado")
+        return pricing_service.quote(car, start_date, end_date, additional_fees)
+    
+    def get_rentals(self, skip: int = 0, limit: int = 100, status_filter: Optional[RentalStatus] = None,
+                    after_id: Optional[int] = None) -> List[Rental]:
+        """Listar locações (ordenadas por id; `after_id` ativa a paginação por chave)"""
+        # Só as colunas de RentalOut; cliente e carro não fazem parte da resposta
+        query = self.db.query(Rental).options(RENTAL_OUT.load_only())
         
         if status_filter:
             query = query.filter(Rental.status == status_filter)
         
+        query = query.order_by(Rental.id)
+        if after_id is not None:
+            return query.filter(Rental.id > after_id).limit(limit).all()
         return query.offset(skip).limit(limit).all()
     
+    def get_rental_rows(self, skip: int = 0, limit: int = 100, status_filter: Optional[RentalStatus] = None,
+                        after_id: Optional[int] = None) -> list:
+        """Mesma listagem de `get_rentals`, em linhas do Core com as colunas de RentalOut"""
+        stmt = RENTAL_OUT.select()
+        if status_filter:
+            stmt = stmt.where(Rental.status == status_filter)
+        stmt = stmt.order_by(Rental.id)
+        if after_id is not None:
+            stmt = stmt.where(Rental.id > after_id)
+        else:
+            stmt = stmt.offset(skip)
+        return self.db.execute(stmt.limit(limit)).all()
+    
     def get_rental_by_id(self, rental_id: int) -> Optional[Rental]:
         """Buscar locação por ID"""
         return self.db.query(Rental).options(
@@ -68,13 +140,17 @@ class RentalService:
         if not db_rental:
             return None
         
+        previous_car_id = db_rental.car_id
+        
         # Usar exclude_unset=True para atualizar apenas os campos fornecidos na requisição
         update_data = rental_data.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_rental, key, value)
         
+        change_feed.publish("locacoes", db_rental.id, self.db)
         self.db.commit()
         self.db.refresh(db_rental)
+        availability_index.sync_rental(db_rental, previous_car_id=previous_car_id)
         return db_rental
     
     def delete_rental(self, rental_id: int) -> bool:
@@ -87,8 +163,11 @@ class RentalService:
         if db_rental.status == RentalStatus.ATIVA:
             self.car_service.update_car_status(db_rental.car_id, CarStatus.DISPONIVEL)
         
+        ReportService(self.db).record_deleted(db_rental, db_rental.carro)
         self.db.delete(db_rental)
+        change_feed.publish("locacoes", rental_id, self.db)
         self.db.commit()
+        availability_index.remove(rental_id, db_rental.car_id)
         return True
     
     def finish_rental(self, rental_id: int, rental_data: FinishRentalRequest) -> Optional[Rental]:
@@ -106,39 +185,50 @@ class RentalService:
         if rental_data.final_mileage < db_rental.mileage_start:
             raise ValueError("A quilometragem final não pode ser menor que a quilometragem inicial.")
         
+        car = self.car_service.get_car_by_id(db_rental.car_id)
+        if not car:
+            # Lançar um erro se o carro não for encontrado, pois é uma dependência crucial.
+            raise ValueError(f"Carro com ID {db_rental.car_id} não encontrado.")
+
+        # Multa por atraso calculada no servidor + taxas manuais informadas na devolução
+        multa = pricing_service.late_fee(car, db_rental.end_date, rental_data.return_date)
+        taxas = Decimal(str(round(multa + (rental_data.late_fee or 0), 2)))
+        
         # Atualizar a locação com os dados do frontend
         db_rental.status = RentalStatus.FINALIZADA
         db_rental.actual_end_date = rental_data.return_date
         db_rental.mileage_end = rental_data.final_mileage
         db_rental.fuel_level = rental_data.fuel_level
-        db_rental.late_fee = rental_data.late_fee
+        db_rental.late_fee = multa
         db_rental.return_notes = rental_data.return_notes
+        db_rental.additional_fees = (db_rental.additional_fees or 0) + taxas
+        db_rental.total_amount = db_rental.total_amount + taxas
         
         # Atualizar o carro em uma única operação para manter a atomicidade.
-        car = self.car_service.get_car_by_id(db_rental.car_id)
-        if car:
-            car.mileage = rental_data.final_mileage
-            car.status = CarStatus.DISPONIVEL
-        else:
-            # Lançar um erro se o carro não for encontrado, pois é uma dependência crucial.
-            raise ValueError(f"Carro com ID {db_rental.car_id} não encontrado.")
+        car.mileage = rental_data.final_mileage
+        car.status = CarStatus.DISPONIVEL
+        ReportService(self.db).record_finished(db_rental, car, taxas)
+        change_feed.publish("cars", car.id, self.db)
+        change_feed.publish("locacoes", db_rental.id, self.db)
 
         # Commit da transação para salvar todas as alterações (locação e carro)
         self.db.commit()
         self.db.refresh(db_rental)
+        availability_index.sync_rental(db_rental)
+        invalidate_car(car.id, car.license_plate)
         
         return db_rental
     
     def get_rentals_by_cliente(self, cliente_id: int) -> List[Rental]:
-        """Listar locações por cliente"""
+        """Listar locações por cliente (apenas as colunas de RentalOut)"""
         return self.db.query(Rental).options(
-            joinedload(Rental.carro)
+            RENTAL_OUT.load_only()
         ).filter(Rental.cliente_id == cliente_id).all()
     
-    def get_rentals_by_car(self, car_id: str) -> List[Rental]:
-        """Listar locações por carro"""
+    def get_rentals_by_car(self, car_id: uuid.UUID) -> List[Rental]:
+        """Listar locações por carro (apenas as colunas de RentalOut)"""
         return self.db.query(Rental).options(
-            joinedload(Rental.cliente)
+            RENTAL_OUT.load_only()
         ).filter(Rental.car_id == car_id).all()
     
     def get_active_rentals(self) -> List[Rental]:
@@ -158,3 +248,50 @@ class RentalService:
             Rental.status == RentalStatus.ATIVA,
             Rental.end_date < today
         ).all()
+
+
+class AsyncRentalService:
+    """Variante assíncrona do RentalService (mesma lógica via `run_sync`)."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_rental(self, rental_data: RentalCreate) -> Rental:
+        return await self.db.run_sync(lambda s: RentalService(s).create_rental(rental_data))
+
+    async def quote_rental(self, car_id, start_date: date, end_date: date, additional_fees: float = 0.0) -> dict:
+        return await self.db.run_sync(
+            lambda s: RentalService(s).quote_rental(car_id, start_date, end_date, additional_fees)
+        )
+
+    async def get_rentals(self, skip: int = 0, limit: int = 100, status_filter: Optional[RentalStatus] = None,
+                          after_id: Optional[int] = None) -> List[Rental]:
+        return await self.db.run_sync(lambda s: RentalService(s).get_rentals(skip, limit, status_filter, after_id))
+
+    async def get_rental_rows(self, skip: int = 0, limit: int = 100, status_filter: Optional[RentalStatus] = None,
+                              after_id: Optional[int] = None) -> list:
+        return await self.db.run_sync(lambda s: RentalService(s).get_rental_rows(skip, limit, status_filter, after_id))
+
+    async def get_rental_by_id(self, rental_id: int) -> Optional[Rental]:
+        return await self.db.run_sync(lambda s: RentalService(s).get_rental_by_id(rental_id))
+
+    async def update_rental(self, rental_id: int, rental_data: RentalUpdate) -> Optional[Rental]:
+        return await self.db.run_sync(lambda s: RentalService(s).update_rental(rental_id, rental_data))
+
+    async def delete_rental(self, rental_id: int) -> bool:
+        return await self.db.run_sync(lambda s: RentalService(s).delete_rental(rental_id))
+
+    async def finish_rental(self, rental_id: int, rental_data: FinishRentalRequest) -> Optional[Rental]:
+        return await self.db.run_sync(lambda s: RentalService(s).finish_rental(rental_id, rental_data))
+
+    async def get_rentals_by_cliente(self, cliente_id: int) -> List[Rental]:
+        return await self.db.run_sync(lambda s: RentalService(s).get_rentals_by_cliente(cliente_id))
+
+    async def get_rentals_by_car(self, car_id: uuid.UUID) -> List[Rental]:
+        return await self.db.run_sync(lambda s: RentalService(s).get_rentals_by_car(car_id))
+
+    async def get_active_rentals(self) -> List[Rental]:
+        return await self.db.run_sync(lambda s: RentalService(s).get_active_rentals())
+
+    async def get_overdue_rentals(self) -> List[Rental]:
+        return await self.db.run_sync(lambda s: RentalService(s).get_overdue_rentals())
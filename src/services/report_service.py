@@ -0,0 +1,225 @@
+import logging
+import os
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import and_, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config.database import SessionLocal
+from src.models.car import Car, CarStatus
+from src.models.rental import Rental, RentalStatus
+from src.models.report import DailyCarUsage, DailyRevenue
+from src.services.overdue_service import OverdueService
+
+logger = logging.getLogger(__name__)
+
+# Horário local (HH:MM) da reconstrução noturna dos rollups
+REPORTS_REBUILD_AT = os.getenv("REPORTS_REBUILD_AT", "03:00")
+# Locações lidas por vez na reconstrução de `daily_car_usage`
+REPORTS_REBUILD_BATCH_SIZE = int(os.getenv("REPORTS_REBUILD_BATCH_SIZE", "1000"))
+
+REVENUE_GROUPS = {
+    "category": DailyRevenue.category,
+    "payment_method": DailyRevenue.payment_method,
+    "dia": DailyRevenue.dia,
+}
+
+
+def _upsert(db: Session):
+    """`insert` do dialeto em uso, com suporte a ON CONFLICT (PostgreSQL e SQLite)."""
+    dialeto = db.get_bind().dialect.name
+    if dialeto == "postgresql":
+        return postgresql.insert
+    if dialeto == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Rollups não suportados no banco {dialeto}")
+
+
+def _dias_ocupados(rental_id: int, car_id, inicio: date, fim: date) -> list:
+    """Dias [inicio, fim) do carro, com no mínimo um dia (como na cobrança)."""
+    return [
+        {"dia": inicio + timedelta(days=n), "car_id": car_id, "rental_id": rental_id}
+        for n in range(max((fim - inicio).days, 1))
+    ]
+
+
+class ReportService:
+    """
+    Rollups diários para os painéis (receita e ocupação da frota).
+
+    Os métodos `record_*` são chamados pelo RentalService dentro da transação
+    da própria locação (sem commit aqui), com upserts que somam ao valor já
+    gravado; o job noturno `reports_rebuild` recalcula tudo a partir de
+    `locacoes` e corrige qualquer divergência (ex.: edições via update_rental).
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # --- Manutenção incremental ---
+
+    def _somar_receita(self, dia: date, category, payment_method, rentals: int, amount):
+        stmt = _upsert(self.db)(DailyRevenue).values(
+            dia=dia, category=category, payment_method=payment_method,
+            rentals=rentals, amount=Decimal(str(amount or 0)),
+        )
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[DailyRevenue.dia, DailyRevenue.category, DailyRevenue.payment_method],
+            set_={
+                "rentals": DailyRevenue.rentals + stmt.excluded.rentals,
+                "amount": DailyRevenue.amount + stmt.excluded.amount,
+            },
+        ))
+
+    def _ocupar(self, rental: Rental, fim: date):
+        self.db.execute(delete(DailyCarUsage).where(DailyCarUsage.rental_id == rental.id))
+        stmt = _upsert(self.db)(DailyCarUsage).values(
+            _dias_ocupados(rental.id, rental.car_id, rental.start_date, fim)
+        )
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[DailyCarUsage.dia, DailyCarUsage.car_id],
+            set_={"rental_id": stmt.excluded.rental_id},
+        ))
+
+    def record_created(self, rental: Rental, car: Car):
+        self._somar_receita(rental.start_date, car.category, rental.payment_method, 1, rental.total_amount)
+        self._ocupar(rental, rental.end_date)
+
+    def record_finished(self, rental: Rental, car: Car, additional_amount):
+        """Taxas da devolução somam à receita; a ocupação passa a ir até a data real de devolução."""
+        if additional_amount:
+            self._somar_receita(rental.start_date, car.category, rental.payment_method, 0, additional_amount)
+        self._ocupar(rental, rental.actual_end_date or rental.end_date)
+
+    def record_deleted(self, rental: Rental, car: Optional[Car]):
+        if car is not None and rental.status != RentalStatus.CANCELADA:
+            self._somar_receita(rental.start_date, car.category, rental.payment_method, -1, -(rental.total_amount or 0))
+        self.db.execute(delete(DailyCarUsage).where(DailyCarUsage.rental_id == rental.id))
+
+    def rebuild(self) -> dict:
+        """Recalcula os rollups a partir de `locacoes` numa única transação."""
+        self.db.execute(delete(DailyRevenue))
+        self.db.execute(delete(DailyCarUsage))
+
+        self.db.execute(insert(DailyRevenue).from_select(
+            ["dia", "category", "payment_method", "rentals", "amount"],
+            select(
+                Rental.start_date, Car.category, Rental.payment_method,
+                func.count(), func.coalesce(func.sum(Rental.total_amount), 0),
+            )
+            .join(Car, Car.id == Rental.car_id)
+            .where(Rental.status != RentalStatus.CANCELADA)
+            .group_by(Rental.start_date, Car.category, Rental.payment_method)
+        ))
+
+        fim = func.coalesce(Rental.actual_end_date, Rental.end_date)
+        resultado = self.db.execute(
+            select(Rental.id, Rental.car_id, Rental.start_date, fim.label("fim"))
+            .where(Rental.status != RentalStatus.CANCELADA)
+            .execution_options(yield_per=REPORTS_REBUILD_BATCH_SIZE)
+        )
+        dias = 0
+        stmt = _upsert(self.db)(DailyCarUsage).on_conflict_do_nothing()
+        for lote in resultado.partitions():
+            linhas = [
+                dia for locacao in lote
+                for dia in _dias_ocupados(locacao.id, locacao.car_id, locacao.start_date, locacao.fim)
+            ]
+            if linhas:
+                self.db.execute(stmt, linhas)
+                dias += len(linhas)
+        self.db.commit()
+
+        receita = self.db.execute(select(func.count()).select_from(DailyRevenue)).scalar()
+        return {"linhas_receita": receita, "dias_ocupados": dias}
+
+    # --- Consultas dos painéis ---
+
+    def revenue(self, inicio: date, fim: date, agrupar: str = "category") -> dict:
+        coluna = REVENUE_GROUPS[agrupar]
+        linhas = self.db.execute(
+            select(coluna, func.sum(DailyRevenue.rentals), func.sum(DailyRevenue.amount))
+            .where(DailyRevenue.dia.between(inicio, fim))
+            .group_by(coluna)
+            .order_by(coluna)
+        ).all()
+        data = [
+            {"chave": getattr(chave, "value", str(chave)), "rentals": int(rentals or 0), "amount": float(amount or 0)}
+            for chave, rentals, amount in linhas
+        ]
+        return {
+            "inicio": inicio,
+            "fim": fim,
+            "agrupado_por": agrupar,
+            "total_rentals": sum(linha["rentals"] for linha in data),
+            "total_amount": round(sum(linha["amount"] for linha in data), 2),
+            "data": data,
+        }
+
+    def utilization(self, inicio: date, fim: date) -> dict:
+        """Dias ocupados e taxa de ocupação por carro no período (inclusive)."""
+        dias_no_periodo = (fim - inicio).days + 1
+        linhas = self.db.execute(
+            select(Car.id, Car.license_plate, Car.category, func.count(DailyCarUsage.dia))
+            .outerjoin(DailyCarUsage, and_(
+                DailyCarUsage.car_id == Car.id, DailyCarUsage.dia.between(inicio, fim)
+            ))
+            .group_by(Car.id, Car.license_plate, Car.category)
+            .order_by(func.count(DailyCarUsage.dia).desc(), Car.license_plate)
+        ).all()
+        data = [
+            {
+                "car_id": car_id, "license_plate": placa, "category": categoria,
+                "days_rented": dias, "utilization": round(dias / dias_no_periodo, 4),
+            }
+            for car_id, placa, categoria, dias in linhas
+        ]
+        media = sum(linha["utilization"] for linha in data) / len(data) if data else 0.0
+        return {
+            "inicio": inicio,
+            "fim": fim,
+            "dias_no_periodo": dias_no_periodo,
+            "utilizacao_media": round(media, 4),
+            "data": data,
+        }
+
+    def fleet(self) -> dict:
+        """Carros por status e resumo de atrasos (mantido pelo job overdue_sweep)."""
+        por_status = dict(self.db.execute(select(Car.status, func.count()).group_by(Car.status)).all())
+        contagem = {status.value: por_status.get(status, 0) for status in CarStatus}
+        return {
+            "total": sum(contagem.values()),
+            "por_status": contagem,
+            "atrasadas": OverdueService(self.db).get_summary(),
+        }
+
+
+class AsyncReportService:
+    """Variante assíncrona do ReportService (mesma lógica via `run_sync`)."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def revenue(self, inicio: date, fim: date, agrupar: str = "category") -> dict:
+        return await self.db.run_sync(lambda s: ReportService(s).revenue(inicio, fim, agrupar))
+
+    async def utilization(self, inicio: date, fim: date) -> dict:
+        return await self.db.run_sync(lambda s: ReportService(s).utilization(inicio, fim))
+
+    async def fleet(self) -> dict:
+        return await self.db.run_sync(lambda s: ReportService(s).fleet())
+
+
+def run_reports_rebuild() -> dict:
+    """Job do agendador: reconstrução completa dos rollups numa sessão própria."""
+    db = SessionLocal()
+    try:
+        resultado = ReportService(db).rebuild()
+    finally:
+        db.close()
+    logger.info(f"Rollups reconstruídos: {resultado}")
+    return resultado
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from src.middleware.metrics import registry
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, todo processo vira líder (apenas dev)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# SCHEDULER_ENABLED=0 desliga os jobs neste processo (ex.: workers só de API)
+# SCHEDULER_LEADER_RETRY: segundos entre tentativas de virar líder / checagens da trava
+# SCHEDULER_LOCK_KEY: chave do advisory lock do PostgreSQL
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") == "1"
+SCHEDULER_LEADER_RETRY = float(os.getenv("SCHEDULER_LEADER_RETRY", "30"))
+SCHEDULER_LOCK_KEY = int(os.getenv("SCHEDULER_LOCK_KEY", "7301"))
+
+JOB_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+registry.histogram("scheduler_job_seconds", "Duração das execuções dos jobs agendados", JOB_BUCKETS)
+
+
+class LeaderLock:
+    """
+    Trava de líder entre workers: só quem a detém executa os jobs.
+
+    PostgreSQL: `pg_try_advisory_lock` numa conexão mantida aberta enquanto
+    o processo for líder (o lock é de sessão e some se a conexão cair).
+    SQLite: `flock` exclusivo num arquivo ao lado do banco. Outros bancos
+    (ou SQLite em memória): o processo é sempre líder.
+    """
+
+    def __init__(self, engine, key: int = SCHEDULER_LOCK_KEY):
+        self.engine = engine
+        self.key = key
+        self._conexao = None
+        self._arquivo = None
+
+    def acquire(self) -> bool:
+        dialeto = self.engine.dialect.name
+        if dialeto == "postgresql":
+            return self._acquire_postgres()
+        banco = self.engine.url.database
+        if dialeto == "sqlite" and banco and banco != ":memory:" and fcntl is not None:
+            return self._acquire_arquivo(f"{banco}.scheduler.lock")
+        return True
+
+    def _acquire_postgres(self) -> bool:
+        conexao = self.engine.connect()
+        try:
+            obtido = conexao.execute(text("SELECT pg_try_advisory_lock(:chave)"), {"chave": self.key}).scalar()
+            # Encerra a transação implícita; o advisory lock continua com a sessão
+            conexao.commit()
+        except Exception:
+            conexao.close()
+            raise
+        if not obtido:
+            conexao.close()
+            return False
+        self._conexao = conexao
+        return True
+
+    def _acquire_arquivo(self, caminho: str) -> bool:
+        arquivo = open(caminho, "a+")
+        try:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            arquivo.close()
+            return False
+        self._arquivo = arquivo
+        return True
+
+    def still_held(self) -> bool:
+        """No PostgreSQL, confirma que a conexão que detém o lock continua viva."""
+        if self._conexao is None:
+            return True
+        try:
+            self._conexao.execute(text("SELECT 1"))
+            self._conexao.commit()
+            return True
+        except Exception as e:
+            logger.warning(f"Conexão do líder do agendador perdida: {e}")
+            self.release()
+            return False
+
+    def release(self):
+        if self._conexao is not None:
+            try:
+                self._conexao.execute(text("SELECT pg_advisory_unlock(:chave)"), {"chave": self.key})
+                self._conexao.commit()
+            except Exception:
+                pass
+            self._conexao.close()
+            self._conexao = None
+        if self._arquivo is not None:
+            fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_UN)
+            self._arquivo.close()
+            self._arquivo = None
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], object]
+    interval: Optional[float] = None
+    at: Optional[str] = None
+    proxima: float = 0.0
+    ultimo_sucesso: Optional[float] = None
+    execucoes: int = 0
+    falhas: int = 0
+
+    def proxima_execucao(self) -> float:
+        """Instante (time.monotonic) da próxima execução: após `interval` ou no próximo `at` (HH:MM local)."""
+        if self.at is None:
+            return time.monotonic() + self.interval
+        hora, minuto = (int(parte) for parte in self.at.split(":"))
+        agora = datetime.now()
+        alvo = agora.replace(hour=hora, minute=minuto, second=0, microsecond=0)
+        if alvo <= agora:
+            alvo += timedelta(days=1)
+        return time.monotonic() + (alvo - agora).total_seconds()
+
+
+class Scheduler:
+    """
+    Agendador asyncio em processo.
+
+    Todos os workers rodam o laço, mas só o líder (ver LeaderLock) executa os
+    jobs; os demais tentam assumir a cada SCHEDULER_LEADER_RETRY segundos, o
+    que cobre a queda do líder. Os jobs são funções síncronas executadas em
+    thread, uma de cada vez.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self.is_leader = False
+        self._lock: Optional[LeaderLock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add_job(self, name: str, func: Callable[[], object], interval: Optional[float] = None,
+                at: Optional[str] = None):
+        """
+        Registra (ou substitui) um job.
+
+        Com `interval`, roda ao assumir a liderança e depois a cada `interval`
+        segundos; com `at` ("HH:MM"), roda uma vez por dia nesse horário.
+        """
+        if (interval is None) == (at is None):
+            raise ValueError("Informe `interval` ou `at`")
+        self.jobs[name] = Job(name, func, interval, at)
+
+    def start(self, engine):
+        if self._task is not None:
+            return
+        self._lock = LeaderLock(engine)
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_job(self, job: Job):
+        inicio = time.perf_counter()
+        situacao = "ok"
+        try:
+            await asyncio.to_thread(job.func)
+            job.ultimo_sucesso = time.time()
+        except Exception as e:
+            situacao = "erro"
+            job.falhas += 1
+            logger.exception(f"Job {job.name} falhou: {e}")
+        job.execucoes += 1
+        registry.observe("scheduler_job_seconds", (("job", job.name), ("status", situacao)),
+                         time.perf_counter() - inicio)
+
+    async def _loop(self):
+        try:
+            while True:
+                if not self.is_leader:
+                    try:
+                        self.is_leader = await asyncio.to_thread(self._lock.acquire)
+                    except Exception as e:
+                        logger.warning(f"Falha na eleição do agendador: {e}")
+                    if not self.is_leader:
+                        await asyncio.sleep(SCHEDULER_LEADER_RETRY)
+                        continue
+                    logger.info(f"Processo {os.getpid()} é o líder do agendador")
+                    agora = time.monotonic()
+                    for job in self.jobs.values():
+                        job.proxima = agora if job.at is None else job.proxima_execucao()
+
+                for job in list(self.jobs.values()):
+                    if job.proxima <= time.monotonic():
+                        await self.run_job(job)
+                        job.proxima = job.proxima_execucao()
+
+                proxima = min((job.proxima for job in self.jobs.values()), default=float("inf"))
+                await asyncio.sleep(min(max(proxima - time.monotonic(), 0.1), SCHEDULER_LEADER_RETRY))
+                self.is_leader = await asyncio.to_thread(self._lock.still_held)
+        finally:
+            self.is_leader = False
+            self._lock.release()
+
+    def gauges(self) -> list:
+        gauges = [("scheduler_is_leader", "1 se este processo executa os jobs agendados", int(self.is_leader))]
+        for job in self.jobs.values():
+            gauges.append((f"scheduler_job_{job.name}_runs_total", f"Execuções do job {job.name}", job.execucoes))
+            gauges.append((f"scheduler_job_{job.name}_failures_total", f"Falhas do job {job.name}", job.falhas))
+            gauges.append((
+                f"scheduler_job_{job.name}_last_success_timestamp",
+                f"Horário (epoch) do último sucesso do job {job.name}", job.ultimo_sucesso or 0,
+            ))
+        return gauges
+
+
+scheduler = Scheduler()
@@ -0,0 +1,67 @@
+from typing import Dict, Iterable, Optional, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import Numeric, select
+from sqlalchemy.orm import load_only
+
+from src.models.car import Car, CarOut
+from src.models.clientes import Cliente, ClienteList
+from src.models.rental import Rental, RentalOut
+
+
+class RowSerializer:
+    """
+    Serializador pré-compilado de linhas do Core para JSON (bytes).
+
+    Para um response model e a tabela correspondente, fixa as colunas a
+    selecionar (os campos do modelo, na ordem do modelo) e gera uma única
+    função com a montagem de cada objeto já desenrolada, por exemplo
+    `[{"id": r[0], "daily_rate": float(r[1]), ...} for r in rows]`.
+    O resultado vai direto para o orjson, que serializa nativamente UUID,
+    date/datetime e Enum: sem validação do Pydantic, sem `jsonable_encoder`
+    e sem objetos ORM. A saída é a mesma do response model.
+    """
+
+    def __init__(self, model: Type[BaseModel], entity):
+        self.model = model
+        self.entity = entity
+        table = entity.__table__
+        self.fields = [nome for nome in model.model_fields if nome in table.c]
+        self.columns = [table.c[nome] for nome in self.fields]
+        self.objects = self._compile()
+
+    def _compile(self):
+        partes = []
+        for i, (nome, coluna) in enumerate(zip(self.fields, self.columns)):
+            valor = f"r[{i}]"
+            # Numeric chega como Decimal, que o orjson não serializa (o modelo usa float)
+            if isinstance(coluna.type, Numeric):
+                valor = f"(None if r[{i}] is None else float(r[{i}]))" if coluna.nullable else f"float(r[{i}])"
+            partes.append(f"{nome!r}: {valor}")
+        codigo = f"def objects(rows):\n    return [{{{', '.join(partes)}}} for r in rows]\n"
+        namespace: Dict[str, object] = {}
+        exec(compile(codigo, f"<serializer {self.model.__name__}>", "exec"), namespace)
+        return namespace["objects"]
+
+    def select(self):
+        """SELECT apenas das colunas que o response model devolve."""
+        return select(*self.columns)
+
+    def load_only(self):
+        """Opção de carga do ORM equivalente: só as colunas do response model."""
+        return load_only(*(getattr(self.entity, nome) for nome in self.fields))
+
+    def dumps(self, rows: Iterable) -> bytes:
+        return orjson.dumps(self.objects(rows))
+
+
+def json_response(content: bytes, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """Resposta com um corpo JSON já serializado."""
+    return Response(content=content, status_code=status_code, headers=headers, media_type="application/json")
+
+
+RENTAL_OUT = RowSerializer(RentalOut, Rental)
+CAR_OUT = RowSerializer(CarOut, Car)
+CLIENTE_LIST = RowSerializer(ClienteList, Cliente)
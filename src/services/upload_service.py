@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# CNH_UPLOAD_MAX_BYTES: tamanho máximo do arquivo da CNH
+# CNH_UPLOAD_WRITE_BUFFER: bytes acumulados antes de cada escrita em disco (em thread)
+CNH_UPLOAD_MAX_BYTES = int(os.getenv("CNH_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+CNH_UPLOAD_WRITE_BUFFER = int(os.getenv("CNH_UPLOAD_WRITE_BUFFER", str(256 * 1024)))
+
+# Pedaços maiores que isto são entregues ao parser em fatias, devolvendo o
+# event loop entre elas
+_FATIA_PARSER = 64 * 1024
+
+# Folga para cabeçalhos e boundaries ao validar o Content-Length do multipart
+MULTIPART_OVERHEAD = 16 * 1024
+
+# Tipos aceitos: assinatura no início do arquivo -> (content type, extensão)
+CNH_TIPOS = {
+    b"\xff\xd8\xff": ("image/jpeg", ".jpg"),
+    b"\x89PNG\r\n\x1a\n": ("image/png", ".png"),
+    b"%PDF-": ("application/pdf", ".pdf"),
+}
+CNH_CONTENT_TYPES = {tipo for tipo, _ in CNH_TIPOS.values()} | {"image/jpg"}
+_ASSINATURA_MAX = max(len(assinatura) for assinatura in CNH_TIPOS)
+
+
+class UploadTooLarge(ValueError):
+    """Arquivo maior que o limite configurado."""
+
+
+class UnsupportedUpload(ValueError):
+    """Tipo de arquivo não aceito (declarado ou detectado pelo conteúdo)."""
+
+
+@dataclass
+class StoredUpload:
+    nome: str
+    caminho: str
+    tamanho: int
+    sha256: str
+    content_type: str
+    duplicado: bool
+
+
+def detectar_tipo(inicio: bytes) -> Optional[tuple]:
+    """(content type, extensão) pela assinatura do arquivo, ou None."""
+    for assinatura, tipo in CNH_TIPOS.items():
+        if inicio.startswith(assinatura):
+            return tipo
+    return None
+
+
+class MultipartFileReader:
+    """
+    Extrai, em streaming, os bytes de um campo de arquivo de um corpo multipart.
+
+    Iterar sobre o leitor devolve os pedaços do arquivo conforme o corpo
+    chega de `stream`, sem o arquivo temporário intermediário que o
+    Starlette cria em `request.form()`. `content_type` é o tipo declarado
+    na parte.
+    """
+
+    def __init__(self, content_type_header: str, campo: str, stream: AsyncIterable[bytes]):
+        tipo, opcoes = parse_options_header(content_type_header)
+        boundary = opcoes.get(b"boundary")
+        if tipo != b"multipart/form-data" or not boundary:
+            raise ValueError("Envie o arquivo como multipart/form-data")
+        self.campo = campo
+        self.stream = stream
+        self.content_type: Optional[str] = None
+        self.filename: Optional[str] = None
+        self.encontrado = False
+        self._dados: List[bytes] = []
+        self._no_campo = False
+        self._cabecalhos: Dict[bytes, bytes] = {}
+        self._nome_cabecalho = b""
+        self._valor_cabecalho = b""
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def _on_part_begin(self):
+        self._cabecalhos = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._nome_cabecalho += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._valor_cabecalho += data[start:end]
+
+    def _on_header_end(self):
+        self._cabecalhos[self._nome_cabecalho.lower()] = self._valor_cabecalho
+        self._nome_cabecalho = b""
+        self._valor_cabecalho = b""
+
+    def _on_headers_finished(self):
+        _, disposicao = parse_options_header(self._cabecalhos.get(b"content-disposition", b""))
+        if disposicao.get(b"name", b"").decode("latin-1") != self.campo or self.encontrado:
+            return
+        self._no_campo = self.encontrado = True
+        tipo, _ = parse_options_header(self._cabecalhos.get(b"content-type", b""))
+        self.content_type = tipo.decode("latin-1") or None
+        self.filename = disposicao.get(b"filename", b"").decode("utf-8", "replace") or None
+        if self.content_type not in CNH_CONTENT_TYPES:
+            raise UnsupportedUpload(f"Tipo de arquivo não aceito: {self.content_type}")
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._no_campo:
+            self._dados.append(data[start:end])
+
+    def _on_part_end(self):
+        self._no_campo = False
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._ler()
+
+    async def _ler(self) -> AsyncIterator[bytes]:
+        async for chunk in self.stream:
+            for inicio in range(0, len(chunk), _FATIA_PARSER):
+                if inicio:
+                    await asyncio.sleep(0)
+                self._parser.write(chunk[inicio:inicio + _FATIA_PARSER])
+                dados, self._dados = self._dados, []
+                for dado in dados:
+                    yield dado
+        self._parser.finalize()
+        for dado in self._dados:
+            yield dado
+        if not self.encontrado:
+            raise ValueError(f"Campo de arquivo '{self.campo}' ausente")
+
+
+class CnhStorage:
+    """
+    Armazenamento das fotos/PDFs de CNH, com deduplicação por conteúdo.
+
+    O arquivo é gravado em streaming num temporário (escritas em thread,
+    em blocos de CNH_UPLOAD_WRITE_BUFFER), com o limite de bytes checado a
+    cada pedaço recebido e o SHA-256 calculado no caminho. Ao final o
+    temporário é renomeado atomicamente para `<sha256><ext>`; se esse
+    arquivo já existe (mesma CNH enviada de novo), o temporário é apagado
+    e o existente é reaproveitado.
+    """
+
+    def __init__(self, diretorio: str, temporarios: str, max_bytes: int = CNH_UPLOAD_MAX_BYTES):
+        self.diretorio = diretorio
+        self.temporarios = temporarios
+        self.max_bytes = max_bytes
+
+    def _abrir_temporario(self):
+        os.makedirs(self.diretorio, exist_ok=True)
+        os.makedirs(self.temporarios, exist_ok=True)
+        descritor, caminho = tempfile.mkstemp(dir=self.temporarios, suffix=".part")
+        return os.fdopen(descritor, "wb"), caminho
+
+    @staticmethod
+    def _gravar(arquivo, sha, pedacos: List[bytes]):
+        # Em thread: o hashlib libera o GIL em blocos grandes
+        for pedaco in pedacos:
+            sha.update(pedaco)
+            arquivo.write(pedaco)
+
+    @staticmethod
+    def _concluir(arquivo):
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+        arquivo.close()
+
+    def _publicar(self, temporario: str, nome: str) -> tuple:
+        destino = os.path.join(self.diretorio, nome)
+        if os.path.exists(destino):
+            os.remove(temporario)
+            return destino, True
+        os.replace(temporario, destino)
+        return destino, False
+
+    async def salvar(self, fonte: AsyncIterable[bytes]) -> StoredUpload:
+        """
+        Grava o conteúdo de `fonte`.
+
+        Se a fonte tiver `content_type` (tipo declarado pelo cliente), ele
+        precisa corresponder à assinatura do arquivo.
+        """
+        arquivo, temporario = await asyncio.to_thread(self._abrir_temporario)
+        publicado = False
+        try:
+            sha = hashlib.sha256()
+            tamanho = 0
+            inicio = b""
+            buffer: List[bytes] = []
+            acumulado = 0
+            async for pedaco in fonte:
+                tamanho += len(pedaco)
+                if tamanho > self.max_bytes:
+                    raise UploadTooLarge(f"Arquivo maior que {self.max_bytes} bytes")
+                if len(inicio) < _ASSINATURA_MAX:
+                    inicio += pedaco[:_ASSINATURA_MAX]
+                buffer.append(pedaco)
+                acumulado += len(pedaco)
+                if acumulado >= CNH_UPLOAD_WRITE_BUFFER:
+                    await asyncio.to_thread(self._gravar, arquivo, sha, buffer)
+                    buffer, acumulado = [], 0
+            if buffer:
+                await asyncio.to_thread(self._gravar, arquivo, sha, buffer)
+            await asyncio.to_thread(self._concluir, arquivo)
+
+            tipo = detectar_tipo(inicio)
+            if tipo is None:
+                raise UnsupportedUpload("Conteúdo não é JPEG, PNG ou PDF")
+            declarado = getattr(fonte, "content_type", None)
+            if declarado is not None and declarado.replace("image/jpg", "image/jpeg") != tipo[0]:
+                raise UnsupportedUpload(f"Tipo declarado ({declarado}) não corresponde ao conteúdo ({tipo[0]})")
+
+            digest = sha.hexdigest()
+            caminho, duplicado = await asyncio.to_thread(self._publicar, temporario, digest + tipo[1])
+            publicado = True
+            return StoredUpload(os.path.basename(caminho), caminho, tamanho, digest, tipo[0], duplicado)
+        finally:
+            if not publicado:
+                arquivo.close()
+                await asyncio.to_thread(_remover, temporario)
+
+
+def _remover(caminho: str):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import uuid
+from typing import List, Optional
+
+import pytest
+
+# Banco SQLite em arquivo num diretório descartável: a URL de desenvolvimento é
+# relativa ao diretório atual (NODE_ENV=test usa ":memory:", que não é
+# compartilhado entre as conexões do pool). Precisa vir antes de importar o app.
+os.chdir(tempfile.mkdtemp(prefix="muviscar-tests-"))
+os.environ.setdefault("NODE_ENV", "dev")
+os.environ.setdefault("CACHE_BACKEND", "local")
+
+from fastapi import Request  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.middleware import query_budget as query_budget_module  # noqa: E402
+from src.middleware.metrics import RequestStats, request_hooks  # noqa: E402
+from src.middleware.query_budget import QUERY_BUDGET_MAX_REPEATS, query_budget  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app as aplicacao
+
+    return aplicacao
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    """Aplicação completa (com lifespan) sobre o banco descartável, compartilhada pela sessão."""
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def db(client):
+    """Sessão síncrona no mesmo banco da aplicação."""
+    from src.config.database import SessionLocal
+
+    with SessionLocal() as sessao:
+        yield sessao
+
+
+@pytest.fixture
+def criar_carro(client):
+    """Cadastra um carro DISPONIVEL com placa única e devolve o JSON da API."""
+    def criar(**campos) -> dict:
+        dados = {
+            "brand": "VW", "model": "Gol", "year": 2020, "color": "Prata",
+            "license_plate": f"T{uuid.uuid4().hex[:6].upper()}", "category": "ECONOMICO", "daily_rate": 100,
+            "mileage": 0, "fuel_type": "FLEX", "transmission_type": "MANUAL", "passengers": 5,
+        }
+        dados.update(campos)
+        r = client.post("/cars/carros", json=dados)
+        assert r.status_code == 200, r.text
+        return r.json()
+    return criar
+
+
+@pytest.fixture
+def criar_cliente(client):
+    """Cadastra um cliente com CPF e email únicos e devolve o JSON da API."""
+    def criar(**campos) -> dict:
+        cpf = f"{uuid.uuid4().int % 10**11:011d}"
+        dados = {"nome": "Cliente Teste", "email": f"teste{cpf}@example.com", "cpf_cnpj": cpf, "senha": "segredo1"}
+        dados.update(campos)
+        r = client.post("/clientes/", json=dados)
+        assert r.status_code == 201, r.text
+        return r.json()
+    return criar
+
+
+@pytest.fixture
+def query_budget_guard(monkeypatch):
+    """
+    Força o modo "raise" (inclusive nos orçamentos declarados com
+    `route_budget`) e devolve uma fábrica de blocos:
+
+        def test_listagem(client, query_budget_guard):
+            with query_budget_guard(3) as stats:
+                client.get("/rental/locacoes")
+
+    O TestClient executa a aplicação em outra thread, então as queries
+    das requisições feitas dentro do bloco são somadas a ele pelo hook
+    do middleware de métricas.
+    """
+    monkeypatch.setattr(query_budget_module, "QUERY_BUDGET_MODE", "raise")
+    abertos: List[RequestStats] = []
+
+    def coletar(request: Request, stats: RequestStats):
+        for bloco in abertos:
+            bloco.sql_count += stats.sql_count
+            bloco.sql_time += stats.sql_time
+            bloco.statements.extend(stats.statements)
+
+    class _Bloco(query_budget):
+        def __enter__(self):
+            stats = super().__enter__()
+            abertos.append(stats)
+            return stats
+
+        def __exit__(self, exc_type, exc, tb):
+            abertos.remove(self.stats)
+            return super().__exit__(exc_type, exc, tb)
+
+    def fabrica(max_queries: Optional[int] = None, max_repeats: Optional[int] = QUERY_BUDGET_MAX_REPEATS):
+        return _Bloco(max_queries, max_repeats, label="teste", mode="raise")
+
+    request_hooks.append(coletar)
+    yield fabrica
+    request_hooks.remove(coletar)
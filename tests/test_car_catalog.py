@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import select, update
+
+from src.models.car import Car, CarCategory, CarStatus
+from src.services.car_cache import invalidate_car
+
+
+@pytest.fixture(scope="module")
+def frota(client):
+    """Carros de categorias e status variados, em três datas de cadastro fora da ordem de inserção."""
+    from src.config.database import SessionLocal
+
+    for i in range(23):
+        r = client.post("/cars/carros", json={
+            "brand": "VW", "model": "Gol", "year": 2020, "color": "Prata", "license_plate": f"CAT{i:04d}",
+            "category": ("ECONOMICO", "SUV", "EXECUTIVO")[i % 3], "daily_rate": 100 + i, "mileage": 0,
+            "fuel_type": "FLEX", "transmission_type": "MANUAL", "passengers": 5,
+        })
+        assert r.status_code == 200, r.text
+        if i % 4 == 0:
+            assert client.patch(f"/cars/carros/CAT{i:04d}/status", json="MANUTENCAO").status_code == 200
+        with SessionLocal() as db:
+            db.execute(update(Car).where(Car.license_plate == f"CAT{i:04d}").values(created_at=f"2020-01-0{3 - i % 3} 08:00:00"))
+            db.commit()
+    # Alteração feita por fora da API: força a releitura da frota
+    invalidate_car(None)
+
+
+def ids_no_banco(db, **filtros):
+    """Ids na ordem e com os filtros da consulta SQL que o catálogo substituiu."""
+    stmt = select(Car.id).filter_by(**filtros).order_by(Car.created_at, Car.id)
+    return [str(car_id) for car_id in db.execute(stmt).scalars()]
+
+
+@pytest.mark.parametrize("params, filtros", [
+    ({}, {}),
+    ({"category": "SUV"}, {"category": CarCategory.SUV}),
+    ({"status": "MANUTENCAO", "with_total": False}, {"status": CarStatus.MANUTENCAO}),
+    ({"status": "DISPONIVEL", "category": "EXECUTIVO"}, {"status": CarStatus.DISPONIVEL, "category": CarCategory.EXECUTIVO}),
+])
+def test_cursor_percorre_o_catalogo_na_ordem_do_sql(client, db, frota, params, filtros):
+    esperados = ids_no_banco(db, **filtros)
+    vistos, pagina = [], dict(params, limit=4)
+    # Limite de páginas: um cursor que não avança falha em vez de travar o teste
+    for _ in range(len(esperados) // 4 + 2):
+        r = client.get("/cars/carros", params=pagina)
+        assert r.status_code == 200, r.text
+        corpo = r.json()
+        vistos += [carro["id"] for carro in corpo["data"]]
+        assert corpo["pagination"]["total"] == (len(esperados) if params.get("with_total", True) else None)
+        if not corpo["pagination"]["next_cursor"]:
+            break
+        pagina = dict(params, limit=4, cursor=corpo["pagination"]["next_cursor"])
+    else:
+        pytest.fail("next_cursor não chegou ao fim do catálogo")
+    assert vistos == esperados
+
+
+def test_paginas_por_offset(client, db, frota):
+    esperados = ids_no_banco(db)
+    for page in (1, 3, len(esperados) // 5 + 2):
+        r = client.get("/cars/carros", params={"page": page, "limit": 5})
+        assert r.status_code == 200, r.text
+        assert [carro["id"] for carro in r.json()["data"]] == esperados[(page - 1) * 5:page * 5]
+
+
+@pytest.mark.parametrize("params, detalhe", [
+    ({"status": "XX"}, "Status inválido"),
+    ({"category": "YY"}, "Categoria inválida"),
+    ({"cursor": "lixo"}, "Cursor inválido"),
+])
+def test_parametros_invalidos(client, params, detalhe):
+    r = client.get("/cars/carros", params=params)
+    assert r.status_code == 400
+    assert r.json()["detail"] == detalhe
+
+
+def test_features_fora_do_formato_nao_derrubam_o_catalogo(client, criar_carro):
+    # `features`/`images` são JSON livre: o PUT grava o que vier, inclusive objetos
+    carro = criar_carro()
+    outro = criar_carro()
+    r = client.put(f"/cars/carros/{carro['license_plate']}", json={"features": {"ar": True}})
+    assert r.status_code == 200, r.text
+    r = client.put(f"/cars/carros/{outro['license_plate']}", json={"images": [{"url": "a.jpg"}]})
+    assert r.status_code == 200, r.text
+    invalidate_car(None)  # releitura completa da frota, além da atualização por carro
+
+    r = client.get("/cars/carros")
+    assert r.status_code == 200, r.text
+    r = client.get("/cars/availability", params={"start_date": "2040-01-01", "end_date": "2040-01-03"})
+    assert r.status_code == 200, r.text
+    por_id = {c["id"]: c for c in r.json()["data"]}
+    assert por_id[carro["id"]]["features"] == {"ar": True}
+    assert por_id[outro["id"]]["images"] == [{"url": "a.jpg"}]
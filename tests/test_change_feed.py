@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from src.services.change_feed import PostgresTransport, change_feed
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def recebidos():
+    """Eventos entregues aos handlers da tabela de teste."""
+    eventos = []
+    change_feed.subscribe("teste", eventos.append)
+    yield eventos
+    change_feed._handlers.pop("teste")
+
+
+class NotifyNaSessao(PostgresTransport):
+    """PostgresTransport que registra o `pg_notify` em vez de executá-lo (não há PostgreSQL aqui)."""
+
+    def __init__(self):
+        super().__init__(change_feed, engine=None)
+        self.chamadas = []
+
+    def publicar(self, evento, db):
+        self.chamadas.append((evento.chave, db, db.in_transaction(), db.connection()))
+
+
+def test_eventos_locais_esperam_o_commit(engine, recebidos):
+    with Session(engine) as db:
+        db.connection()
+        change_feed.publish("teste", 1, db)
+        assert recebidos == []
+        db.commit()
+    assert [evento.chave for evento in recebidos] == ["1"]
+
+
+def test_rollback_descarta_os_eventos(engine, recebidos):
+    with Session(engine) as db:
+        db.connection()
+        change_feed.publish("teste", 1, db)
+        db.rollback()
+        change_feed.publish("teste", 2, db)
+        db.commit()
+        db.connection()
+        change_feed.publish("teste", 3, db)
+        db.close()
+        db.connection()
+        db.commit()
+    assert [evento.chave for evento in recebidos] == ["2"]
+
+
+def test_savepoint_nao_publica_antes_do_commit(engine, recebidos):
+    with Session(engine) as db:
+        db.connection()
+        with db.begin_nested():
+            change_feed.publish("teste", 1, db)
+        assert recebidos == []
+        db.commit()
+    assert [evento.chave for evento in recebidos] == ["1"]
+
+
+def test_postgres_notifica_na_conexao_da_sessao_antes_do_commit(engine, monkeypatch):
+    transporte = NotifyNaSessao()
+    monkeypatch.setattr(change_feed, "_transporte", transporte)
+    conexoes = []
+    event.listen(engine, "connect", lambda conexao, registro: conexoes.append(conexao))
+
+    with Session(engine) as db:
+        conexao = db.connection()
+        change_feed.publish("teste", 1, db)
+        assert transporte.chamadas == [("1", db, True, conexao)]
+        db.commit()
+
+    # Nenhuma conexão além da usada pela sessão
+    assert len(conexoes) == 1
+
+
+def test_postgres_sem_sessao_conta_falha(monkeypatch):
+    monkeypatch.setattr(change_feed, "_transporte", NotifyNaSessao())
+    falhas = change_feed.falhas
+    change_feed.publish("teste", 1)
+    assert change_feed.falhas == falhas + 1
@@ -0,0 +1,43 @@
+import asyncio
+import uuid
+from collections import Counter
+
+import httpx
+from sqlalchemy import func, select
+
+from src.models.rental import Rental, RentalStatus
+
+REQUISICOES = 300
+
+
+def test_reservas_simultaneas_no_mesmo_carro(app, client, db, criar_carro, criar_cliente):
+    carro = criar_carro()
+    cliente = criar_cliente()
+
+    async def disparar():
+        # Executado no event loop da aplicação (portal do TestClient): as
+        # requisições concorrem de fato pelos mesmos engines e pela mesma linha
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://teste", timeout=60) as http:
+            # Abre as conexões do pool antes: sem isso a primeira reserva termina
+            # enquanto as outras ainda conectam e a corrida não acontece
+            await asyncio.gather(*(http.get(f"/clientes/{cliente['id']}") for _ in range(20)))
+
+            async def reservar(i: int) -> int:
+                # Períodos diferentes, todos sobrepostos entre si
+                r = await http.post("/rental/locacoes", json={
+                    "cliente_id": cliente["id"], "car_id": carro["id"],
+                    "start_date": f"2032-05-{1 + i % 3:02d}", "end_date": f"2032-05-{6 + i % 3:02d}",
+                    "mileage_start": 0, "payment_method": "PIX",
+                })
+                return r.status_code
+            return await asyncio.gather(*(reservar(i) for i in range(REQUISICOES)))
+
+    status = Counter(client.portal.call(disparar))
+
+    assert status == {201: 1, 409: REQUISICOES - 1}
+    ativas = db.execute(
+        select(func.count()).select_from(Rental)
+        .where(Rental.car_id == uuid.UUID(carro["id"]), Rental.status == RentalStatus.ATIVA)
+    ).scalar()
+    assert ativas == 1
@@ -0,0 +1,114 @@
+import re
+import uuid
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session
+
+from src.config.database import Base, import_models
+from src.models.car import Car, CarCategory, CarStatus, FuelType, TransmissionType
+from src.models.clientes import Cliente
+from src.models.rental import PaymentMethod, Rental, RentalStatus
+from src.services.cliente_service import ClienteService, ensure_sqlite_search_index
+from src.services.rental_service import RentalService
+
+# Colunas de RentalOut e ClienteList: as listagens não devem ler nada além disso
+COLUNAS_LOCACAO = {
+    "id", "cliente_id", "car_id", "start_date", "end_date", "actual_end_date", "total_days", "daily_rate",
+    "total_amount", "additional_fees", "mileage_start", "mileage_end", "observations", "status",
+    "payment_status", "payment_method", "cnh_photo_path",
+}
+COLUNAS_CLIENTE = {"id", "nome", "email", "telefone", "cidade", "ativo", "data_criacao"}
+# Dados sensíveis / de endereço que nunca podem sair nas listagens de clientes
+COLUNAS_PROIBIDAS = {"password_hash", "endereco", "estado", "cep", "data_nascimento"}
+
+CARRO_ID = uuid.uuid4()
+
+
+def _criar_engine(com_fts: bool):
+    engine = create_engine("sqlite://")
+    import_models()
+    Base.metadata.create_all(engine, tables=[Cliente.__table__, Car.__table__, Rental.__table__])
+    with engine.begin() as conexao:
+        conexao.execute(insert(Cliente), [{
+            "nome": "Ana Silva", "email": "ana@example.com", "telefone": "11999990000", "cpf_cnpj": "12345678901",
+            "password_hash": "$2b$12$" + "x" * 53, "endereco": "Rua A, 1", "cidade": "São Paulo",
+            "estado": "SP", "cep": "01310100",
+        }])
+        conexao.execute(insert(Car), [{
+            "id": CARRO_ID, "brand": "VW", "model": "Gol", "year": 2020, "color": "Prata",
+            "license_plate": "ABC1234", "category": CarCategory.ECONOMICO, "daily_rate": 100, "mileage": 0,
+            "status": CarStatus.DISPONIVEL, "fuel_type": FuelType.FLEX,
+            "transmission_type": TransmissionType.MANUAL, "passengers": 5, "features": [], "images": [],
+        }])
+        conexao.execute(insert(Rental), [{
+            "cliente_id": 1, "car_id": CARRO_ID, "start_date": date(2030, 1, 1), "end_date": date(2030, 1, 4),
+            "total_days": 3, "daily_rate": 100, "total_amount": 300, "additional_fees": 0, "mileage_start": 0,
+            "status": RentalStatus.FINALIZADA, "payment_method": PaymentMethod.PIX,
+        }])
+    if com_fts:
+        ensure_sqlite_search_index(engine)
+    return engine
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = _criar_engine(com_fts=True)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def engine_sem_fts():
+    engine = _criar_engine(com_fts=False)
+    yield engine
+    engine.dispose()
+
+
+def colunas_lidas(engine, func):
+    """Executa `func(db)` e devolve a tabela e as colunas do último SELECT emitido, o SQL e o resultado."""
+    comandos = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        comandos.append(statement)
+
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        with Session(engine) as db:
+            resultado = func(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+
+    selects = [comando for comando in comandos if comando.lstrip().upper().startswith("SELECT")]
+    lista = re.search(r"SELECT (.*?)\s+FROM", selects[-1], re.S).group(1)
+    colunas = [coluna.split(" AS ")[0].strip() for coluna in lista.split(",")]
+    tabelas = {coluna.split(".")[0] for coluna in colunas}
+    assert len(tabelas) == 1, f"SELECT com colunas de mais de uma tabela: {colunas}"
+    return tabelas.pop(), {coluna.split(".")[1] for coluna in colunas}, selects[-1], resultado
+
+
+@pytest.mark.parametrize("nome, func", [
+    ("get_rentals", lambda db: RentalService(db).get_rentals(limit=10)),
+    ("get_rentals_by_cliente", lambda db: RentalService(db).get_rentals_by_cliente(1)),
+    ("get_rentals_by_car", lambda db: RentalService(db).get_rentals_by_car(CARRO_ID)),
+])
+def test_listagens_de_locacoes_leem_so_rental_out(engine, nome, func):
+    tabela, colunas, _, resultado = colunas_lidas(engine, func)
+    assert tabela == "locacoes"
+    assert colunas == COLUNAS_LOCACAO
+    assert len(resultado) == 1
+
+
+@pytest.mark.parametrize("nome, func, fixture, trecho", [
+    ("get_clientes", lambda db: ClienteService(db).get_clientes(limit=10), "engine", "FROM CLIENTES"),
+    ("search_clientes (FTS5)", lambda db: ClienteService(db).search_clientes("ana"), "engine", "MATCH"),
+    ("search_clientes (LIKE)", lambda db: ClienteService(db).search_clientes("ana"), "engine_sem_fts", "LIKE"),
+])
+def test_listagens_de_clientes_leem_so_cliente_list(request, nome, func, fixture, trecho):
+    tabela, colunas, sql, resultado = colunas_lidas(request.getfixturevalue(fixture), func)
+    assert trecho in sql.upper()
+    assert tabela == "clientes"
+    assert colunas == COLUNAS_CLIENTE
+    assert not colunas & COLUNAS_PROIBIDAS
+    assert [cliente.nome for cliente in resultado] == ["Ana Silva"]
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy.orm import joinedload
+
+from src.middleware.query_budget import QueryBudgetExceeded
+from src.models.clientes import Cliente, ClienteComLocacoes
+
+
+@pytest.fixture
+def cliente_com_locacoes(client, criar_carro, criar_cliente):
+    """Cliente com três locações (uma por carro)."""
+    cliente = criar_cliente()
+    for dia in (1, 10, 20):
+        carro = criar_carro()
+        r = client.post("/rental/locacoes", json={
+            "cliente_id": cliente["id"], "car_id": carro["id"],
+            "start_date": f"2031-03-{dia:02d}", "end_date": f"2031-03-{dia + 3:02d}",
+            "mileage_start": 0, "payment_method": "PIX",
+        })
+        assert r.status_code == 201, r.text
+    return cliente
+
+
+@pytest.mark.parametrize("rota, orcamento", [
+    ("/rental/locacoes", 2),
+    ("/clientes/", 2),
+    ("/rental/cliente/{id}", 1),
+])
+def test_listagens_dentro_do_orcamento(client, query_budget_guard, cliente_com_locacoes, rota, orcamento):
+    # O `route_budget` de cada rota também é verificado (modo raise) pelo middleware
+    with query_budget_guard(orcamento) as stats:
+        r = client.get(rota.format(id=cliente_com_locacoes["id"]))
+    assert r.status_code == 200, r.text
+    assert r.json()
+    assert 1 <= stats.sql_count <= orcamento
+
+
+def test_n_mais_1_falha_no_modo_raise(db, query_budget_guard, cliente_com_locacoes, criar_cliente):
+    for _ in range(3):
+        criar_cliente()
+    clientes = db.query(Cliente).order_by(Cliente.id).limit(5)
+
+    # Cada cliente dispara o lazy load de `locacoes`: a mesma instrução N vezes
+    with pytest.raises(QueryBudgetExceeded, match="N\\+1"):
+        with query_budget_guard():
+            [ClienteComLocacoes.model_validate(cliente) for cliente in clientes.all()]
+
+
+def test_joinedload_passa_no_orcamento(db, query_budget_guard, cliente_com_locacoes):
+    with query_budget_guard(1):
+        cliente = db.query(Cliente).options(joinedload(Cliente.locacoes)).filter(
+            Cliente.id == cliente_com_locacoes["id"]
+        ).one()
+        resposta = ClienteComLocacoes.model_validate(cliente)
+    assert len(resposta.locacoes) == 3